@@ -7,53 +7,56 @@ PUMA商品信息查询Web应用
 
 import sys
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 # 首先检查并安装必要的依赖
 try:
     import requests
 except ImportError:
-    print("正在安装requests...")
+    logger.warning("正在安装requests...")
     os.system("pip install requests")
     import requests
 
 try:
     from flask import Flask, render_template, request, jsonify, url_for
 except ImportError:
-    print("正在安装Flask...")
+    logger.warning("正在安装Flask...")
     os.system("pip install flask")
     from flask import Flask, render_template, request, jsonify, url_for
 
 import json
 from datetime import datetime
-import traceback
 import re
-from html import unescape
 
 # 添加src目录到Python路径
 src_path = os.path.join(os.path.dirname(__file__), 'src')
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
 
+# 配置日志（级别/JSON格式/静默模式见config.py，可用PUMA_LOG_*环境变量覆盖）
+from log_config import setup_logging
+setup_logging()
+
+from description_parser import parse_long_description
+
 # 尝试导入新的GraphQL API客户端
 new_api_client_available = False
 try:
     from new_puma_graphql_api import NewPumaGraphQLAPI
-    from dataclasses import asdict
+    from response_cache import ResponseCache
     new_api_client_available = True
-    print("✅ 成功导入NewPumaGraphQLAPI（新的GraphQL API客户端）")
+    logger.info("✅ 成功导入NewPumaGraphQLAPI（新的GraphQL API客户端）")
 except ImportError as e:
-    print(f"⚠️ 导入NewPumaGraphQLAPI失败: {e}")
-    print("❌ 无法使用新的GraphQL API，系统将无法获取商品信息")
-    
-    # 创建模拟的数据转换函数
-    def asdict(obj):
-        return {}
+    logger.warning("⚠️ 导入NewPumaGraphQLAPI失败: %s", e)
+    logger.error("❌ 无法使用新的GraphQL API，系统将无法获取商品信息")
 
 # 添加OpenAI SDK支持
 try:
     from openai import OpenAI
 except ImportError:
-    print("正在安装openai...")
+    logger.warning("正在安装openai...")
     os.system("pip install openai")
     from openai import OpenAI
 
@@ -64,18 +67,18 @@ try:
     from tencentcloud.common.profile.http_profile import HttpProfile
     from tencentcloud.hunyuan.v20230901 import hunyuan_client, models
     tencent_sdk_available = True
-    print("✅ 成功导入腾讯云SDK")
+    logger.info("✅ 成功导入腾讯云SDK")
 except ImportError as e:
-    print(f"⚠️ 导入腾讯云SDK失败: {e}")
+    logger.warning("⚠️ 导入腾讯云SDK失败: %s", e)
     tencent_sdk_available = False
 
 # 导入大模型配置
 try:
     from llm_config import get_llm_config, get_api_key, get_secret_key, get_region, is_llm_enabled, use_tencent_sdk
     llm_config_available = True
-    print("✅ 成功导入大模型配置")
+    logger.info("✅ 成功导入大模型配置")
 except ImportError as e:
-    print(f"⚠️ 导入大模型配置失败: {e}")
+    logger.warning("⚠️ 导入大模型配置失败: %s", e)
     llm_config_available = False
     # 创建默认配置
     def get_llm_config():
@@ -121,21 +124,22 @@ def get_api_client():
     if new_api_client is None and new_api_client_available:
         try:
             if 'NewPumaGraphQLAPI' in globals():
-                new_api_client = NewPumaGraphQLAPI()
-                print("✅ 初始化NewPumaGraphQLAPI成功")
+                # 页面刷新和同款多色查询会重复请求同一商品，使用内存缓存
+                new_api_client = NewPumaGraphQLAPI(cache=ResponseCache(), background_token_refresh=True)
+                logger.info("✅ 初始化NewPumaGraphQLAPI成功")
                 return new_api_client
             else:
-                print("❌ NewPumaGraphQLAPI类未找到")
+                logger.error("❌ NewPumaGraphQLAPI类未找到")
                 return None
         except Exception as e:
-            print(f"❌ 初始化NewPumaGraphQLAPI失败: {e}")
+            logger.error("❌ 初始化NewPumaGraphQLAPI失败: %s", e)
             new_api_client = None
             return None
     elif new_api_client is not None:
         return new_api_client
     
     # 如果新API不可用，直接返回None
-    print("❌ 新的GraphQL API客户端不可用")
+    logger.error("❌ 新的GraphQL API客户端不可用")
     return None
 
 @app.route('/')
@@ -163,8 +167,8 @@ def scrape_product():
                 'error': '请输入有效的PUMA商品页面URL'
             })
         
-        print(f"🔍 开始爬取商品信息: {url}")
-        print(f"🔧 新GraphQL API客户端可用: {new_api_client_available}")
+        logger.debug("🔍 开始爬取商品信息: %s", url)
+        logger.debug("🔧 新GraphQL API客户端可用: %s", new_api_client_available)
         
         # 仅使用新的GraphQL API获取商品信息
         client = get_api_client()
@@ -174,21 +178,21 @@ def scrape_product():
                 'error': '新的GraphQL API客户端初始化失败，无法获取商品信息'
             })
             
-        print(f"📊 使用API客户端类型: {type(client).__name__}")
+        logger.debug("📊 使用API客户端类型: %s", type(client).__name__)
         
         # 调用相应的API方法爬取商品信息
         product_info = client.scrape_product(url)
-        print(f"📊 获取结果类型: {type(product_info)}")
+        logger.debug("📊 获取结果类型: %s", type(product_info))
         
         if product_info:
-            print(f"✅ 成功获取商品信息")
+            logger.info("✅ 成功获取商品信息")
             
             # 转换为ProductInfo对象为字典格式
-            if hasattr(product_info, '__dict__'):
-                # ProductInfo对象，使用dataclass的asdict
+            if not isinstance(product_info, dict):
+                # ProductInfo对象，使用to_dict（不深拷贝嵌套数据）
                 try:
-                    product_dict = asdict(product_info)
-                    print(f"📋 使用asdict转换ProductInfo对象")
+                    product_dict = product_info.to_dict()
+                    logger.debug("📋 使用to_dict转换ProductInfo对象")
                 except Exception as e:
                     # 如果不是dataclass，手动转换
                     product_dict = {
@@ -250,24 +254,24 @@ def scrape_product():
                         'method': 'new_graphql',
                         'url': url
                     }
-                    print(f"📋 手动转换ProductInfo对象")
+                    logger.debug("📋 手动转换ProductInfo对象")
             else:
                 product_dict = product_info if isinstance(product_info, dict) else {}
-                print(f"📋 直接使用字典数据")
+                logger.debug("📋 直接使用字典数据")
             
-            print(f"📊 商品数据键: {list(product_dict.keys()) if isinstance(product_dict, dict) else 'N/A'}")
+            logger.debug("📊 商品数据键: %s", list(product_dict.keys()) if isinstance(product_dict, dict) else 'N/A')
             # 格式化一些字段以便前端显示
             formatted_product = format_product_for_display(product_dict)
             
             product_name = formatted_product.get('basic_info', {}).get('name', 'Unknown')
-            print(f"✅ 成功获取商品信息: {product_name}")
+            logger.info("✅ 成功获取商品信息: %s", product_name)
             
             return jsonify({
                 'success': True,
                 'product': formatted_product
             })
         else:
-            print(f"❌ 未能获取到商品信息")
+            logger.error("❌ 未能获取到商品信息")
             return jsonify({
                 'success': False,
                 'error': '无法获取商品信息，可能原因：\n1. 商品URL不正确\n2. 网络连接问题\n3. 商品不存在或已下架\n4. 认证token已过期\n请检查URL或稍后再试'
@@ -275,8 +279,7 @@ def scrape_product():
             
     except Exception as e:
         error_msg = str(e)
-        print(f"❌ 爬取过程中发生错误: {error_msg}")
-        traceback.print_exc()
+        logger.exception("❌ 爬取过程中发生错误: %s", error_msg)
         
         return jsonify({
             'success': False,
@@ -287,6 +290,8 @@ def parse_long_description_html(html_content):
     """
     解析longDescription中的HTML内容，提取标题和列表项
     
+    单次扫描实现见description_parser，结果按内容哈希缓存，相同的描述只解析一次
+    
     Args:
         html_content (str): HTML格式的长描述内容
     
@@ -297,59 +302,11 @@ def parse_long_description_html(html_content):
         return {}
     
     try:
-        # 解析结果存储
-        parsed_data = {}
-        
-        # HTML实体解码
-        html_content = unescape(html_content)
-        
-        # 查找所有h3标题和对应的ul列表
-        # 匹配模式：<h3>标题</h3>后面可能跟着文本或<ul>列表
-        pattern = r'<h3[^>]*>\s*([^<]+?)\s*</h3>([\s\S]*?)(?=<h3|$)'
-        
-        matches = re.findall(pattern, html_content, re.IGNORECASE | re.DOTALL)
-        
-        for title, content in matches:
-            # 清理标题
-            clean_title = title.strip()
-            
-            # 初始化该标题的数据
-            section_data = {
-                'title': clean_title,
-                'text': '',
-                'list_items': []
-            }
-            
-            # 查找该部分中的列表项
-            li_pattern = r'<li[^>]*>\s*([\s\S]*?)\s*</li>'
-            list_items = re.findall(li_pattern, content, re.IGNORECASE | re.DOTALL)
-            
-            for item in list_items:
-                # 移除HTML标签，保留纯文本
-                clean_item = re.sub(r'<[^>]+>', '', item)
-                # 清理多余的空白字符
-                clean_item = re.sub(r'\s+', ' ', clean_item).strip()
-                if clean_item:
-                    section_data['list_items'].append(clean_item)
-            
-            # 提取非列表的文本内容
-            # 移除ul标签及其内容
-            text_content = re.sub(r'<ul[^>]*>[\s\S]*?</ul>', '', content, flags=re.IGNORECASE)
-            # 移除所有HTML标签
-            text_content = re.sub(r'<[^>]+>', '', text_content)
-            # 清理空白字符
-            text_content = re.sub(r'\s+', ' ', text_content).strip()
-            
-            if text_content:
-                section_data['text'] = text_content
-            
-            # 使用标题作为key存储
-            parsed_data[clean_title] = section_data
-        
+        parsed_data, _ = parse_long_description(html_content)
         return parsed_data
         
     except Exception as e:
-        print(f"❌ 解析longDescription HTML时发生错误: {e}")
+        logger.error("❌ 解析longDescription HTML时发生错误: %s", e)
         return {}
 
 def format_product_for_display(product_dict):
@@ -525,8 +482,12 @@ def process_current_variation(current_variation):
     # 处理longDescription
     long_description = current_variation.get('longDescription', '')
     if long_description:
-        # 解析HTML内容
-        parsed_content = parse_long_description_html(long_description)
+        # 解析HTML内容，同时得到纯文本版本（去除HTML标签），结果有缓存
+        try:
+            parsed_content, text_only = parse_long_description(long_description)
+        except Exception as e:
+            logger.error("❌ 解析longDescription HTML时发生错误: %s", e)
+            parsed_content, text_only = {}, re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', '', long_description)).strip()
         
         # 添加解析后的结构化数据
         processed_variation['parsed_long_description'] = parsed_content
@@ -534,9 +495,6 @@ def process_current_variation(current_variation):
         # 保留原始HTML内容
         processed_variation['longDescription_raw'] = long_description
         
-        # 生成纯文本版本（去除HTML标签）
-        text_only = re.sub(r'<[^>]+>', '', long_description)
-        text_only = re.sub(r'\s+', ' ', text_only).strip()
         processed_variation['longDescription_text'] = text_only
     
     return processed_variation
@@ -550,7 +508,7 @@ def get_llm_client():
     
     # 检查是否启用大模型功能
     if not is_llm_enabled():
-        print("⏭️ 大模型功能未启用")
+        logger.info("⏭️ 大模型功能未启用")
         return None
         
     # 仅使用腾讯云SDK
@@ -564,7 +522,7 @@ def get_llm_client():
                 region = get_region()
                 
                 if not api_key or api_key == "LKEAP_API_KEY":
-                    print("❌ 未配置有效的API Key，请检查配置")
+                    logger.error("❌ 未配置有效的API Key，请检查配置")
                     return None
                 
                 # 初始化腾讯云凭证
@@ -580,13 +538,13 @@ def get_llm_client():
                 
                 # 初始化客户端
                 tencent_client = hunyuan_client.HunyuanClient(cred, region, clientProfile)
-                print("✅ 成功初始化腾讯云大模型API客户端")
+                logger.info("✅ 成功初始化腾讯云大模型API客户端")
             except Exception as e:
-                print(f"❌ 初始化腾讯云大模型API客户端失败: {e}")
+                logger.error("❌ 初始化腾讯云大模型API客户端失败: %s", e)
                 tencent_client = None
         return tencent_client
     else:
-        print("❌ 腾讯云SDK不可用")
+        logger.error("❌ 腾讯云SDK不可用")
         return None
 
 @app.route('/api/llm/chat', methods=['POST'])
@@ -609,7 +567,7 @@ def llm_chat():
                 'error': '大模型API客户端不可用，请检查API Key配置'
             })
         
-        print(f"💬 大模型对话请求: {message[:100]}..." if len(message) > 100 else f"💬 大模型对话请求: {message}")
+        logger.info("💬 大模型对话请求: %s", f"{message[:100]}..." if len(message) > 100 else message)
         
         # 使用腾讯云SDK调用
         config = get_llm_config()
@@ -635,7 +593,7 @@ def llm_chat():
         # 解析响应
         response_content = resp.Choices[0].Message.Content if resp.Choices else ""
         
-        print(f"✅ 大模型响应成功，长度: {len(response_content)} 字符")
+        logger.info("✅ 大模型响应成功，长度: %s 字符", len(response_content))
         
         return jsonify({
             'success': True,
@@ -646,8 +604,7 @@ def llm_chat():
         
     except Exception as e:
         error_msg = str(e)
-        print(f"❌ 大模型调用失败: {error_msg}")
-        traceback.print_exc()
+        logger.exception("❌ 大模型调用失败: %s", error_msg)
         
         return jsonify({
             'success': False,
@@ -728,7 +685,7 @@ def analyze_product():
 
 请提供简洁而全面的分析，包括产品亮点、适用场景和购买建议。请用中文回答。"""
         
-        print(f"🔍 开始分析商品: {product_name} (分析类型: {analysis_type})")
+        logger.debug("🔍 开始分析商品: %s (分析类型: %s)", product_name, analysis_type)
         
         # 使用腾讯云SDK调用
         config = get_llm_config()
@@ -754,7 +711,7 @@ def analyze_product():
         # 解析响应
         analysis_result = resp.Choices[0].Message.Content if resp.Choices else ""
         
-        print(f"✅ 商品分析完成，结果长度: {len(analysis_result)} 字符")
+        logger.info("✅ 商品分析完成，结果长度: %s 字符", len(analysis_result))
         
         return jsonify({
             'success': True,
@@ -767,8 +724,7 @@ def analyze_product():
         
     except Exception as e:
         error_msg = str(e)
-        print(f"❌ 商品分析失败: {error_msg}")
-        traceback.print_exc()
+        logger.exception("❌ 商品分析失败: %s", error_msg)
         
         return jsonify({
             'success': False,
@@ -792,12 +748,13 @@ def health_check():
             'llm_enabled': llm_enabled,
             'llm_sdk': sdk_mode,
             'graphql_api': 'available' if new_api_client_available else 'unavailable'
-        }
+        },
+        'graphql_cache': new_api_client.cache.stats() if new_api_client is not None and new_api_client.cache else None
     })
 
 if __name__ == '__main__':
-    print("🚀 启动PUMA商品信息查询Web服务...")
-    print("📱 请在浏览器中访问: http://localhost:5000")
+    logger.info("🚀 启动PUMA商品信息查询Web服务...")
+    logger.info("📱 请在浏览器中访问: http://localhost:5000")
     
     # 创建templates目录（如果不存在）
     templates_dir = os.path.join(os.path.dirname(__file__), 'templates')
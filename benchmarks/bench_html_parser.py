@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML解析后端基准：在保存的页面片段上比较各BeautifulSoup后端的解析耗时
+
+用法: python benchmarks/bench_html_parser.py [--rounds 200] [文件 ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 添加src目录到Python路径
+src_path = os.path.join(PROJECT_ROOT, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from bs4.builder import builder_registry
+
+from html_parser import make_soup
+
+DEFAULT_FILES = [
+    os.path.join(PROJECT_ROOT, 'debug_breadcrumb_fragments.html'),
+    os.path.join(PROJECT_ROOT, 'test_verification.html'),
+]
+BACKENDS = ['html.parser', 'lxml', 'html5lib']
+
+
+def bench(markup: str, backend: str, rounds: int) -> float:
+    """每次解析+查找全部链接的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        soup = make_soup(markup, backend)
+        soup.find_all('a')
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML解析后端基准')
+    parser.add_argument('files', nargs='*', default=DEFAULT_FILES, help='HTML文件')
+    parser.add_argument('--rounds', type=int, default=200, help='重复次数')
+    args = parser.parse_args()
+
+    for path in args.files:
+        with open(path, encoding='utf-8') as f:
+            markup = f.read()
+        print(f"📊 {os.path.basename(path)} ({len(markup)} 字符)")
+        baseline = None
+        for backend in BACKENDS:
+            # make_soup在后端不可用时会回退到html.parser，这里只统计已安装的后端
+            if builder_registry.lookup(backend) is None:
+                print(f"   {backend:12s} 未安装")
+                continue
+            elapsed = bench(markup, backend, args.rounds)
+            baseline = baseline or elapsed
+            print(f"   {backend:12s} {elapsed:8.3f} ms/次  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDP解析基准：颜色很多的商品上_parse_product_data和_merge_detailed_size_info的耗时
+
+用法: python benchmarks/bench_parse_product.py [--colorways 40] [--images 12] [--rounds 50]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import NewPumaGraphQLAPI
+from retry_policy import RetryPolicy
+
+
+def make_product(colorways: int, images: int) -> dict:
+    """构造PDP响应中的data.product"""
+    def image(color, n):
+        return {
+            'href': f'https://images.puma.com/image/upload/404299/{color}/sv{n:02d}',
+            'verticalImageHref': f'https://images.puma.com/image/upload/404299/{color}/mod{n:02d}',
+        }
+
+    color_values = [f'{i:02d}' for i in range(1, colorways + 1)]
+    return {
+        'id': '404299',
+        'name': 'Suede XL Sneakers',
+        'image': image('01', 0),
+        'colors': [{'name': f'Color {c}', 'value': c, 'image': image(c, 0)} for c in color_values],
+        'variations': [
+            {
+                'id': f'404299_{c}',
+                'variantId': f'4042990{c}',
+                'colorValue': c,
+                'colorName': f'Color {c}',
+                'price': 80,
+                'salePrice': 64.99,
+                'preview': image(c, 0)['href'],
+                'images': [image(c, n) for n in range(images)],
+                'badges': [{'label': 'New'}],
+                'productStory': {'longDescription': '<p>Suede upper</p>'},
+            }
+            for c in color_values
+        ],
+    }
+
+
+def make_detailed(colorways: int) -> dict:
+    """构造LazyPDP响应中的data.product"""
+    return {
+        'productMeasurements': {'metric': [['Size', 'Length']], 'imperial': [['Size', 'Length']]},
+        'variations': [
+            {
+                'id': f'404299_{i:02d}',
+                'variantId': f'4042990{i:02d}',
+                'sizeGroups': [{'label': 'US', 'sizes': [
+                    {'label': str(size / 2), 'orderable': size % 3 != 0} for size in range(14, 30)
+                ]}],
+                'productStory': {'longDescription': '<p>Suede upper</p>'},
+            }
+            for i in range(1, colorways + 1)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PDP解析基准')
+    parser.add_argument('--colorways', type=int, default=40, help='颜色数量')
+    parser.add_argument('--images', type=int, default=12, help='每个颜色的图片数量')
+    parser.add_argument('--rounds', type=int, default=50, help='重复次数')
+    args = parser.parse_args()
+
+    product = make_product(args.colorways, args.images)
+    detailed = make_detailed(args.colorways)
+    # 选择最后一个颜色，线性查找的最坏情况
+    url = f'https://us.puma.com/us/en/pd/suede-xl/404299?swatch={args.colorways:02d}'
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        api_client = NewPumaGraphQLAPI(retry_policy=RetryPolicy())
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            product_info = api_client._parse_product_data(product, url)
+            api_client._merge_detailed_size_info(product_info, detailed, url)
+        elapsed = (time.perf_counter() - start) / args.rounds * 1000
+
+    assert product_info.color_value == f'{args.colorways:02d}'
+    print(f"📊 {args.colorways}个颜色，每个{args.images}张图片")
+    print(f"   解析+合并耗时: {elapsed:.3f} ms/次")
+    print(f"   图片: main={len(product_info.main_images)} sku={len(product_info.sku_images)} "
+          f"vertical={len(product_info.vertical_images)} sizes={len(product_info.sizes)}")
+
+
+if __name__ == '__main__':
+    main()
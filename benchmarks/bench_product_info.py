@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProductInfo内存和序列化基准
+
+对比：
+- 之前：普通dataclass + dataclasses.asdict + json.dumps
+- 之后：slots dataclass + ProductInfo.to_json
+
+用法: python benchmarks/bench_product_info.py [--products 2000] [--variations 30]
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import ProductInfo
+
+# 与ProductInfo字段完全相同的普通dataclass（带__dict__），作为对照
+LegacyProductInfo = dataclasses.make_dataclass(
+    'LegacyProductInfo',
+    [(f.name, f.type, f) for f in dataclasses.fields(ProductInfo)],
+)
+
+
+def make_variations(count: int) -> list:
+    """构造与_parse_product_data输出结构相同的变体列表"""
+    return [
+        {
+            'id': f'404299_{i:02d}',
+            'variantId': f'4042990{i:02d}',
+            'name': 'Suede XL Sneakers',
+            'price': 80.0,
+            'salePrice': 64.99,
+            'colorValue': f'{i:02d}',
+            'colorName': f'Color {i}',
+            'images': [f'https://images.puma.com/image/upload/404299/{i:02d}/sv0{n}' for n in range(8)],
+            'verticalImages': [f'https://images.puma.com/image/upload/404299/{i:02d}/mod0{n}' for n in range(4)],
+            'badges': ['New'],
+            'longDescription': '<p>' + 'The Suede XL reimagines a classic. ' * 20 + '</p>',
+            'productStory': {'longDescription': '<ul>' + '<li>Suede upper</li>' * 10 + '</ul>'},
+        }
+        for i in range(count)
+    ]
+
+
+def fill(product, variations: list, index: int):
+    product.name = 'Suede XL Sneakers'
+    product.product_id = str(400000 + index)
+    product.price = 80.0
+    product.sale_price = 64.99
+    product.color_value = '01'
+    product.sizes = [str(size / 2) for size in range(14, 30)]
+    product.available_sizes = list(product.sizes[:10])
+    product.images = list(variations[0]['images'])
+    product.all_variations = variations
+    product.current_variation = variations[0]
+    return product
+
+
+def measure_memory(cls, count: int, variations: list) -> float:
+    """每个实例自身占用的字节数（嵌套的变体数据在实例间共享，不计入）"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    products = [fill(cls(), variations, i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del products
+    return total / count
+
+
+def measure_serialization(products: list, serialize) -> float:
+    start = time.perf_counter()
+    for product in products:
+        serialize(product)
+    return (time.perf_counter() - start) / len(products) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ProductInfo内存和序列化基准')
+    parser.add_argument('--products', type=int, default=2000, help='商品数量')
+    parser.add_argument('--variations', type=int, default=30, help='每个商品的变体数量')
+    args = parser.parse_args()
+
+    variations = make_variations(args.variations)
+    legacy_bytes = measure_memory(LegacyProductInfo, args.products, variations)
+    slotted_bytes = measure_memory(ProductInfo, args.products, variations)
+
+    count = max(1, args.products // 10)
+    legacy_products = [fill(LegacyProductInfo(), make_variations(args.variations), i) for i in range(count)]
+    products = [fill(ProductInfo(), make_variations(args.variations), i) for i in range(count)]
+    legacy_ms = measure_serialization(
+        legacy_products, lambda p: json.dumps(dataclasses.asdict(p), ensure_ascii=False))
+    slotted_ms = measure_serialization(products, lambda p: p.to_json())
+    assert dataclasses.asdict(legacy_products[0]) == json.loads(products[0].to_json()), "序列化结果不一致"
+
+    print(f"📊 {args.products}个商品，每个{args.variations}个变体")
+    print(f"   实例内存:   之前 {legacy_bytes:8.0f} B/个   之后 {slotted_bytes:8.0f} B/个")
+    print(f"   序列化耗时: 之前 {legacy_ms:8.3f} ms/个  之后 {slotted_ms:8.3f} ms/个")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+规范化商品存储基准：同一商品的每个颜色分别爬取（每个颜色一个ProductInfo）时的
+常驻内存和JSON输出大小
+
+对比：
+- 之前：保留ProductInfo列表，输出[product.to_dict(), ...]
+- 之后：存入ProductStore，输出store.to_json()
+
+用法: python benchmarks/bench_product_store.py [--colorways 20] [--images 12]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tracemalloc
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import NewPumaGraphQLAPI
+from product_store import ProductStore
+from retry_policy import RetryPolicy
+
+
+def make_product(colorways: int, images: int) -> dict:
+    """构造PDP响应中的data.product"""
+    def image(color, n):
+        return {
+            'href': f'https://images.puma.com/image/upload/404299/{color}/sv{n:02d}',
+            'verticalImageHref': f'https://images.puma.com/image/upload/404299/{color}/mod{n:02d}',
+        }
+
+    color_values = [f'{i:02d}' for i in range(1, colorways + 1)]
+    story = {'longDescription': '<h3>PRODUCT STORY</h3>' + 'The Suede XL reimagines a classic. ' * 20}
+    return {
+        'id': '404299',
+        'name': 'Suede XL Sneakers',
+        'image': image('01', 0),
+        'colors': [{'name': f'Color {c}', 'value': c, 'image': image(c, 0)} for c in color_values],
+        'variations': [
+            {
+                'id': f'404299_{c}',
+                'variantId': f'4042990{c}',
+                'colorValue': c,
+                'colorName': f'Color {c}',
+                'price': 80,
+                'salePrice': 64.99,
+                'preview': image(c, 0)['href'],
+                'images': [image(c, n) for n in range(images)],
+                'badges': [{'label': 'New'}],
+                'productStory': dict(story),
+            }
+            for c in color_values
+        ],
+    }
+
+
+def scrape_all_colors(product_data: dict) -> list:
+    api_client = NewPumaGraphQLAPI(retry_policy=RetryPolicy())
+    size_groups = [{'label': 'US', 'sizes': [{'label': str(s / 2), 'orderable': s % 3 != 0} for s in range(14, 30)]}]
+    products = []
+    for variation in product_data['variations']:
+        # 模拟逐个颜色请求：每次都是独立解码的响应
+        data = json.loads(json.dumps(product_data))
+        product_info = api_client._parse_product_data(
+            data, f"https://us.puma.com/us/en/pd/suede-xl/404299?swatch={variation['colorValue']}")
+        api_client._apply_size_groups(product_info, json.loads(json.dumps(size_groups)))
+        products.append(product_info)
+    return products
+
+
+def retained_bytes(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    retained = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del retained
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='规范化商品存储基准')
+    parser.add_argument('--colorways', type=int, default=20, help='颜色数量')
+    parser.add_argument('--images', type=int, default=12, help='每个颜色的图片数量')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    product_data = make_product(args.colorways, args.images)
+
+    def build_list():
+        return scrape_all_colors(product_data)
+
+    def build_store():
+        store = ProductStore()
+        for product_info in scrape_all_colors(product_data):
+            store.add(product_info)
+        return store
+
+    list_bytes = retained_bytes(build_list)
+    store_bytes = retained_bytes(build_store)
+
+    products = scrape_all_colors(product_data)
+    store = ProductStore()
+    for product_info in products:
+        store.add(product_info)
+    for product_info in products:
+        assert store.view(product_info.sku).to_dict() == product_info.to_dict(), "重建结果不一致"
+
+    flat_json = len(json.dumps([p.to_dict() for p in products], ensure_ascii=False).encode('utf-8'))
+    store_json = len(store.to_json().encode('utf-8'))
+
+    print(f"📊 {args.colorways}个颜色，每个颜色{args.images}张图片，逐个颜色爬取")
+    print(f"   常驻内存: 之前 {list_bytes / 1024:8.1f} KB   之后 {store_bytes / 1024:8.1f} KB")
+    print(f"   JSON大小: 之前 {flat_json / 1024:8.1f} KB   之后 {store_json / 1024:8.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片爬取基准：网络延迟为零（离线客户端）时解析和格式化是瓶颈，对比不同进程数的吞吐
+
+每个商品执行完整的PDP解析、LazyPDP合并和to_dict，与真实爬取的CPU部分相同。
+多核机器上吞吐应接近按进程数线性增长。
+
+--limit-rate时每次PDP/LazyPDP请求先向各进程的限速器取令牌（与RateLimitedAdapter相同），
+此时每个商品两次请求，吞吐不超过合计速率的一半，且不随进程数增长。
+
+用法: python benchmarks/bench_sharded_crawl.py [--products 400] [--colorways 40] [--processes 1 2 4 8 16]
+      python benchmarks/bench_sharded_crawl.py --products 100 --limit-rate [--total-rate 20]
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+benchmarks_path = os.path.dirname(os.path.abspath(__file__))
+if benchmarks_path not in sys.path:
+    sys.path.insert(0, benchmarks_path)
+
+from bench_parse_product import make_detailed, make_product
+from config import RATE_LIMIT_MAX_RATE
+from new_puma_graphql_api import NewPumaGraphQLAPI
+from rate_limiter import get_default_limiter
+from retry_policy import RetryPolicy
+from sharded_crawl import ShardedCrawl
+
+COLORWAYS = int(os.environ.get('BENCH_COLORWAYS', '40'))
+LIMIT_RATE = os.environ.get('BENCH_LIMIT_RATE') == '1'
+API_HOST = "us.puma.com"
+
+
+class OfflineAPI(NewPumaGraphQLAPI):
+    """不发请求的客户端：PDP/LazyPDP和导航信息直接返回构造的数据"""
+
+    def __init__(self):
+        super().__init__(retry_policy=RetryPolicy())
+        self._product = make_product(COLORWAYS, 12)
+        self._detailed = make_detailed(COLORWAYS)
+
+    def _fetch_product_payload(self, operation_name, query, product_id, swatch_code=None):
+        if LIMIT_RATE:
+            # 工作进程的限速器由run_shard按rate_share配置
+            limiter = get_default_limiter()
+            limiter.acquire(API_HOST)
+            limiter.record(API_HOST, 200, 0.0)
+        return self._detailed if operation_name == "LazyPDP" else self._product
+
+    def _resolve_breadcrumb(self, product_info, url):
+        return [{"name": "Shoes", "url": "/us/en/men/shoes"}], "Shoes"
+
+
+def offline_api_factory():
+    return OfflineAPI()
+
+
+def run(processes: int, urls, threads: int, total_rate=None) -> float:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        crawl = ShardedCrawl(Path(tmp_dir), processes=processes, threads=threads, total_rate=total_rate,
+                             api_factory=offline_api_factory, quiet=True)
+        stats = crawl.run(iter(urls), io.StringIO())
+    assert stats.succeeded == len(urls), stats.summary()
+    return stats.throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分片爬取基准')
+    parser.add_argument('--products', type=int, default=400, help='商品数量')
+    parser.add_argument('--colorways', type=int, default=COLORWAYS, help='每个商品的颜色数量')
+    parser.add_argument('--threads', type=int, default=2, help='每个进程的线程数')
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='对比的进程数')
+    parser.add_argument('--limit-rate', action='store_true', help='每次请求经过限速器（模拟对上游的请求速率）')
+    parser.add_argument('--total-rate', type=float, help=f'所有进程合计的最高请求速率（默认{RATE_LIMIT_MAX_RATE:g}）')
+    args = parser.parse_args()
+    # 工作进程通过环境变量拿到颜色数量和是否限速（spawn启动的子进程会重新导入本模块）
+    os.environ['BENCH_COLORWAYS'] = str(args.colorways)
+    os.environ['BENCH_LIMIT_RATE'] = '1' if args.limit_rate else '0'
+    logging.disable(logging.CRITICAL)
+
+    urls = [f"https://us.puma.com/us/en/pd/suede-xl/{400000 + i}?swatch=01" for i in range(args.products)]
+    print(f"CPU核数: {os.cpu_count()}，商品数: {args.products}，每个商品{args.colorways}个颜色")
+    if args.limit_rate:
+        print(f"限速: 合计{args.total_rate or RATE_LIMIT_MAX_RATE:g}请求/秒（每个商品2次请求）")
+    baseline = None
+    for processes in args.processes:
+        start = time.perf_counter()
+        throughput = run(processes, urls, args.threads, args.total_rate)
+        baseline = baseline or throughput
+        print(f"{processes:>3}个进程: {throughput:8.1f} 个/秒  加速比 {throughput / baseline:5.2f}x  "
+              f"（含进程启动，共{time.perf_counter() - start:.1f}秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,24 @@
 使用多种策略自动获取最新的认证token
 """
 
-import requests
+import sys
+import os
 import json
 import re
 from datetime import datetime
-import time
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import http_transport
 
 class EnhancedTokenFetcher:
     """增强的TOKEN获取器"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = http_transport.create_session()
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
@@ -310,8 +317,7 @@ class EnhancedTokenFetcher:
             except Exception as e:
                 print(f"❌ 策略 {i} 异常: {e}")
             
-            # 策略间短暂延迟
-            time.sleep(1)
+            # 策略间不再固定等待：请求经共享连接池，由按主机的自适应限速控制节奏
         
         print("\n❌ 所有策略都失败了")
         return None
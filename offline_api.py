@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线测试共用的API客户端和GraphQL响应构造（由各test_*.py导入，本身不包含测试）
+"""
+
+import sys
+import os
+import json
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import NewPumaGraphQLAPI
+from retry_policy import RetryPolicy
+
+
+def offline_api(**kwargs) -> NewPumaGraphQLAPI:
+    """
+    不访问网络的客户端：session为Mock（由测试设置post的返回值），token刷新直接失败
+
+    kwargs透传给NewPumaGraphQLAPI；默认使用独立的RetryPolicy，不与其他测试共享重试预算和熔断器
+    """
+    kwargs.setdefault('retry_policy', RetryPolicy())
+    api_client = NewPumaGraphQLAPI(**kwargs)
+    api_client.get_fresh_token = mock.Mock(return_value=False)  # 硬编码token已过期，不真正刷新
+    api_client.session = mock.Mock()
+    return api_client
+
+
+def fake_response(payload, status_code: int = 200):
+    """模拟的GraphQL响应：json()、content和text都对应payload"""
+    body = json.dumps(payload).encode('utf-8')
+    response = mock.Mock()
+    response.status_code = status_code
+    response.headers = {}
+    response.json.return_value = payload
+    response.content = body
+    response.text = body.decode('utf-8')
+    return response
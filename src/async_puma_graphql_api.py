@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PUMA GraphQL API的asyncio客户端
+PDP、LazyPDP和分类树三个请求彼此独立（只依赖product_id），
+因此并发发起，单个商品的耗时变为最慢的一次请求而不是三次之和；
+面包屑随后由分类树在内存中构建（无法构建时才下载页面HTML）
+"""
+
+import asyncio
+import functools
+import argparse
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from new_puma_graphql_api import NewPumaGraphQLAPI, ProductInfo
+from log_config import setup_logging
+from product_store import ProductStore
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNewPumaGraphQLAPI:
+    """NewPumaGraphQLAPI的异步版本，输出与同步版本相同的ProductInfo"""
+
+    def __init__(self, api: Optional[NewPumaGraphQLAPI] = None, max_workers: int = 8):
+        """
+        初始化异步客户端
+
+        Args:
+            api: 复用的同步客户端（共享session和认证信息），为空时新建
+            max_workers: 执行阻塞请求的线程数
+        """
+        self.api = api or NewPumaGraphQLAPI()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="puma-async")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """关闭线程池"""
+        self.executor.shutdown(wait=False)
+
+    async def _run(self, func, *args):
+        """在线程池中执行阻塞调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def scrape_product(self, url: str) -> Optional[ProductInfo]:
+        """主要接口：并发获取PDP、LazyPDP和导航信息后合并"""
+        try:
+            logger.debug("🔍 [async] 开始爬取商品: %s", url)
+
+            product_id = self.api.extract_product_id(url)
+            if not product_id:
+                return None
+
+            product_info, detailed_size_data, _ = await asyncio.gather(
+                self._run(self.api.get_product_info, product_id, url),
+                self._run(self.api.get_detailed_size_info, product_id),
+                self._run(self.api.get_category_tree) if self.api.use_category_tree else asyncio.sleep(0),
+                return_exceptions=True
+            )
+
+            if isinstance(product_info, BaseException) or not product_info:
+                if isinstance(product_info, BaseException):
+                    logger.error("❌ [async] 获取商品信息失败: %s", product_info)
+                return None
+
+            # 辅助请求失败不影响主结果，与同步版本的降级行为保持一致
+            if isinstance(detailed_size_data, BaseException):
+                logger.warning("⚠️ [async] 获取详细尺码信息失败: %s", detailed_size_data)
+                detailed_size_data = None
+            try:
+                breadcrumb_result = await self._run(self.api._resolve_breadcrumb, product_info, url)
+            except Exception as e:
+                logger.warning("⚠️ [async] 获取导航信息失败: %s", e)
+                breadcrumb_result = ([], "")
+
+            return self.api._assemble_product(product_info, detailed_size_data, breadcrumb_result, url)
+
+        except Exception as e:
+            logger.exception("❌ [async] 爬取商品时发生错误: %s", e)
+            return None
+
+    async def scrape_products(self, urls: List[str], concurrency: int = 4) -> List[Optional[ProductInfo]]:
+        """并发爬取多个商品，结果顺序与输入URL一致"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _bounded(url):
+            async with semaphore:
+                return await self.scrape_product(url)
+
+        return await asyncio.gather(*(_bounded(url) for url in urls))
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='PUMA商品信息异步爬取')
+    parser.add_argument('urls', nargs='+', help='商品URL')
+    parser.add_argument('--concurrency', type=int, default=4, help='同时爬取的商品数')
+    parser.add_argument('--normalized', action='store_true',
+                        help='输出规范化结构（变体、图片、尺码组只出现一次），见product_store')
+    args = parser.parse_args()
+    # stdout只输出JSON结果，日志写到stderr
+    setup_logging(stream=sys.stderr)
+
+    async def _run_all():
+        async with AsyncNewPumaGraphQLAPI() as client:
+            return await client.scrape_products(args.urls, concurrency=args.concurrency)
+
+    results = asyncio.run(_run_all())
+    if args.normalized:
+        store = ProductStore()
+        for product in results:
+            if product:
+                store.add(product)
+        print(store.to_json(indent=2))
+        return
+    output = [product.to_dict() for product in results if product]
+    print(json.dumps(output, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
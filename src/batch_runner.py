@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内并发批量爬取
+所有URL共享一个NewPumaGraphQLAPI（同一个连接池、token和响应缓存），
+由有界线程池并发爬取，结果完成一个写一行（JSON Lines），结束时输出吞吐统计。
+
+用法:
+    python batch_runner.py urls.txt --workers 4 --rate 2 --output results.jsonl
+    cat urls.txt | python batch_runner.py - --quiet
+    python batch_runner.py urls.txt --checkpoint nightly   # 中断后用同样的命令续爬
+    python batch_runner.py --checkpoint nightly --retry-failed
+    python batch_runner.py urls.txt --fan-out   # 同一商品的多个颜色只请求一次
+"""
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from checkpoint import DEFAULT_MAX_ATTEMPTS, STATUS_DONE, STATUS_FAILED, CrawlCheckpoint
+from config import get_checkpoint_path, get_output_path
+from log_config import setup_logging
+from new_puma_graphql_api import NewPumaGraphQLAPI
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+
+# 颜色合并模式下同时等待凑齐颜色的商品数（超过时最早的商品先开始爬取）
+DEFAULT_GROUP_WINDOW = 256
+
+# _run_pass中表示URL来源已经结束（来源产生的None表示暂时没有任务，见BatchRunner.run）
+_EXHAUSTED = object()
+
+
+def read_urls(lines: Iterable[str]) -> Iterator[str]:
+    """逐行读取URL，跳过空行和#开头的注释行"""
+    for line in lines:
+        url = line.strip()
+        if url and not url.startswith('#'):
+            yield url
+
+
+class RateGate:
+    """全局启动速率限制：相邻两次acquire至少间隔1/rate秒（rate为空时不限制）"""
+
+    def __init__(self, rate: Optional[float] = None, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_time)
+            self._next_time = start + self.interval
+        if start > now:
+            self._sleep(start - now)
+
+
+@dataclass
+class BatchStats:
+    """批量爬取统计（total/succeeded/failed按商品计，重试不重复计数）"""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    retried: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """每秒完成的商品数"""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> str:
+        return (f"共{self.total}个，成功{self.succeeded}个，失败{self.failed}个，"
+                f"跳过{self.skipped}个，重试{self.retried}次，"
+                f"耗时{self.elapsed:.1f}秒，吞吐{self.throughput:.2f}个/秒，"
+                f"单个耗时p50 {self.percentile(0.5):.2f}秒 p95 {self.percentile(0.95):.2f}秒")
+
+
+class BatchRunner:
+    """有界线程池批量爬取，结果按完成顺序写出"""
+
+    def __init__(self, api: Optional[NewPumaGraphQLAPI] = None, workers: int = DEFAULT_WORKERS,
+                 rate: Optional[float] = None, profile: str = "full",
+                 checkpoint: Optional[CrawlCheckpoint] = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 fan_out: bool = False, all_swatches: bool = False, group_window: int = DEFAULT_GROUP_WINDOW):
+        """
+        Args:
+            api: 共享的API客户端，为空时新建
+            workers: 同时爬取的商品数
+            rate: 每秒最多开始爬取的商品数，为空时不限制
+            profile: 查询档位，见NewPumaGraphQLAPI.scrape_product
+            checkpoint: 断点记录，给定时跳过已完成的商品，失败的商品在本轮结束后重试
+            max_attempts: 每个商品最多尝试的次数（跨多次运行累计，只在有断点记录时生效）
+            fan_out: 颜色合并模式：按商品ID合并URL，每个商品只请求一次，再为每个swatch各输出一条记录
+            all_swatches: 同时为商品的每个颜色输出记录（隐含fan_out），不限于输入中出现的swatch
+            group_window: 颜色合并模式下同时等待凑齐颜色的商品数，输入流中相隔太远的同一商品会分成两组
+        """
+        self.api = api or NewPumaGraphQLAPI()
+        self.workers = max(1, workers)
+        self.rate_gate = RateGate(rate)
+        self.profile = profile
+        self.checkpoint = checkpoint
+        self.max_attempts = max(1, max_attempts)
+        self.fan_out = fan_out or all_swatches
+        self.all_swatches = all_swatches
+        self.group_window = max(1, group_window)
+
+    def checkpoint_key(self, url: str) -> Tuple[str, str]:
+        """断点记录的键：(商品ID, swatch)，提取不到商品ID时使用URL"""
+        return self.api.extract_product_id(url) or url, self.api.extract_swatch_from_url(url)
+
+    def _scrape(self, url: str) -> dict:
+        self.rate_gate.acquire()
+        start = time.monotonic()
+        try:
+            product_info = self.api.scrape_product(url, self.profile)
+            error = None if product_info else "未获取到商品信息"
+        except Exception as e:
+            logger.exception("❌ 爬取失败: %s", url)
+            product_info, error = None, str(e)
+        return {
+            'url': url,
+            'success': product_info is not None,
+            'product': product_info.to_dict() if product_info else None,
+            'error': error,
+            'elapsed': round(time.monotonic() - start, 3),
+        }
+
+    def _scrape_group(self, urls: List[str]) -> List[dict]:
+        """爬取同一商品的一组URL，返回每个swatch一条的结果"""
+        self.rate_gate.acquire()
+        start = time.monotonic()
+        try:
+            products = self.api.scrape_product_swatches(urls, self.all_swatches, self.profile)
+        except Exception as e:
+            logger.exception("❌ 爬取失败: %s", urls[0])
+            products = [(url, None) for url in urls]
+            error = str(e)
+        else:
+            error = "未获取到商品信息"
+        elapsed = round(time.monotonic() - start, 3)
+        return [{
+            'url': url,
+            'success': product_info is not None,
+            'product': product_info.to_dict() if product_info else None,
+            'error': None if product_info else error,
+            'elapsed': elapsed,
+        } for url, product_info in products]
+
+    def _group_by_product(self, urls: Iterable[str]) -> Iterator[List[str]]:
+        """
+        按商品ID合并URL（保持首次出现的顺序）
+
+        输入是惰性的流，只缓存最近group_window个商品：超过时最早的商品先输出，
+        输入中相邻出现的各颜色（目录/站点地图发现的输出就是这样）总能合并到一起。
+        """
+        groups: "OrderedDict[str, List[str]]" = OrderedDict()
+        for url in urls:
+            if url is None:
+                # 来源暂时没有任务：已缓存的商品先开始爬取，不等下一批URL
+                yield from groups.values()
+                groups.clear()
+                yield None
+                continue
+            groups.setdefault(self.api.extract_product_id(url) or url, []).append(url)
+            if len(groups) > self.group_window:
+                yield groups.popitem(last=False)[1]
+        yield from groups.values()
+
+    def _pending_urls(self, urls: Iterable[str], stats: BatchStats) -> Iterator[str]:
+        """过滤掉断点中已完成或已用完尝试次数的商品"""
+        for url in urls:
+            if url is not None and self.checkpoint is not None:
+                key = self.checkpoint_key(url)
+                if self.checkpoint.is_done(*key):
+                    stats.skipped += 1
+                    continue
+                if self.checkpoint.attempts(*key) >= self.max_attempts:
+                    stats.skipped += 1
+                    logger.warning("⚠️ 已达到最大尝试次数，跳过: %s", url)
+                    continue
+            yield url
+
+    def _run_pass(self, executor: ThreadPoolExecutor, urls: Iterable[Optional[str]],
+                  handle: Callable[[dict], None], idle_timeout: Optional[float] = None) -> None:
+        # 颜色合并模式下每个任务是同一商品的一组URL，返回多条结果
+        task = self._scrape_group if self.fan_out else self._scrape
+        task_iter = self._group_by_product(urls) if self.fan_out else iter(urls)
+        pending = set()
+        exhausted = False
+        while True:
+            # 最多保持workers*2个任务在途，URL很多时不会一次性全部提交
+            idle = False
+            while not exhausted and len(pending) < self.workers * 2:
+                item = next(task_iter, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    exhausted = True
+                elif item is None:
+                    # 来源暂时没有任务：先处理在途任务的结果，稍后再取
+                    idle = True
+                    break
+                else:
+                    pending.add(executor.submit(task, item))
+            if not pending:
+                if exhausted:
+                    break
+                continue
+            done, pending = wait(pending, timeout=idle_timeout if idle else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                results = future.result()
+                for result in results if self.fan_out else [results]:
+                    handle(result)
+
+    def run(self, urls: Iterable[Optional[str]], output: Optional[IO[str]] = None,
+            on_result: Optional[Callable[[dict], None]] = None,
+            idle_timeout: Optional[float] = None) -> BatchStats:
+        """
+        爬取所有URL
+
+        有断点记录时先跳过已完成的商品，每个结果写入断点；
+        本轮失败的商品进入重试队列，在本轮结束后重试，直到成功或达到max_attempts。
+
+        Args:
+            urls: URL序列（可以是惰性的，不会一次性全部提交到线程池）。常驻的来源（如工作队列）
+                暂时没有任务时产生None而不是在迭代器内阻塞，否则在途任务的结果要等到有新任务才能处理；
+                来源需要自己在没有在途任务时控制轮询间隔
+            output: 结果写入的文本流，每次尝试一行JSON，写完立即flush
+            on_result: 每个结果完成时的回调
+            idle_timeout: 来源产生None后等待在途任务完成的最长时间（秒），到时再向来源取任务
+
+        Returns:
+            BatchStats
+        """
+        stats = BatchStats()
+        start = time.monotonic()
+        attempted = set()
+        failed: Dict[str, None] = {}  # 最近一次尝试失败的URL（保持顺序）
+
+        def handle(result: dict) -> None:
+            url = result['url']
+            stats.latencies.append(result['elapsed'])
+            if url in attempted:
+                stats.retried += 1
+            else:
+                attempted.add(url)
+            if result['success']:
+                failed.pop(url, None)
+                logger.info("✅ [%s] %s", len(attempted), url)
+            else:
+                failed[url] = None
+                logger.warning("⚠️ [%s] 爬取失败: %s (%s)", len(attempted), url, result['error'])
+
+            if self.checkpoint is not None:
+                product_id, swatch = self.checkpoint_key(url)
+                self.checkpoint.record(product_id, swatch, STATUS_DONE if result['success'] else STATUS_FAILED,
+                                       url=url, error=result['error'])
+            if output is not None:
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+            if on_result is not None:
+                on_result(result)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="puma-batch") as executor:
+            self._run_pass(executor, self._pending_urls(urls, stats), handle, idle_timeout)
+            # 重试队列：本轮失败且尝试次数未用完的商品
+            while self.checkpoint is not None:
+                retry_urls = [url for url in failed
+                              if self.checkpoint.attempts(*self.checkpoint_key(url)) < self.max_attempts]
+                if not retry_urls:
+                    break
+                logger.info("🔄 重试%s个失败的商品", len(retry_urls))
+                self._run_pass(executor, retry_urls, handle)
+
+        stats.total = len(attempted)
+        stats.failed = len(failed)
+        stats.succeeded = stats.total - stats.failed
+        stats.elapsed = time.monotonic() - start
+        return stats
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='PUMA商品信息批量爬取（进程内并发）')
+    parser.add_argument('input', nargs='?', default='-', help='URL文件，每行一个，"-"表示标准输入')
+    parser.add_argument('--output', '-o', help='结果文件（JSON Lines），"-"表示标准输出，默认写到data/outputs')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='同时爬取的商品数')
+    parser.add_argument('--rate', type=float, help='每秒最多开始爬取的商品数（默认不限制）')
+    parser.add_argument('--profile', default='full', help='查询档位: full/pricing/inventory/media')
+    parser.add_argument('--streaming-decode', action='store_true',
+                        help='增量解码PDP响应，未选中的变体只保留摘要（降低内存）')
+    parser.add_argument('--checkpoint', help='断点名称（data/checkpoints/<名称>.jsonl）或.jsonl文件路径，'
+                                             '重新运行时跳过已完成的商品')
+    parser.add_argument('--retry-failed', action='store_true', help='只爬取断点中失败待重试的商品（忽略输入）')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS, help='每个商品最多尝试的次数')
+    parser.add_argument('--fan-out', action='store_true',
+                        help='同一商品的多个swatch URL只请求一次，为每个swatch各输出一条记录')
+    parser.add_argument('--all-swatches', action='store_true',
+                        help='为每个商品的所有颜色输出记录（隐含--fan-out）')
+    parser.add_argument('--quiet', action='store_true', help='只输出警告和错误日志')
+    args = parser.parse_args()
+    if args.retry_failed and not args.checkpoint:
+        parser.error('--retry-failed需要同时指定--checkpoint')
+
+    to_stdout = args.output == '-'
+    # 结果写到标准输出时日志改走标准错误，避免混在一起
+    setup_logging(quiet=args.quiet or None, stream=sys.stderr if to_stdout else None)
+
+    output_path = None if to_stdout else (
+        args.output or get_output_path(f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"))
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint_path = args.checkpoint if args.checkpoint.endswith('.jsonl') else get_checkpoint_path(args.checkpoint)
+        checkpoint = CrawlCheckpoint(checkpoint_path)
+    input_file = None
+    if not args.retry_failed:
+        input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    # 断点续爬时追加到已有的结果文件
+    output_file = sys.stdout if to_stdout else open(output_path, 'a' if checkpoint else 'w', encoding='utf-8')
+
+    try:
+        runner = BatchRunner(NewPumaGraphQLAPI(streaming_decode=args.streaming_decode),
+                             workers=args.workers, rate=args.rate, profile=args.profile,
+                             checkpoint=checkpoint, max_attempts=args.max_attempts,
+                             fan_out=args.fan_out, all_swatches=args.all_swatches)
+        urls = checkpoint.retry_queue(args.max_attempts) if args.retry_failed else read_urls(input_file)
+        stats = runner.run(urls, output=output_file)
+    finally:
+        if input_file is not None and input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(f"📊 {stats.summary()}", file=sys.stderr)
+    if output_path:
+        print(f"💾 结果已保存: {output_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,73 +2,52 @@
 # -*- coding: utf-8 -*-
 """
 批量爬取Puma商品信息示例
+（进程内并发爬取，见batch_runner.py；URL很多时直接使用batch_runner的命令行）
 """
 
-import subprocess
-import time
 import json
 from datetime import datetime
 
-def batch_scrape_puma():
+from batch_runner import BatchRunner
+from config import get_output_path
+from log_config import setup_logging
+
+def batch_scrape_puma(urls=None, workers=4, rate=None):
     """批量爬取多个Puma商品"""
-    
+
     # 商品URL列表
-    urls = [
+    urls = urls or [
         "https://us.puma.com/us/en/pd/evospeed-mid-distance-nitro-elite-3-track--field-distance-spikes/312637?swatch=01",
         # 可以添加更多Puma商品URL
     ]
-    
+
     results = []
-    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    output_file = get_output_path(f"batch_products_{timestamp}.jsonl")
+
     print(f"🚀 开始批量爬取 {len(urls)} 个商品...")
-    
-    for i, url in enumerate(urls, 1):
-        print(f"\n📦 正在爬取第 {i}/{len(urls)} 个商品...")
-        print(f"🔗 URL: {url}")
-        
-        # 生成输出文件名
-        output_file = f"batch_product_{i}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        try:
-            # 调用puma_crawler.py
-            result = subprocess.run([
-                'python', 'puma_crawler.py',
-                '--url', url,
-                '--method', 'enhanced',
-                '--output', output_file
-            ], capture_output=True, text=True, timeout=60)
-            
-            if result.returncode == 0:
-                print(f"✅ 成功爬取并保存到: {output_file}")
-                
-                # 读取结果
-                try:
-                    with open(output_file, 'r', encoding='utf-8') as f:
-                        product_data = json.load(f)
-                        results.append(product_data)
-                except:
-                    pass
-            else:
-                print(f"❌ 爬取失败: {result.stderr}")
-                
-        except subprocess.TimeoutExpired:
-            print("⏰ 爬取超时")
-        except Exception as e:
-            print(f"❌ 执行错误: {e}")
-        
-        # 添加延迟避免被封IP
-        if i < len(urls):
-            print("⏳ 等待3秒...")
-            time.sleep(3)
-    
+
+    # 所有商品共享一个API客户端和连接池，按完成顺序逐行写入结果
+    runner = BatchRunner(workers=workers, rate=rate)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        stats = runner.run(
+            urls, output=f,
+            on_result=lambda result: results.append(result['product']) if result['success'] else None
+        )
+
     print(f"\n🎉 批量爬取完成！成功获取 {len(results)} 个商品信息")
-    
+    print(f"📊 {stats.summary()}")
+    print(f"💾 逐个结果已保存: {output_file}")
+
     # 汇总结果
     if results:
-        summary_file = f"batch_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        summary_file = get_output_path(f"batch_summary_{timestamp}.json")
         with open(summary_file, 'w', encoding='utf-8') as f:
             json.dump(results, f, ensure_ascii=False, indent=2)
         print(f"📊 汇总文件已保存: {summary_file}")
 
+    return results
+
 if __name__ == "__main__":
-    batch_scrape_puma()
\ No newline at end of file
+    setup_logging()
+    batch_scrape_puma()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品目录发现
+分页遍历GraphQL的分类商品列表和搜索结果，枚举商品ID和swatch，
+以流的形式交给批量爬取（batch_runner），不再需要手工提供商品URL。
+
+用法:
+    python catalog_discovery.py --all-categories --output urls.txt
+    python catalog_discovery.py --search "speedcat" --output - | python batch_runner.py - --output results.jsonl
+    python catalog_discovery.py --category 10001 --scrape --checkpoint catalog
+"""
+
+import argparse
+import logging
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from batch_runner import BatchRunner
+from category_tree import SITE_ROOT_URL
+from checkpoint import CrawlCheckpoint
+from config import (DISCOVERY_MAX_PAGES, DISCOVERY_PAGE_SIZE, DISCOVERY_WORKERS,
+                    get_checkpoint_path, get_output_path)
+from log_config import setup_logging
+from new_puma_graphql_api import NewPumaGraphQLAPI
+
+logger = logging.getLogger(__name__)
+
+# 列表中每个商品需要的字段：商品ID、链接和各颜色的swatch代码
+LISTING_PRODUCT_FIELDS = """
+      id
+      masterId
+      name
+      href
+      colors {
+        value
+      }
+"""
+
+CATEGORY_PRODUCTS_QUERY = """
+query CategoryProducts($id: ID!, $limit: Int!, $offset: Int!) {
+  categoryProducts(categoryId: $id, limit: $limit, offset: $offset) {
+    total
+    products {%s    }
+  }
+}
+""" % LISTING_PRODUCT_FIELDS
+
+SEARCH_PRODUCTS_QUERY = """
+query SearchProducts($query: String!, $limit: Int!, $offset: Int!) {
+  searchProducts(query: $query, limit: $limit, offset: $offset) {
+    total
+    products {%s    }
+  }
+}
+""" % LISTING_PRODUCT_FIELDS
+
+
+@dataclass(frozen=True)
+class DiscoveredProduct:
+    """发现的一个商品颜色（SKU级别）"""
+    product_id: str
+    swatch: str
+    url: str
+    source: str
+
+
+def product_url(product_id: str, swatch: str = "", href: str = "") -> str:
+    """构造能被NewPumaGraphQLAPI.extract_product_id识别的商品URL"""
+    if href and product_id in href:
+        base = href if href.startswith('http') else f"{SITE_ROOT_URL}{href}"
+        base = base.split('?', 1)[0]
+    else:
+        base = f"{SITE_ROOT_URL}/us/en/pd/product/{product_id}"
+    return f"{base}?swatch={swatch}" if swatch else base
+
+
+def _listing_swatches(product: Dict) -> List[str]:
+    """列表商品的swatch代码（colors[].value，兼容variations[].colorValue）"""
+    swatches = [color.get('value') for color in product.get('colors') or [] if isinstance(color, dict)]
+    if not swatches:
+        swatches = [variation.get('colorValue') for variation in product.get('variations') or []
+                    if isinstance(variation, dict)]
+    return [swatch for swatch in swatches if swatch]
+
+
+class CatalogDiscovery:
+    """分页遍历分类/搜索列表，输出去重后的商品颜色流"""
+
+    def __init__(self, api: Optional[NewPumaGraphQLAPI] = None, page_size: int = DISCOVERY_PAGE_SIZE,
+                 workers: int = DISCOVERY_WORKERS, max_pages: Optional[int] = DISCOVERY_MAX_PAGES,
+                 expand_swatches: bool = True):
+        """
+        Args:
+            api: 共享的API客户端（复用认证头、连接池和限速），为空时新建
+            page_size: 每页商品数
+            workers: 同时遍历的列表数（每个列表内部按页顺序请求）
+            max_pages: 每个列表最多请求的页数，为空时不限制
+            expand_swatches: 为每个颜色输出一条记录；为False时每个商品只输出一条（不带swatch）
+        """
+        self.api = api or NewPumaGraphQLAPI()
+        self.page_size = max(1, page_size)
+        self.workers = max(1, workers)
+        self.max_pages = max_pages
+        self.expand_swatches = expand_swatches
+
+    def _fetch_page(self, operation_name: str, query: str, variables: Dict) -> Optional[Tuple[List[Dict], int]]:
+        """请求一页列表，返回(商品列表, 总数)，失败返回None"""
+        payload = {"operationName": operation_name, "query": query, "variables": variables}
+        data = self.api.graphql_request(operation_name, payload)
+        if data is None:
+            return None
+        if data.get('errors'):
+            logger.error("❌ %s GraphQL错误: %s", operation_name, data['errors'])
+            return None
+        listing = next(iter((data.get('data') or {}).values()), None) or {}
+        products = listing.get('products') or []
+        total = listing.get('total')
+        return products, total if isinstance(total, int) else -1
+
+    @staticmethod
+    def _put(out: "queue.Queue", item, stop: threading.Event) -> bool:
+        """放入队列；消费方已停止读取时返回False"""
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _page_listing(self, operation_name: str, query: str, variables: Dict, source: str,
+                      out: "queue.Queue", stop: threading.Event) -> None:
+        """按页遍历一个列表，每页的商品放入队列（队列有界，消费慢时自然停下）"""
+        offset = 0
+        page = 0
+        while self.max_pages is None or page < self.max_pages:
+            if stop.is_set():
+                return
+            result = self._fetch_page(operation_name, query, {**variables, "limit": self.page_size, "offset": offset})
+            if result is None:
+                break
+            products, total = result
+            for product in products:
+                if not self._put(out, (product, source), stop):
+                    return
+            page += 1
+            offset += len(products)
+            logger.debug("📄 %s 第%s页: %s个商品（共%s）", source, page, len(products), total)
+            if len(products) < self.page_size or (total >= 0 and offset >= total):
+                break
+        logger.info("✅ %s 遍历完成: %s页，%s个商品", source, page, offset)
+
+    def _expand(self, product: Dict, source: str) -> Iterator[DiscoveredProduct]:
+        product_id = str(product.get('masterId') or product.get('id') or '')
+        if not product_id:
+            return
+        href = product.get('href') or product.get('url') or ''
+        swatches = _listing_swatches(product) if self.expand_swatches else []
+        for swatch in swatches or [""]:
+            yield DiscoveredProduct(product_id, swatch, product_url(product_id, swatch, href), source)
+
+    def discover(self, category_ids: Optional[List[str]] = None,
+                 search_terms: Optional[List[str]] = None) -> Iterator[DiscoveredProduct]:
+        """
+        遍历给定的分类和搜索词，边请求边输出去重后的商品颜色
+
+        Args:
+            category_ids: 分类ID列表
+            search_terms: 搜索词列表
+        """
+        listings = [("CategoryProducts", CATEGORY_PRODUCTS_QUERY, {"id": category_id}, f"category:{category_id}")
+                    for category_id in category_ids or []]
+        listings += [("SearchProducts", SEARCH_PRODUCTS_QUERY, {"query": term}, f"search:{term}")
+                     for term in search_terms or []]
+        if not listings:
+            return
+
+        out: "queue.Queue" = queue.Queue(maxsize=self.page_size * self.workers * 2)
+        stop = threading.Event()
+        done = object()
+
+        def run_all():
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="puma-discovery") as executor:
+                futures = [executor.submit(self._page_listing, *listing, out, stop) for listing in listings]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error("❌ 遍历列表时发生错误: %s", e)
+            self._put(out, done, stop)
+
+        producer = threading.Thread(target=run_all, name="puma-discovery-main", daemon=True)
+        producer.start()
+
+        seen = set()
+        try:
+            while True:
+                item = out.get()
+                if item is done:
+                    break
+                for discovered in self._expand(*item):
+                    key = (discovered.product_id, discovered.swatch)
+                    if key not in seen:
+                        seen.add(key)
+                        yield discovered
+        finally:
+            # 调用方提前停止迭代时通知各遍历线程退出
+            stop.set()
+            producer.join()
+        logger.info("📊 共发现%s个商品颜色", len(seen))
+
+    def leaf_category_ids(self) -> List[str]:
+        """分类树中的叶子分类（父分类的商品已包含在子分类中，只遍历叶子避免重复请求）"""
+        tree = self.api.get_category_tree()
+        if tree is None:
+            logger.error("❌ 无法获取分类树")
+            return []
+        parents = {node['parent_id'] for node in tree.nodes.values()}
+        return [category_id for category_id in tree.nodes if category_id not in parents]
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='PUMA商品目录发现（分类/搜索列表）')
+    parser.add_argument('--category', action='append', default=[], help='分类ID，可重复')
+    parser.add_argument('--all-categories', action='store_true', help='遍历分类树中的所有叶子分类')
+    parser.add_argument('--search', action='append', default=[], help='搜索词，可重复')
+    parser.add_argument('--page-size', type=int, default=DISCOVERY_PAGE_SIZE, help='每页商品数')
+    parser.add_argument('--workers', type=int, default=DISCOVERY_WORKERS, help='同时遍历的列表数')
+    parser.add_argument('--max-pages', type=int, default=DISCOVERY_MAX_PAGES, help='每个列表最多请求的页数')
+    parser.add_argument('--no-swatches', action='store_true', help='每个商品只输出一条URL（不展开颜色）')
+    parser.add_argument('--output', '-o', default='-', help='URL输出文件，"-"表示标准输出')
+    parser.add_argument('--scrape', action='store_true', help='直接交给批量爬取（见batch_runner.py）')
+    parser.add_argument('--scrape-workers', type=int, default=4, help='批量爬取的并发数')
+    parser.add_argument('--checkpoint', help='批量爬取的断点名称')
+    parser.add_argument('--quiet', action='store_true', help='只输出警告和错误日志')
+    args = parser.parse_args()
+
+    setup_logging(quiet=args.quiet or None, stream=sys.stderr)
+    api = NewPumaGraphQLAPI()
+    discovery = CatalogDiscovery(api, page_size=args.page_size, workers=args.workers,
+                                 max_pages=args.max_pages, expand_swatches=not args.no_swatches)
+    category_ids = list(args.category)
+    if args.all_categories:
+        category_ids += discovery.leaf_category_ids()
+    urls = (discovered.url for discovered in discovery.discover(category_ids, args.search))
+
+    if args.scrape:
+        checkpoint = CrawlCheckpoint(get_checkpoint_path(args.checkpoint)) if args.checkpoint else None
+        output_path = args.output if args.output != '-' else get_output_path(
+            f"catalog_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        with open(output_path, 'a', encoding='utf-8') as output:
+            stats = BatchRunner(api, workers=args.scrape_workers, checkpoint=checkpoint).run(urls, output=output)
+        print(f"📊 {stats.summary()}", file=sys.stderr)
+        print(f"💾 结果已保存: {output_path}", file=sys.stderr)
+        return
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for url in urls:
+            output.write(url + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
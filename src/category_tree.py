@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品分类树
+通过GraphQL分类查询获取一次整棵分类树并长期缓存，
+根据PDP响应中的primaryCategoryId直接构建面包屑导航，不再下载商品页面HTML
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SITE_ROOT_URL = "https://us.puma.com"
+HOME_URL = "https://us.puma.com/us/en"
+
+# 分类树在内存中的有效期（秒）：分类结构很少变化
+CATEGORY_TREE_TTL = 24 * 60 * 60
+
+# 分类树加载失败后多少秒内不再重试（期间回退到HTML/URL推断）
+CATEGORY_TREE_RETRY_INTERVAL = 10 * 60
+
+# 子分类、链接可能使用的字段名（兼容不同版本的分类查询）
+_CHILDREN_KEYS = ('subCategories', 'children', 'categories')
+_URL_KEYS = ('href', 'url', 'link')
+
+
+class CategoryTree:
+    """分类ID -> 分类节点（名称、链接、父分类）的索引"""
+
+    def __init__(self, nodes: Dict[str, Dict[str, str]]):
+        """
+        Args:
+            nodes: 分类ID -> {'id', 'name', 'url', 'parent_id'}
+        """
+        self.nodes = nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @classmethod
+    def from_graphql(cls, categories: List[Dict]) -> "CategoryTree":
+        """由GraphQL返回的嵌套分类列表构建（非递归遍历，深度不受限制）"""
+        nodes: Dict[str, Dict[str, str]] = {}
+        stack = [(category, "") for category in reversed(categories or [])]
+        while stack:
+            category, parent_id = stack.pop()
+            if not isinstance(category, dict):
+                continue
+            category_id = str(category.get('id') or '')
+            if category_id and category_id not in nodes:
+                url = next((category[key] for key in _URL_KEYS if category.get(key)), '')
+                if url and not url.startswith('http'):
+                    url = f"{SITE_ROOT_URL}{url}"
+                nodes[category_id] = {
+                    'id': category_id,
+                    'name': category.get('name') or '',
+                    'url': url,
+                    'parent_id': str(category.get('parentId') or parent_id),
+                }
+            for key in _CHILDREN_KEYS:
+                children = category.get(key)
+                if children:
+                    stack.extend((child, category_id or parent_id) for child in reversed(children))
+                    break
+        return cls(nodes)
+
+    def path_to(self, category_id: str) -> List[Dict[str, str]]:
+        """从顶级分类到category_id的分类列表，分类不存在时返回空列表"""
+        path = []
+        seen = set()
+        current = self.nodes.get(str(category_id))
+        while current is not None and current['id'] not in seen:
+            seen.add(current['id'])
+            path.append(current)
+            current = self.nodes.get(current['parent_id'])
+        path.reverse()
+        return path
+
+    def build_breadcrumb(self, category_id: str, product_name: str, product_url: str) -> Tuple[List[Dict], str]:
+        """
+        构建与页面面包屑相同结构的导航：Home > 各级分类 > 商品（当前页面）
+
+        Returns:
+            (breadcrumb_items, navigation_path)，分类不存在时返回([], "")
+        """
+        path = self.path_to(category_id)
+        if not path:
+            return [], ""
+
+        breadcrumb_items = [{'text': 'Home', 'url': HOME_URL, 'level': 1, 'current': False}]
+        for category in path:
+            if category['name']:
+                breadcrumb_items.append({
+                    'text': category['name'],
+                    'url': category['url'],
+                    'level': len(breadcrumb_items) + 1,
+                    'current': False
+                })
+        if product_name:
+            breadcrumb_items.append({
+                'text': product_name,
+                'url': product_url,
+                'level': len(breadcrumb_items) + 1,
+                'current': True
+            })
+
+        navigation_path = ' > '.join(item['text'] for item in breadcrumb_items)
+        return breadcrumb_items, navigation_path
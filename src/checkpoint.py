@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量爬取的断点记录
+每个商品（商品ID + swatch）完成或失败时向JSONL文件追加一行，
+重新运行时跳过已完成的商品；失败的商品进入重试队列，超过最大尝试次数后不再重试。
+文件只追加不改写，进程中途被杀掉最多丢失最后一行（读取时跳过不完整的行）。
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# 失败的商品最多尝试的次数（含第一次）
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def ensure_trailing_newline(path: Union[str, Path]) -> None:
+    """追加写入前调用：上次被中断时最后一行可能没写完，补一个换行，避免与下一条记录粘在一起"""
+    with open(path, 'rb+') as f:
+        f.seek(0, 2)
+        if f.tell():
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+class CrawlCheckpoint:
+    """追加写入的断点文件：(商品ID, swatch) -> 最新状态"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # (商品ID, swatch) -> 最新一条记录（含累计尝试次数）
+        self.entries: Dict[Tuple[str, str], Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        skipped = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    key = (entry['product_id'], entry.get('swatch', ''))
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+                self.entries[key] = entry
+        ensure_trailing_newline(self.path)
+        if skipped:
+            logger.warning("⚠️ 断点文件中有%s行无法解析，已跳过: %s", skipped, self.path)
+        logger.info("📌 已加载断点: %s个商品已完成，%s个待重试",
+                    sum(1 for e in self.entries.values() if e['status'] == STATUS_DONE),
+                    sum(1 for e in self.entries.values() if e['status'] == STATUS_FAILED))
+
+    def is_done(self, product_id: str, swatch: str = "") -> bool:
+        entry = self.entries.get((product_id, swatch))
+        return entry is not None and entry['status'] == STATUS_DONE
+
+    def attempts(self, product_id: str, swatch: str = "") -> int:
+        entry = self.entries.get((product_id, swatch))
+        return entry.get('attempts', 0) if entry else 0
+
+    def record(self, product_id: str, swatch: str, status: str, url: str = "",
+               error: Optional[str] = None) -> Dict:
+        """追加一条记录并立即写入磁盘，返回该记录"""
+        with self._lock:
+            entry = {
+                'product_id': product_id,
+                'swatch': swatch,
+                'status': status,
+                'timestamp': datetime.now().isoformat(),
+                'url': url,
+                'attempts': self.attempts(product_id, swatch) + 1,
+            }
+            if error:
+                entry['error'] = error
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.entries[(product_id, swatch)] = entry
+            return entry
+
+    def retry_queue(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> List[str]:
+        """最新状态为失败且尝试次数未超过上限的商品URL（按记录顺序）"""
+        with self._lock:
+            return [
+                entry['url'] for entry in self.entries.values()
+                if entry['status'] == STATUS_FAILED and entry.get('url') and entry.get('attempts', 0) < max_attempts
+            ]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {STATUS_DONE: 0, STATUS_FAILED: 0}
+            for entry in self.entries.values():
+                counts[entry['status']] = counts.get(entry['status'], 0) + 1
+            return counts
@@ -15,6 +15,8 @@ PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 OUTPUTS_DIR = DATA_DIR / "outputs"
 LOGS_DIR = DATA_DIR / "logs"
+CHECKPOINTS_DIR = DATA_DIR / "checkpoints"
+QUEUES_DIR = DATA_DIR / "queues"
 
 # 源代码目录
 SRC_DIR = PROJECT_ROOT / "src"
@@ -37,6 +39,18 @@ def get_output_path(filename: str) -> Path:
     ensure_dirs()
     return OUTPUTS_DIR / filename
 
+# 获取断点文件路径
+def get_checkpoint_path(name: str) -> Path:
+    """获取批量爬取断点文件的完整路径（data/checkpoints/<name>.jsonl）"""
+    CHECKPOINTS_DIR.mkdir(parents=True, exist_ok=True)
+    return CHECKPOINTS_DIR / f"{name}.jsonl"
+
+# 获取工作队列数据库路径
+def get_queue_path(name: str) -> Path:
+    """获取工作队列SQLite数据库的完整路径（data/queues/<name>.db）"""
+    QUEUES_DIR.mkdir(parents=True, exist_ok=True)
+    return QUEUES_DIR / f"{name}.db"
+
 # 获取日志文件路径
 def get_log_path(filename: str) -> Path:
     """获取日志文件的完整路径"""
@@ -53,6 +67,45 @@ DEFAULT_TIMEOUT = 30
 DEFAULT_RETRIES = 3
 DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36"
 
+# HTTP连接池配置（所有模块共享，见http_transport.py）
+HTTP_POOL_CONNECTIONS = 10   # 缓存连接池的主机数
+HTTP_POOL_MAXSIZE = 20       # 每个主机保持的最大keep-alive连接数
+HTTP_POOL_BLOCK = False      # 连接数达到上限时是否阻塞等待（True即严格限制每主机连接数）
+
+# 按主机的自适应限速（见rate_limiter.py，通过共享连接池作用于所有出站请求）
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_INITIAL_RATE = 4.0    # 每个主机的初始速率（请求/秒）
+RATE_LIMIT_MIN_RATE = 0.5        # 被限流时最低降到的速率
+RATE_LIMIT_MAX_RATE = 20.0       # 响应正常时最高升到的速率
+RATE_LIMIT_BURST = 4             # 允许的突发请求数
+RATE_LIMIT_SLOW_SECONDS = 5.0    # 响应耗时超过该值视为上游过载并降速
+
+# 商品目录发现（见catalog_discovery.py）
+DISCOVERY_PAGE_SIZE = 48         # 分类/搜索列表每页商品数
+DISCOVERY_WORKERS = 4            # 同时遍历的列表数
+DISCOVERY_MAX_PAGES = None       # 每个列表最多请求的页数（None为不限制）
+
+# 站点地图发现（见sitemap_discovery.py）
+SITEMAP_INDEX_URL = "https://us.puma.com/sitemap_index.xml"
+SITEMAP_MAX_DEPTH = 3            # 站点地图索引最多嵌套的层数
+
+# 多进程分片爬取（见sharded_crawl.py）
+SHARD_PROCESSES = None           # 工作进程数（None为CPU核数）
+SHARD_THREADS = 4                # 每个进程内同时爬取的商品数
+
+# 工作队列（见work_queue.py）
+WORK_QUEUE_VISIBILITY_TIMEOUT = 300   # 租约时长（秒），超时未确认的任务重新可见
+WORK_QUEUE_POLL_INTERVAL = 2.0        # 队列为空时等待新任务的轮询间隔（秒）
+
+# HTML解析后端（见html_parser.py，可以被环境变量PUMA_HTML_PARSER覆盖）
+# 可选: "lxml"（快，需要lxml）、"html.parser"（标准库，最慢）、"html5lib"（最宽容，最慢）
+HTML_PARSER_BACKEND = "lxml"
+
+# 日志配置（见log_config.py，可以被环境变量PUMA_LOG_LEVEL / PUMA_LOG_JSON / PUMA_LOG_QUIET覆盖）
+LOG_LEVEL = "INFO"           # 日志级别
+LOG_JSON = False             # 是否输出结构化JSON日志（每行一个JSON对象）
+LOG_QUIET = False            # 生产静默模式：只输出WARNING及以上，DEBUG/INFO日志不构建字符串
+
 # 输出格式配置
 DEFAULT_OUTPUT_FORMAT = "json"
 DEFAULT_ENCODING = "utf-8"
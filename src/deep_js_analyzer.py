@@ -5,13 +5,17 @@
 专门分析页面中的JavaScript代码来找到尺码和其他动态数据
 """
 
-import requests
-from bs4 import BeautifulSoup
+import http_transport
+from html_parser import make_soup
 import json
 import re
 
-def deep_js_analysis(url):
-    """深度分析JavaScript中的数据"""
+def deep_js_analysis(url, stop_after_script='id="__NEXT_DATA__"', max_bytes=None):
+    """
+    深度分析JavaScript中的数据
+
+    stop_after_script: 读到包含该标记的<script>块结束后就断开连接（为None时读取整个页面）
+    """
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
@@ -23,11 +27,15 @@ def deep_js_analysis(url):
     
     try:
         print(f"🔍 深度分析JavaScript: {url}")
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
+        stop_at = [http_transport.MarkerScanner('</body>')]
+        if stop_after_script:
+            stop_at.append(http_transport.MarkerScanner(stop_after_script, '</script>'))
+        page = http_transport.fetch_html(url, stop_at=stop_at, max_bytes=max_bytes, headers=headers, timeout=30)
+        if not page.ok:
+            raise Exception(f"HTTP {page.status_code}")
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        print("✅ 页面获取成功，开始深度分析JavaScript...")
+        soup = make_soup(page.text)
+        print(f"✅ 页面获取成功（读取 {page.bytes_read} 字节），开始深度分析JavaScript...")
         
         script_tags = soup.find_all('script')
         print(f"📊 页面总共找到 {len(script_tags)} 个script标签")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品长描述（longDescription）解析
+单次扫描标签流（先切分标签，再对标签之间的文本做实体解码），按<h3>标题切分章节，提取章节文本和<li>列表项；
+同一款式的各个颜色、以及被反复请求的热门商品通常共享相同的描述，
+因此按内容哈希缓存解析结果（LRU，有上限）
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from html import unescape
+from typing import Dict, Tuple
+
+# 原始HTML中任何<...>都视为标签并被移除（实体解码出的<不是标签）
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+_TAG_NAME_PATTERN = re.compile(r'<(/?)\s*([a-zA-Z][a-zA-Z0-9]*)')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+def _collapse(text: str) -> str:
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def _tag_name(tag: str) -> Tuple[bool, str]:
+    """返回(是否结束标签, 小写标签名)，不是合法标签名时标签名为空"""
+    match = _TAG_NAME_PATTERN.match(tag)
+    if not match:
+        return False, ''
+    return bool(match.group(1)), match.group(2).lower()
+
+
+def _parse_sections(html_content: str) -> Dict[str, Dict]:
+    """
+    解析章节：{标题: {'title', 'text', 'list_items'}}
+
+    html_content为原始HTML：先按标签切分，再对每段文本做实体解码，
+    因此&lt;等实体解码出的尖括号保留为文本，不会被当作标签。规则：
+    - 标题为<h3>和</h3>之间的纯文本（中间有其他标签的<h3>不算章节，但仍然结束上一章节；
+      标题未结束时遇到新的<h3从新的<h3重新开始读取标题）
+    - 章节内容到下一个<h3或结尾为止
+    - 列表项为<li>到其后第一个</li>之间的文本（未闭合的<li>并入下一项）
+    - 章节文本为去掉<ul>...</ul>后的其余文本
+    """
+    sections: Dict[str, Dict] = {}
+    section = None          # 当前章节
+    text_parts = []         # 当前章节的非列表文本
+    item_parts = None       # 当前列表项的文本，不在<li>内时为None
+    in_ul = False
+    title_parts = None      # 正在读取的<h3>标题文本，不在<h3>内时为None
+    title_valid = False
+
+    def finish_section():
+        if section is not None:
+            text = _collapse(''.join(text_parts))
+            if text:
+                section['text'] = text
+            sections[section['title']] = section
+
+    position = 0
+    for match in _TAG_PATTERN.finditer(html_content):
+        segment = unescape(html_content[position:match.start()])
+        position = match.end()
+        is_end, name = _tag_name(match.group())
+
+        if title_parts is not None:
+            # 在<h3>内：只接受纯文本标题
+            if name == 'h3' and is_end:
+                title = ''.join(title_parts + [segment]).strip()
+                if title_valid and title:
+                    section = {'title': title, 'text': '', 'list_items': []}
+                title_parts = None
+            elif name == 'h3':
+                title_parts = []
+                title_valid = True
+            else:
+                title_parts.append(segment)
+                title_valid = False
+            continue
+
+        if section is not None and segment:
+            if not in_ul:
+                text_parts.append(segment)
+            if item_parts is not None:
+                item_parts.append(segment)
+
+        if name == 'h3' and not is_end:
+            finish_section()
+            section = None
+            text_parts = []
+            item_parts = None
+            in_ul = False
+            title_parts = []
+            title_valid = True
+        elif section is None:
+            continue
+        elif name == 'li':
+            if not is_end:
+                if item_parts is None:
+                    item_parts = []
+            elif item_parts is not None:
+                item = _collapse(''.join(item_parts))
+                if item:
+                    section['list_items'].append(item)
+                item_parts = None
+        elif name == 'ul':
+            if not is_end:
+                in_ul = True
+            elif in_ul:
+                in_ul = False
+
+    tail = unescape(html_content[position:])
+    if title_parts is None and section is not None and not in_ul:
+        text_parts.append(tail)
+    finish_section()
+    return sections
+
+
+class DescriptionParser:
+    """带有界LRU缓存（按内容哈希）的长描述解析器，线程安全"""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[bytes, Tuple[Dict[str, Dict], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, html_content: str) -> Tuple[Dict[str, Dict], str]:
+        """
+        解析长描述
+
+        Returns:
+            (章节字典, 纯文本)，纯文本为原始HTML去掉标签并压缩空白（不做实体解码）
+        """
+        key = hashlib.sha1(html_content.encode('utf-8')).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        if cached is None:
+            cached = (_parse_sections(html_content), _collapse(_TAG_PATTERN.sub('', html_content)))
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = cached
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        sections, text_only = cached
+        # 返回新的容器，调用方修改结果不会影响缓存
+        return {
+            title: {**section, 'list_items': list(section['list_items'])}
+            for title, section in sections.items()
+        }, text_only
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache)}
+
+
+_default_parser = DescriptionParser()
+
+
+def parse_long_description(html_content: str) -> Tuple[Dict[str, Dict], str]:
+    """使用共享缓存解析长描述，见DescriptionParser.parse"""
+    return _default_parser.parse(html_content)
+
+
+def get_default_parser() -> DescriptionParser:
+    return _default_parser
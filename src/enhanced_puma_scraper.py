@@ -5,7 +5,7 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 import json
 import re
 from urllib.parse import urljoin
@@ -32,7 +32,7 @@ def enhanced_scrape_puma(url):
         response = requests.get(url, headers=headers, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content)
         print("页面获取成功，开始解析...")
         
         # 初始化产品信息
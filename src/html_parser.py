@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML解析后端
+所有BeautifulSoup解析统一通过make_soup创建，后端由config.HTML_PARSER_BACKEND
+或环境变量PUMA_HTML_PARSER决定，配置的后端未安装时回退到标准库html.parser
+"""
+
+import logging
+import os
+from typing import Optional, Union
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from config import HTML_PARSER_BACKEND
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_BACKEND = "html.parser"
+
+# 已确认不可用的后端，只警告一次
+_unavailable_backends = set()
+
+
+def get_backend() -> str:
+    """当前配置的解析后端"""
+    return os.environ.get("PUMA_HTML_PARSER") or HTML_PARSER_BACKEND
+
+
+def make_soup(markup: Union[str, bytes], backend: Optional[str] = None) -> BeautifulSoup:
+    """
+    使用配置的后端解析HTML
+
+    Args:
+        markup: HTML文本或字节（字节由BeautifulSoup按页面声明的编码解码）
+        backend: 指定后端，为None时使用get_backend()
+    """
+    backend = backend or get_backend()
+    if backend not in _unavailable_backends:
+        try:
+            return BeautifulSoup(markup, backend)
+        except FeatureNotFound:
+            _unavailable_backends.add(backend)
+            logger.warning("⚠️ HTML解析后端 %s 不可用，回退到 %s", backend, FALLBACK_BACKEND)
+    return BeautifulSoup(markup, FALLBACK_BACKEND)
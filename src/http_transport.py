@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享的HTTP传输层
+所有模块通过同一个连接池访问us.puma.com，复用keep-alive连接，避免重复的TLS握手；
+连接池上的适配器按主机自适应限速（rate_limiter.py），各处不再需要固定的sleep；
+fetch_html流式读取页面，找到需要的内容后立即断开，不下载整个页面
+"""
+
+import codecs
+import threading
+import time
+from typing import Dict, Optional, Sequence
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK, RATE_LIMIT_ENABLED
+from rate_limiter import AdaptiveRateLimiter, get_default_limiter
+from retry_policy import get_retry_after
+
+_lock = threading.Lock()
+_shared_adapter: Optional[HTTPAdapter] = None
+_shared_session: Optional[requests.Session] = None
+_pool_settings = {
+    'pool_connections': HTTP_POOL_CONNECTIONS,
+    'pool_maxsize': HTTP_POOL_MAXSIZE,
+    'pool_block': HTTP_POOL_BLOCK,
+}
+_rate_limit_enabled = RATE_LIMIT_ENABLED
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """发送前按主机取令牌，并把状态码、耗时和Retry-After反馈给限速器"""
+
+    def __init__(self, limiter: Optional[AdaptiveRateLimiter] = None, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+        host = urlsplit(request.url).hostname or ''
+        self.limiter.acquire(host)
+        start = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.exceptions.Timeout:
+            # 超时说明上游过载；DNS失败、连接被拒绝等与发送速率无关，不降速
+            self.limiter.record(host, error=True)
+            raise
+        # stream=True时这里是收到响应头的耗时
+        self.limiter.record(host, response.status_code, time.monotonic() - start, get_retry_after(response))
+        return response
+
+
+def configure_transport(pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                        pool_block: Optional[bool] = None, rate_limit: Optional[bool] = None) -> None:
+    """
+    调整连接池参数，需要在创建session之前调用
+
+    Args:
+        pool_connections: 缓存连接池的主机数
+        pool_maxsize: 每个主机保持的最大连接数（并发线程数较多时应不小于线程数）
+        pool_block: 达到pool_maxsize时是否阻塞等待空闲连接
+        rate_limit: 是否启用按主机的自适应限速（见rate_limiter.py）
+    """
+    global _shared_adapter, _shared_session, _rate_limit_enabled
+    with _lock:
+        if pool_connections is not None:
+            _pool_settings['pool_connections'] = pool_connections
+        if pool_maxsize is not None:
+            _pool_settings['pool_maxsize'] = pool_maxsize
+        if pool_block is not None:
+            _pool_settings['pool_block'] = pool_block
+        if rate_limit is not None:
+            _rate_limit_enabled = rate_limit
+        # 之后创建的session使用新的连接池
+        _shared_adapter = None
+        _shared_session = None
+
+
+def get_adapter() -> HTTPAdapter:
+    """获取共享的连接池适配器（重试由调用方的重试策略负责，这里不做自动重试）"""
+    global _shared_adapter
+    with _lock:
+        if _shared_adapter is None:
+            limiter = get_default_limiter() if _rate_limit_enabled else None
+            _shared_adapter = RateLimitedAdapter(limiter, max_retries=0, **_pool_settings)
+        return _shared_adapter
+
+
+def create_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    创建使用共享连接池的session
+
+    每个session有自己的cookie和默认请求头（例如获取token时需要干净的cookie），
+    但底层TCP/TLS连接在所有session之间复用。
+    """
+    session = requests.Session()
+    adapter = get_adapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_session() -> requests.Session:
+    """获取共享的默认session，用于不需要独立cookie的一次性请求"""
+    global _shared_session
+    if _shared_session is None:
+        session = create_session()
+        with _lock:
+            if _shared_session is None:
+                _shared_session = session
+    return _shared_session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """替代requests.get，使用共享连接池"""
+    return get_session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """替代requests.post，使用共享连接池"""
+    return get_session().post(url, **kwargs)
+
+
+class MarkerScanner:
+    """
+    增量查找按顺序出现的一组标记（例如开始标签和其后的结束标签）
+
+    只保留上一块末尾不足一个标记长度的文本用于跨块匹配，不会重复扫描已读内容。
+    """
+
+    def __init__(self, *markers: str):
+        self.markers = [marker for marker in markers if marker]
+        self._index = 0
+        self._tail = ""
+        self._keep = max((len(marker) for marker in self.markers), default=1) - 1
+
+    @property
+    def found(self) -> bool:
+        return self._index >= len(self.markers)
+
+    def feed(self, text: str) -> bool:
+        """输入新解码的文本，全部标记都已找到时返回True"""
+        if self.found:
+            return True
+        window = self._tail + text
+        offset = 0
+        while not self.found:
+            position = window.find(self.markers[self._index], offset)
+            if position < 0:
+                break
+            offset = position + len(self.markers[self._index])
+            self._index += 1
+        self._tail = window[max(offset, len(window) - self._keep):] if self._keep else ""
+        return self.found
+
+
+class StreamedPage:
+    """fetch_html的结果"""
+
+    def __init__(self, status_code: int, url: str, text: str, bytes_read: int, stopped_early: bool):
+        self.status_code = status_code
+        self.url = url
+        self.text = text
+        self.bytes_read = bytes_read      # 已读取的解压后字节数
+        self.stopped_early = stopped_early  # 是否在读完之前因找到标记而断开
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+
+
+def fetch_html(url: str, stop_at: Sequence[MarkerScanner] = (), max_bytes: Optional[int] = None,
+               session: Optional[requests.Session] = None, retry_policy=None,
+               chunk_size: int = 16 * 1024, **kwargs) -> StreamedPage:
+    """
+    流式获取页面文本，任一MarkerScanner找到全部标记或读取超过max_bytes时停止并关闭连接
+
+    iter_content按块解压gzip/deflate/br，解压后的字节用增量解码器转换为文本。
+
+    Args:
+        url: 页面URL
+        stop_at: 停止条件，为空时读取整个页面
+        max_bytes: 最多读取的（解压后）字节数
+        session: 使用的session，默认使用共享session
+        retry_policy: 可选的重试策略（只对建立连接和响应状态码生效）
+        kwargs: 透传给session.get，例如headers、timeout
+    """
+    session = session or get_session()
+    kwargs['stream'] = True
+    if retry_policy is not None:
+        response = retry_policy.call(session.get, url, **kwargs)
+    else:
+        response = session.get(url, **kwargs)
+
+    try:
+        if response.status_code != 200:
+            return StreamedPage(response.status_code, response.url or url, "", 0, False)
+
+        # 没有声明charset时requests会假定ISO-8859-1，页面实际为UTF-8
+        content_type = response.headers.get('content-type', '').lower()
+        encoding = response.encoding if response.encoding and 'charset' in content_type else 'utf-8'
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+        parts = []
+        bytes_read = 0
+        stopped_early = False
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if not chunk:
+                continue
+            bytes_read += len(chunk)
+            text = decoder.decode(chunk)
+            parts.append(text)
+            # 每个scanner都要看到每一块，不能短路
+            if any([scanner.feed(text) for scanner in stop_at]) or (max_bytes is not None and bytes_read >= max_bytes):
+                stopped_early = True
+                break
+        if not stopped_early:
+            parts.append(decoder.decode(b'', final=True))
+
+        return StreamedPage(response.status_code, response.url or url, ''.join(parts), bytes_read, stopped_early)
+    finally:
+        # 提前停止时关闭连接（未读完的连接不能放回连接池）；读完时释放回连接池
+        response.close()
@@ -5,14 +5,14 @@ Puma商品页面图片分析器
 分析页面中的所有图片元素，找出商品图片的位置
 """
 
-import requests
-from bs4 import BeautifulSoup
+import http_transport
+from html_parser import make_soup
 import json
 import re
 from urllib.parse import urljoin
 
-def analyze_images(url):
-    """分析页面中的所有图片"""
+def analyze_images(url, max_bytes=None):
+    """分析页面中的所有图片（流式读取到</body>为止，max_bytes可进一步限制读取量）"""
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
@@ -24,11 +24,15 @@ def analyze_images(url):
     
     try:
         print(f"🔍 分析页面图片: {url}")
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        print("✅ 页面获取成功，开始分析图片...")
+        page = http_transport.fetch_html(
+            url, stop_at=[http_transport.MarkerScanner('</body>')], max_bytes=max_bytes,
+            headers=headers, timeout=30
+        )
+        if not page.ok:
+            raise Exception(f"HTTP {page.status_code}")
+        
+        soup = make_soup(page.text)
+        print(f"✅ 页面获取成功（读取 {page.bytes_read} 字节），开始分析图片...")
         
         # 找到所有img标签
         all_images = soup.find_all('img')
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志配置
+所有模块使用logging.getLogger(__name__)记录日志，入口程序（app.py、批量脚本）调用setup_logging。
+支持文本/JSON两种格式，以及只输出WARNING及以上的静默模式。
+"""
+
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Optional, TextIO
+
+from config import LOG_JSON, LOG_LEVEL, LOG_QUIET
+
+LOG_TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# LogRecord自带的属性，JSON格式中其余属性（通过extra传入）作为附加字段输出
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def setup_logging(level: Optional[str] = None, json_format: Optional[bool] = None,
+                  quiet: Optional[bool] = None, stream: Optional[TextIO] = None) -> None:
+    """
+    配置根logger（重复调用会替换之前配置的处理器）
+
+    Args:
+        level: 日志级别，默认取PUMA_LOG_LEVEL环境变量或config.LOG_LEVEL
+        json_format: 是否输出JSON，默认取PUMA_LOG_JSON或config.LOG_JSON
+        quiet: 静默模式，级别至少为WARNING，默认取PUMA_LOG_QUIET或config.LOG_QUIET
+        stream: 输出流，默认stdout
+    """
+    level = (level or os.environ.get('PUMA_LOG_LEVEL') or LOG_LEVEL).upper()
+    json_format = _env_flag('PUMA_LOG_JSON', LOG_JSON) if json_format is None else json_format
+    quiet = _env_flag('PUMA_LOG_QUIET', LOG_QUIET) if quiet is None else quiet
+
+    numeric_level = logging.getLevelName(level)
+    if not isinstance(numeric_level, int):
+        numeric_level = logging.INFO
+    if quiet:
+        numeric_level = max(numeric_level, logging.WARNING)
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(LOG_TEXT_FORMAT))
+    handler._puma_handler = True
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if getattr(existing, '_puma_handler', False):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(numeric_level)
@@ -7,14 +7,66 @@
 
 import requests
 import json
+import logging
 import re
+import hashlib
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict, field
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from dataclasses import dataclass, asdict, field, fields
 
-@dataclass
+import http_transport
+from response_cache import ResponseCache
+from retry_policy import RetryPolicy, get_default_policy
+from token_manager import TokenManager
+from streaming_json import decode_product_response
+from category_tree import CategoryTree, CATEGORY_TREE_TTL, CATEGORY_TREE_RETRY_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# 站点首页（GraphQL请求默认的referer）
+SITE_HOME_URL = "https://us.puma.com/us/en"
+
+# 增量解码PDP响应时每次从连接读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 从商品URL中提取商品ID的模式（按顺序尝试，URL发现等模块共用）
+PRODUCT_ID_PATTERNS = (
+    re.compile(r'/pd/[^/]+/(\d+)', re.IGNORECASE),  # 标准格式: /pd/product-name/123456
+    re.compile(r'product[_-]?id[=:](\d+)', re.IGNORECASE),  # 查询参数格式
+    re.compile(r'/(\d{6})(?:[/?]|$)', re.IGNORECASE),  # 6位数字ID
+    re.compile(r'/(\d{5,7})(?:[/?]|$)', re.IGNORECASE),  # 5-7位数字ID
+)
+
+
+def match_product_id(url: str) -> Optional[str]:
+    """按PRODUCT_ID_PATTERNS从URL中提取商品ID，不匹配时返回None"""
+    for pattern in PRODUCT_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def url_with_swatch(url: str, swatch: str) -> str:
+    """把URL的swatch参数替换为指定颜色代码（其它查询参数保持不变）"""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != 'swatch']
+    if swatch:
+        query.append(('swatch', swatch))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+@dataclass(slots=True)
 class ProductInfo:
-    """商品信息数据类"""
+    """
+    商品信息数据类
+    
+    使用__slots__减少每个实例的内存；序列化请使用to_dict/to_json，
+    它们不像dataclasses.asdict那样深拷贝all_variations等嵌套数据。
+    """
     # 基本信息
     name: str = ""
     header: str = ""
@@ -122,16 +174,83 @@ class ProductInfo:
     scraped_at: str = ""
     method: str = "new_graphql"
     url: str = ""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为字典（字段顺序与定义一致）
+        
+        嵌套的列表/字典与对象共享而不拷贝，调用方不应原地修改；
+        需要独立副本时使用dataclasses.asdict。
+        """
+        return {name: getattr(self, name) for name in PRODUCT_INFO_FIELDS}
+    
+    def to_json(self, **kwargs) -> str:
+        """序列化为JSON字符串，参数透传给json.dumps（默认ensure_ascii=False）"""
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+# ProductInfo的字段名（按定义顺序），to_dict直接按它取值
+PRODUCT_INFO_FIELDS = tuple(f.name for f in fields(ProductInfo))
+
 
+class VariationIndex:
+    """
+    单次响应的变体索引：colorValue / variantId / id -> 变体
+    
+    同一个键出现多次时保留第一个，与按顺序线性查找的结果一致。
+    """
+    
+    __slots__ = ('variations', 'by_color', 'by_variant_id', 'by_id', 'positions')
+    
+    def __init__(self, variations: List[Dict]):
+        self.variations = variations or []
+        self.by_color: Dict[str, Dict] = {}
+        self.by_variant_id: Dict[str, Dict] = {}
+        self.by_id: Dict[str, Dict] = {}
+        self.positions: Dict[int, int] = {}
+        for position, variation in enumerate(self.variations):
+            self.positions[id(variation)] = position
+            for key, index in (('colorValue', self.by_color), ('variantId', self.by_variant_id), ('id', self.by_id)):
+                value = variation.get(key)
+                if value:
+                    index.setdefault(value, variation)
+    
+    def find_by_swatch(self, swatch_code: str) -> Dict:
+        """按swatch代码查找变体，没有swatch或没有匹配时返回第一个变体"""
+        if not self.variations:
+            return {}
+        if swatch_code:
+            return self.by_color.get(swatch_code) or self.variations[0]
+        return self.variations[0]
+    
+    def position_of(self, variation: Dict) -> int:
+        """变体在原列表中的位置，不在列表中时返回-1"""
+        return self.positions.get(id(variation), -1)
 
 
 class NewPumaGraphQLAPI:
     """新的PUMA GraphQL API客户端"""
     
-    def __init__(self):
-        """初始化API客户端"""
+    def __init__(self, use_persisted_queries: bool = False, cache: Optional[ResponseCache] = None,
+                 background_token_refresh: bool = False, retry_policy: Optional[RetryPolicy] = None,
+                 streaming_decode: bool = False, keep_full_variations: bool = False,
+                 use_category_tree: bool = True):
+        """
+        初始化API客户端
+        
+        Args:
+            use_persisted_queries: 是否启用自动持久化查询（APQ），只上传查询的sha256哈希
+            cache: 可选的GraphQL响应缓存，缓存原始的data.product数据
+            background_token_refresh: 是否启动后台线程在token过期前自动刷新
+            retry_policy: 请求重试策略，默认使用共享的策略（共享重试预算和熔断器）
+            streaming_decode: 是否增量解码PDP响应，只完整保留选中的变体，其余变体只保留摘要
+            keep_full_variations: 增量解码时仍然保留所有变体的完整数据
+            use_category_tree: 是否根据分类树和primaryCategoryId构建面包屑（失败时回退到页面HTML）
+        """
         self.base_url = "https://us.puma.com/api/graphql"
-        self.session = requests.Session()
+        self.session = http_transport.create_session()
+        self.retry_policy = retry_policy or get_default_policy()
         
         # 基础请求头（基于提供的curl请求）
         self.headers = {
@@ -163,10 +282,8 @@ class NewPumaGraphQLAPI:
             "bloomreach-id": "uid=2119450463975:v=12.0:ts=1756085787277:hc=4"
         }
         
-        # GraphQL查询语句（简化版）
-        self.pdp_query = """
-        query PDP($id: ID!) {
-          product(id: $id) {
+        # PDP商品字段（单个查询和批量别名查询共用）
+        self.pdp_product_fields = """
             name
             id
             header
@@ -230,9 +347,14 @@ class NewPumaGraphQLAPI:
                 }
               }
             }
-          }
-        }
-        """
+"""
+        
+        # GraphQL查询语句（简化版）
+        self.pdp_query = (
+            "\n        query PDP($id: ID!) {\n          product(id: $id) {"
+            + self.pdp_product_fields +
+            "          }\n        }\n        "
+        )
         
         # 新增：LazyPDP查询语句（用于获取详细尺码信息）
         self.lazy_pdp_query = """
@@ -296,15 +418,163 @@ class NewPumaGraphQLAPI:
         }
         """
         
-        print("✅ 新的PUMA GraphQL API客户端初始化完成")
+        # 轻量查询档位：高频价格/库存监控和图片同步只请求需要的字段
+        self.pricing_query = """
+        query PDPPricing($id: ID!) {
+          product(id: $id) {
+            id
+            name
+            orderable
+            variations {
+              id
+              variantId
+              colorValue
+              colorName
+              styleNumber
+              price
+              salePrice
+              productPrice {
+                price
+                salePrice
+                promotionPrice
+                tax
+                taxRate
+                bestPrice
+              }
+              orderable
+            }
+          }
+        }
+        """
+        
+        self.inventory_query = """
+        query PDPInventory($id: ID!) {
+          product(id: $id) {
+            id
+            name
+            orderable
+            variations {
+              id
+              variantId
+              colorValue
+              colorName
+              orderable
+              sizeGroups {
+                label
+                sizes {
+                  id
+                  label
+                  value
+                  orderable
+                  maxOrderableQuantity
+                }
+              }
+            }
+          }
+        }
+        """
+        
+        self.media_query = """
+        query PDPMedia($id: ID!) {
+          product(id: $id) {
+            id
+            name
+            image {
+              href
+              verticalImageHref
+              alt
+            }
+            variations {
+              id
+              variantId
+              colorValue
+              colorName
+              preview
+              images {
+                alt
+                href
+                verticalImageHref
+              }
+            }
+          }
+        }
+        """
+        
+        # 分类树查询：整棵树只取一次，用于由primaryCategoryId构建面包屑
+        self.category_tree_query = """
+        query CategoryTree {
+          categories {
+            ...categoryFields
+            subCategories {
+              ...categoryFields
+              subCategories {
+                ...categoryFields
+                subCategories {
+                  ...categoryFields
+                }
+              }
+            }
+          }
+        }
+        
+        fragment categoryFields on Category {
+          id
+          name
+          href
+        }
+        """
+        
+        # 查询档位：档位名 -> (操作名, 查询文档, 解析方法)
+        self.query_profiles = {
+            "full": ("PDP", self.pdp_query, self._parse_product_data),
+            "pricing": ("PDPPricing", self.pricing_query, self._parse_pricing_data),
+            "inventory": ("PDPInventory", self.inventory_query, self._parse_inventory_data),
+            "media": ("PDPMedia", self.media_query, self._parse_media_data),
+        }
+        
+        # token管理器：根据JWT的exp提前刷新，并发刷新只执行一次
+        # （通过lambda调用get_fresh_token，便于替换刷新实现；返回的新请求头由管理器在锁内换入）
+        self.token_manager = TokenManager(self.auth_headers, lambda: self.get_fresh_token())
+        if background_token_refresh:
+            self.token_manager.start_background_refresh()
+        
+        # GraphQL响应缓存（为None时不缓存）
+        self.cache = cache
+        
+        # 分类树（见category_tree模块），首次需要时加载
+        self.use_category_tree = use_category_tree
+        self._category_tree: Optional[CategoryTree] = None
+        self._category_tree_loaded_at = 0.0
+        self._category_tree_failed_at = 0.0
+        self._category_tree_lock = threading.Lock()
+        
+        # PDP响应增量解码（见streaming_json模块）
+        self.streaming_decode = streaming_decode
+        self.keep_full_variations = keep_full_variations
+        
+        # 自动持久化查询（APQ）：启动时预先计算固定查询文档的哈希
+        self.use_persisted_queries = use_persisted_queries
+        self.persisted_query_hashes: Dict[str, str] = {}
+        for _, query, _ in self.query_profiles.values():
+            self._get_query_hash(query)
+        self._get_query_hash(self.lazy_pdp_query)
+        self._get_query_hash(self.category_tree_query)
+        
+        logger.info("✅ 新的PUMA GraphQL API客户端初始化完成")
     
     def get_fresh_token(self):
-        """获取新的认证token"""
+        """
+        获取新的认证token
+
+        不修改self.auth_headers：在副本上更新，成功时返回新的认证请求头字典，失败时返回False。
+        换入由token_manager.refresh在锁内完成（手动刷新请调用token_manager.refresh()）。
+        """
+        new_headers = dict(self.auth_headers)
         try:
-            print(f"🔄 尝试获取新的认证token...")
+            logger.debug("🔄 尝试获取新的认证token...")
             
-            # 创建一个新的session来避免cookie干扰
-            fresh_session = requests.Session()
+            # 创建一个新的session来避免cookie干扰（连接池仍然共享）
+            fresh_session = http_transport.create_session()
             
             # 设置真实的浏览器头部
             browser_headers = {
@@ -322,21 +592,21 @@ class NewPumaGraphQLAPI:
             }
             
             # 1. 首先访问首页建立session
-            print(f"📝 Step 1: 访问PUMA首页建立会话...")
+            logger.debug("📝 Step 1: 访问PUMA首页建立会话...")
             homepage_response = fresh_session.get(
                 "https://us.puma.com/us/en",
                 headers=browser_headers,
                 timeout=30
             )
             
-            print(f"📊 首页响应状态码: {homepage_response.status_code}")
+            logger.debug("📊 首页响应状态码: %s", homepage_response.status_code)
             
             if homepage_response.status_code != 200:
-                print(f"❌ 无法访问首页: {homepage_response.status_code}")
+                logger.error("❌ 无法访问首页: %s", homepage_response.status_code)
                 return False
             
             # 2. 访问具体商品页面
-            print(f"📝 Step 2: 访问商品页面...")
+            logger.debug("📝 Step 2: 访问商品页面...")
             product_url = "https://us.puma.com/us/en/pd/suede-xl-leopard-jr-youth/404299"
             product_response = fresh_session.get(
                 product_url,
@@ -344,14 +614,14 @@ class NewPumaGraphQLAPI:
                 timeout=30
             )
             
-            print(f"📊 商品页面响应状态码: {product_response.status_code}")
+            logger.debug("📊 商品页面响应状态码: %s", product_response.status_code)
             
             if product_response.status_code != 200:
-                print(f"❌ 无法访问商品页面: {product_response.status_code}")
+                logger.error("❌ 无法访问商品页面: %s", product_response.status_code)
                 return False
             
             # 3. 分析页面内容寻找认证信息
-            print(f"📝 Step 3: 分析页面内容寻找认证信息...")
+            logger.debug("📝 Step 3: 分析页面内容寻找认证信息...")
             content = product_response.text
             
             # 查找JWT token的各种可能位置
@@ -386,37 +656,37 @@ class NewPumaGraphQLAPI:
                     # 验证JWT格式（三部分用.分隔）和长度
                     if len(match.split('.')) == 3 and len(match) > 50:
                         # 检查是否为新token（与当前的不同）
-                        current_token = self.auth_headers.get("authorization", "").replace("Bearer ", "")
+                        current_token = new_headers.get("authorization", "").replace("Bearer ", "")
                         if match != current_token:
                             found_tokens.append(match)
-                            print(f"✅ 找到新的JWT token: {match[:30]}...{match[-10:]}")
+                            logger.info("✅ 找到新的JWT token: %s...%s", match[:30], match[-10:])
             
             if found_tokens:
                 # 使用第一个找到的有效token
                 new_token = found_tokens[0]
-                print(f"✅ 在页面中找到JWT token: {new_token[:50]}...")
-                self.auth_headers["authorization"] = f"Bearer {new_token}"
+                logger.info("✅ 在页面中找到JWT token: %s...", new_token[:50])
+                new_headers["authorization"] = f"Bearer {new_token}"
                 
                 # 尝试查找其他认证信息
                 for header_name, patterns in auth_patterns.items():
                     for pattern in patterns:
                         matches = re.findall(pattern, content, re.IGNORECASE)
                         if matches:
-                            self.auth_headers[header_name] = matches[0]
-                            print(f"✅ 找到 {header_name}: {matches[0][:20]}...")
+                            new_headers[header_name] = matches[0]
+                            logger.info("✅ 找到 %s: %s...", header_name, matches[0][:20])
                             break
                 
-                print(f"✅ 成功更新认证信息")
-                return True
+                logger.info("✅ 成功更新认证信息")
+                return new_headers
             
             # 4. 如果页面中没找到，尝试使用RefreshLogon API刷新token
-            print(f"📝 Step 4: 尝试使用RefreshLogon API刷新token...")
-            refresh_success = self._try_refresh_logon_api(fresh_session)
+            logger.debug("📝 Step 4: 尝试使用RefreshLogon API刷新token...")
+            refresh_success = self._try_refresh_logon_api(fresh_session, new_headers)
             if refresh_success:
-                return True
+                return new_headers
             
             # 5. 如果RefreshLogon失败，尝试模拟GraphQL请求触发token生成
-            print(f"📝 Step 5: 尝试通过GraphQL API触发token生成...")
+            logger.debug("📝 Step 5: 尝试通过GraphQL API触发token生成...")
             graphql_headers = {
                 **browser_headers,
                 "Content-Type": "application/json",
@@ -440,26 +710,26 @@ class NewPumaGraphQLAPI:
                 timeout=30
             )
             
-            print(f"📊 GraphQL API响应状态码: {api_response.status_code}")
+            logger.debug("📊 GraphQL API响应状态码: %s", api_response.status_code)
             
             # 检查响应头是否包含新的认证信息
             response_headers = api_response.headers
             if 'set-cookie' in response_headers:
-                print(f"📊 API响应包含Cookie信息")
+                logger.debug("📊 API响应包含Cookie信息")
             
             # 尝试从响应中提取token（某些API会在响应中返回token）
             if api_response.status_code == 200:
                 try:
                     response_data = api_response.json()
-                    print(f"📊 API响应包含数据")
+                    logger.debug("📊 API响应包含数据")
                     # 这里可以根据API的具体响应格式来提取token
                 except:
                     pass
             
-            print(f"⚠️ 无法自动获取新的认证token")
+            logger.warning("⚠️ 无法自动获取新的认证token")
             
             # 6. Fallback策略：尝试从项目中其他API客户端获取token
-            print(f"📝 Step 6: Fallback - 尝试从项目中其他API客户端获取token...")
+            logger.debug("📝 Step 6: Fallback - 尝试从项目中其他API客户端获取token...")
             try:
                 # 尝试导入并获取其他API客户端的token
                 import sys
@@ -474,10 +744,10 @@ class NewPumaGraphQLAPI:
                     backup_api = CompleteGraphQLAPI()
                     if hasattr(backup_api, 'headers') and 'authorization' in backup_api.headers:
                         backup_token = backup_api.headers['authorization']
-                        if backup_token and backup_token != self.auth_headers.get('authorization'):
-                            print(f"✅ 从CompleteGraphQLAPI获取到backup token")
-                            self.auth_headers['authorization'] = backup_token
-                            return True
+                        if backup_token and backup_token != new_headers.get('authorization'):
+                            logger.info("✅ 从CompleteGraphQLAPI获取到backup token")
+                            new_headers['authorization'] = backup_token
+                            return new_headers
                 except ImportError:
                     pass
                 
@@ -487,35 +757,32 @@ class NewPumaGraphQLAPI:
                     backup_api = WorkingCompleteGraphQLAPI()
                     if hasattr(backup_api, 'auth_headers') and 'authorization' in backup_api.auth_headers:
                         backup_token = backup_api.auth_headers['authorization']
-                        if backup_token and backup_token != self.auth_headers.get('authorization'):
-                            print(f"✅ 从WorkingCompleteGraphQLAPI获取到backup token")
+                        if backup_token and backup_token != new_headers.get('authorization'):
+                            logger.info("✅ 从WorkingCompleteGraphQLAPI获取到backup token")
                             # 复制所有认证头
-                            for key, value in backup_api.auth_headers.items():
-                                self.auth_headers[key] = value
-                            return True
+                            new_headers.update(backup_api.auth_headers)
+                            return new_headers
                 except ImportError:
                     pass
                     
             except Exception as e:
-                print(f"❌ Fallback策略失败: {e}")
+                logger.error("❌ Fallback策略失败: %s", e)
             
             return False
             
         except Exception as e:
-            print(f"❌ 获取新token时发生错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ 获取新token时发生错误: %s", e)
             return False
     
-    def _try_refresh_logon_api(self, session):
-        """尝试使用RefreshLogon API刷新token"""
+    def _try_refresh_logon_api(self, session, auth_headers: Dict[str, str]):
+        """尝试使用RefreshLogon API刷新token，成功时更新传入的auth_headers（get_fresh_token中的副本）"""
         try:
-            current_refresh_token = self.auth_headers.get("refresh-token")
+            current_refresh_token = auth_headers.get("refresh-token")
             if not current_refresh_token:
-                print(f"⚠️ 没有可用的refresh-token")
+                logger.warning("⚠️ 没有可用的refresh-token")
                 return False
             
-            print(f"✅ 使用现有refresh-token: {current_refresh_token[:20]}...")
+            logger.info("✅ 使用现有refresh-token: %s...", current_refresh_token[:20])
             
             # RefreshLogon GraphQL查询
             refresh_query = {
@@ -571,18 +838,18 @@ fragment tokenPayload on TokenPayload {
             }
             
             # 添加当前的认证信息
-            if self.auth_headers.get("authorization"):
-                refresh_headers["authorization"] = self.auth_headers["authorization"]
-            if self.auth_headers.get("customer-group"):
-                refresh_headers["customer-group"] = self.auth_headers["customer-group"]
-            if self.auth_headers.get("customer-id"):
-                refresh_headers["customer-id"] = self.auth_headers["customer-id"]
-            if self.auth_headers.get("refresh-token"):
-                refresh_headers["refresh-token"] = self.auth_headers["refresh-token"]
-            if self.auth_headers.get("bloomreach-id"):
-                refresh_headers["bloomreach-id"] = self.auth_headers["bloomreach-id"]
-            
-            print(f"📝 发送RefreshLogon请求...")
+            if auth_headers.get("authorization"):
+                refresh_headers["authorization"] = auth_headers["authorization"]
+            if auth_headers.get("customer-group"):
+                refresh_headers["customer-group"] = auth_headers["customer-group"]
+            if auth_headers.get("customer-id"):
+                refresh_headers["customer-id"] = auth_headers["customer-id"]
+            if auth_headers.get("refresh-token"):
+                refresh_headers["refresh-token"] = auth_headers["refresh-token"]
+            if auth_headers.get("bloomreach-id"):
+                refresh_headers["bloomreach-id"] = auth_headers["bloomreach-id"]
+            
+            logger.debug("📝 发送RefreshLogon请求...")
             response = session.post(
                 "https://us.puma.com/api/graphql",
                 headers=refresh_headers,
@@ -590,7 +857,7 @@ fragment tokenPayload on TokenPayload {
                 timeout=30
             )
             
-            print(f"📊 RefreshLogon响应状态码: {response.status_code}")
+            logger.debug("📊 RefreshLogon响应状态码: %s", response.status_code)
             
             if response.status_code == 200:
                 try:
@@ -604,75 +871,115 @@ fragment tokenPayload on TokenPayload {
                         new_customer_id = token_payload.get('customerId')
                         
                         if new_access_token:
-                            print(f"✅ RefreshLogon成功！获取到新的accessToken")
+                            logger.info("✅ RefreshLogon成功！获取到新的accessToken")
                             
                             # 更新认证信息
-                            self.auth_headers["authorization"] = f"Bearer {new_access_token}"
+                            auth_headers["authorization"] = f"Bearer {new_access_token}"
                             
                             if new_refresh_token:
-                                self.auth_headers["refresh-token"] = new_refresh_token
-                                print(f"✅ 更新refresh-token: {new_refresh_token[:20]}...")
+                                auth_headers["refresh-token"] = new_refresh_token
+                                logger.info("✅ 更新refresh-token: %s...", new_refresh_token[:20])
                             
                             if new_customer_id:
-                                self.auth_headers["customer-id"] = new_customer_id
-                                print(f"✅ 更新customer-id: {new_customer_id}")
+                                auth_headers["customer-id"] = new_customer_id
+                                logger.info("✅ 更新customer-id: %s", new_customer_id)
                             
                             # 更新customerContext中的hashKey作为customer-group
                             customer_context = token_payload.get('customerContext', {})
                             if customer_context and customer_context.get('hashKey'):
-                                self.auth_headers["customer-group"] = customer_context['hashKey']
-                                print(f"✅ 更新customer-group: {customer_context['hashKey'][:20]}...")
+                                auth_headers["customer-group"] = customer_context['hashKey']
+                                logger.info("✅ 更新customer-group: %s...", customer_context['hashKey'][:20])
                             
-                            print(f"✅ RefreshLogon API刷新token成功！")
+                            logger.info("✅ RefreshLogon API刷新token成功！")
                             return True
                         else:
-                            print(f"❌ RefreshLogon响应中没有accessToken")
+                            logger.error("❌ RefreshLogon响应中没有accessToken")
                             return False
                     elif 'errors' in data:
-                        print(f"❌ RefreshLogon错误: {data['errors']}")
+                        logger.error("❌ RefreshLogon错误: %s", data['errors'])
                         return False
                     else:
-                        print(f"❌ RefreshLogon响应格式不正确")
+                        logger.error("❌ RefreshLogon响应格式不正确")
                         return False
                         
                 except json.JSONDecodeError as e:
-                    print(f"❌ RefreshLogon响应JSON解析失败: {e}")
+                    logger.error("❌ RefreshLogon响应JSON解析失败: %s", e)
                     return False
             else:
-                print(f"❌ RefreshLogon请求失败: {response.status_code}")
+                logger.error("❌ RefreshLogon请求失败: %s", response.status_code)
                 if response.text:
-                    print(f"   响应内容: {response.text[:200]}...")
+                    logger.debug("   响应内容: %s...", response.text[:200])
                 return False
                 
         except Exception as e:
-            print(f"❌ RefreshLogon API调用异常: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ RefreshLogon API调用异常: %s", e)
             return False
     
+    def _get_query_hash(self, query: str) -> str:
+        """获取查询文档的sha256哈希（带缓存）"""
+        query_hash = self.persisted_query_hashes.get(query)
+        if query_hash is None:
+            query_hash = hashlib.sha256(query.encode('utf-8')).hexdigest()
+            self.persisted_query_hashes[query] = query_hash
+        return query_hash
+    
+    def _post(self, payload: Dict, request_headers: Dict, stream: bool = False) -> requests.Response:
+        """按重试策略发送一次GraphQL POST请求（429/5xx/超时会退避重试）"""
+        kwargs = {"stream": True} if stream else {}
+        return self.retry_policy.call(
+            self.session.post, self.base_url, headers=request_headers, json=payload, timeout=30, **kwargs
+        )
+    
+    def _send_graphql(self, payload: Dict, request_headers: Dict, stream: bool = False) -> requests.Response:
+        """
+        发送GraphQL请求
+        
+        启用APQ时先只发送sha256Hash扩展；服务端返回PersistedQueryNotFound时
+        再携带完整查询文档重发一次（服务端会同时登记该哈希）。
+        stream=True时不预先读取响应体（调用方负责读完或关闭）；启用APQ时需要检查
+        哈希请求的响应体，这一次响应仍会被完整读入内存。
+        """
+        if not self.use_persisted_queries:
+            return self._post(payload, request_headers, stream)
+        
+        extensions = {
+            "persistedQuery": {
+                "version": 1,
+                "sha256Hash": self._get_query_hash(payload["query"])
+            }
+        }
+        hashed_payload = {key: value for key, value in payload.items() if key != "query"}
+        hashed_payload["extensions"] = extensions
+        
+        response = self._post(hashed_payload, request_headers, stream)
+        
+        # 只在响应体中做字节查找，避免为判断APQ结果而多解析一次JSON
+        body = response.content or b""
+        if b"PersistedQueryNotSupported" in body or b"PERSISTED_QUERY_NOT_SUPPORTED" in body:
+            logger.warning("⚠️ 服务端不支持持久化查询，关闭APQ模式")
+            self.use_persisted_queries = False
+        elif b"PersistedQueryNotFound" not in body and b"PERSISTED_QUERY_NOT_FOUND" not in body:
+            return response
+        else:
+            logger.debug("🔄 持久化查询未登记，携带完整查询重发: %s", payload.get('operationName'))
+        
+        response.close()
+        return self._post({**payload, "extensions": extensions} if self.use_persisted_queries else payload,
+                          request_headers, stream)
+    
     def extract_product_id(self, url: str) -> Optional[str]:
         """从PUMA商品URL中提取商品ID"""
         try:
-            # 多种URL格式的匹配模式
-            patterns = [
-                r'/pd/[^/]+/(\d+)',  # 标准格式: /pd/product-name/123456
-                r'product[_-]?id[=:](\d+)',  # 查询参数格式
-                r'/(\d{6})(?:[/?]|$)',  # 6位数字ID
-                r'/(\d{5,7})(?:[/?]|$)',  # 5-7位数字ID
-            ]
+            product_id = match_product_id(url)
+            if product_id:
+                logger.debug("✅ 从URL提取到商品ID: %s", product_id)
+                return product_id
             
-            for pattern in patterns:
-                match = re.search(pattern, url, re.IGNORECASE)
-                if match:
-                    product_id = match.group(1)
-                    print(f"✅ 从URL提取到商品ID: {product_id}")
-                    return product_id
-            
-            print(f"❌ 无法从URL提取商品ID: {url}")
+            logger.error("❌ 无法从URL提取商品ID: %s", url)
             return None
             
         except Exception as e:
-            print(f"❌ 提取商品ID时发生错误: {e}")
+            logger.error("❌ 提取商品ID时发生错误: %s", e)
             return None
     
     def extract_swatch_from_url(self, url: str) -> str:
@@ -681,54 +988,59 @@ fragment tokenPayload on TokenPayload {
             match = re.search(r'swatch=([^&]+)', url)
             if match:
                 swatch_code = match.group(1)
-                print(f"✅ 从URL提取到swatch参数: {swatch_code}")
+                logger.debug("✅ 从URL提取到swatch参数: %s", swatch_code)
                 return swatch_code
-            print(f"⚠️ URL中未找到swatch参数")
+            logger.debug("⚠️ URL中未找到swatch参数")
             return ""
         except Exception as e:
-            print(f"❌ 提取swatch参数时发生错误: {e}")
+            logger.error("❌ 提取swatch参数时发生错误: %s", e)
             return ""
     
-    def find_matching_variation(self, variations: list, swatch_code: str) -> dict:
-        """根据swatch代码找到匹配的变体"""
+    def find_matching_variation(self, variations: list, swatch_code: str,
+                                variation_index: Optional[VariationIndex] = None) -> dict:
+        """根据swatch代码找到匹配的变体（传入已建好的variation_index时不再重建索引）"""
         if not variations:
-            print(f"❌ 没有变体数据")
+            logger.error("❌ 没有变体数据")
             return {}
         
-        print(f"🔍 开始匹配变体: swatch='{swatch_code}' (类型: {type(swatch_code)})")
-        print(f"   变体总数: {len(variations)}")
+        logger.debug("🔍 开始匹配变体: swatch='%s'，变体总数: %s", swatch_code, len(variations))
         
         # 如果没有swatch代码，返回第一个变体
         if not swatch_code:
-            print(f"⚠️ 没有swatch参数，使用第一个变体")
+            logger.debug("⚠️ 没有swatch参数，使用第一个变体")
             return variations[0]
         
-        # 显示所有变体的colorValue供对比
-        print(f"   所有变体的colorValue:")
-        for i, var in enumerate(variations):
-            cv = var.get('colorValue', 'N/A')
-            print(f"     {i+1}. colorValue='{cv}' (类型: {type(cv)})")
-        
-        # 查找匹配的变体
-        print(f"   开始逐一匹配...")
-        for i, variation in enumerate(variations):
-            color_value = variation.get('colorValue', '')
-            print(f"     比较 #{i+1}: '{color_value}' == '{swatch_code}' ? {color_value == swatch_code}")
-            if color_value == swatch_code:
-                print(f"✅ 找到匹配的变体: 位置={i+1}, colorValue={color_value}")
-                print(f"   匹配的变体信息: variantId={variation.get('variantId', 'N/A')}, name={variation.get('name', 'N/A')[:50]}...")
-                return variation
+        if variation_index is None:
+            variation_index = VariationIndex(variations)
+        variation = variation_index.by_color.get(swatch_code)
+        if variation is not None:
+            # 参数本身需要计算（查位置、截断名称），关闭debug时不求值
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("✅ 找到匹配的变体: 位置=%s, colorValue=%s", variation_index.position_of(variation) + 1, swatch_code)
+                logger.debug("   匹配的变体信息: variantId=%s, name=%s...",
+                             variation.get('variantId', 'N/A'), (variation.get('name') or 'N/A')[:50])
+            return variation
         
         # 如果没找到匹配的，返回第一个变体并发出警告
-        print(f"⚠️ 未找到匹配swatch={swatch_code}的变体，使用第一个变体")
-        available_colors = [v.get('colorValue', 'N/A') for v in variations]
-        print(f"   可用的颜色代码: {available_colors}")
+        logger.warning("⚠️ 未找到匹配swatch=%s的变体，使用第一个变体", swatch_code)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("   可用的颜色代码: %s", list(variation_index.by_color))
         return variations[0]
     
-    def scrape_product(self, url: str) -> Optional[ProductInfo]:
-        """主要接口：爬取商品信息"""
+    def scrape_product(self, url: str, profile: str = "full") -> Optional[ProductInfo]:
+        """
+        主要接口：爬取商品信息
+        
+        profile为full以外的轻量档位时只发送一次对应的PDP查询，
+        不请求LazyPDP和页面导航信息。
+        
+        Raises:
+            ValueError: 未知的查询档位
+        """
+        if profile not in self.query_profiles:
+            raise ValueError(f"未知的查询档位: {profile}，可选: {', '.join(self.query_profiles)}")
         try:
-            print(f"🔍 开始爬取商品: {url}")
+            logger.debug("🔍 开始爬取商品: %s", url)
             
             # 提取商品ID
             product_id = self.extract_product_id(url)
@@ -736,228 +1048,549 @@ fragment tokenPayload on TokenPayload {
                 return None
             
             # 获取基本商品信息
-            product_info = self.get_product_info(product_id, url)
+            product_info = self.get_product_info(product_id, url, profile)
             if not product_info:
                 return None
             
+            if profile != "full":
+                product_info.url = url
+                product_info.scraped_at = datetime.now().isoformat()
+                return product_info
+            
             # 获取详细尺码信息
-            print(f"🔍 获取详细尺码信息...")
+            logger.debug("🔍 获取详细尺码信息...")
             detailed_size_data = self.get_detailed_size_info(product_id)
-            if detailed_size_data:
-                # 合并详细尺码信息到基本商品信息中
-                self._merge_detailed_size_info(product_info, detailed_size_data, url)
-                print(f"✅ 成功合并详细尺码信息")
-            else:
-                print(f"⚠️ 无法获取详细尺码信息，使用基本信息")
             
             # 获取导航信息
-            print(f"🔍 获取导航信息...")
-            breadcrumb_items, navigation_path = self._extract_breadcrumb_from_html(url)
-            if breadcrumb_items:
-                product_info.breadcrumb = breadcrumb_items
-                product_info.navigation_path = navigation_path
-                print(f"✅ 成功获取导航信息: {navigation_path}")
-            else:
-                print(f"⚠️ 无法获取导航信息")
+            logger.debug("🔍 获取导航信息...")
+            breadcrumb_result = self._resolve_breadcrumb(product_info, url)
             
-            product_info.url = url
-            product_info.scraped_at = datetime.now().isoformat()
-            print(f"✅ 成功爬取商品: {product_info.name}")
-            return product_info
+            return self._assemble_product(product_info, detailed_size_data, breadcrumb_result, url)
             
         except Exception as e:
-            print(f"❌ 爬取商品时发生错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ 爬取商品时发生错误: %s", e)
             return None
     
-    def get_detailed_size_info(self, product_id: str) -> Optional[Dict]:
-        """通过LazyPDP API获取详细的尺码信息和商品测量数据"""
+    def scrape_product_swatches(self, urls: List[str], all_swatches: bool = False,
+                                profile: str = "full") -> List[Tuple[str, Optional[ProductInfo]]]:
+        """
+        同一商品的多个颜色只请求一次：PDP、LazyPDP和导航信息各取一次，为每个swatch输出一条SKU级记录
+        
+        每条记录与对该URL单独调用scrape_product的结果相同（不匹配的swatch同样回退到第一个变体）。
+        PDP响应总是完整保留所有变体，不使用streaming_decode的单变体解码。
+        
+        Args:
+            urls: 同一商品的URL（商品ID以第一个URL为准，重复URL只输出一次）
+            all_swatches: 为True时还为PDP中输入没有覆盖到的每个颜色各输出一条记录，URL替换为对应的swatch
+            profile: 查询档位，self.query_profiles的键
+        
+        Returns:
+            [(URL, 商品信息)]，按输入顺序，all_swatches补充的颜色排在最后；获取失败时商品信息为None
+        
+        Raises:
+            ValueError: 未知的查询档位
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return []
+        # 档位错误是调用方的问题，直接抛出，不按爬取失败处理
+        if profile not in self.query_profiles:
+            raise ValueError(f"未知的查询档位: {profile}，可选: {', '.join(self.query_profiles)}")
+        operation_name, query, parser = self.query_profiles[profile]
         try:
-            print(f"🔍 正在获取详细尺码信息，ID: {product_id}")
-            
-            # 准备请求头
-            request_headers = {**self.headers, **self.auth_headers}
-            request_headers["referer"] = f"https://us.puma.com/us/en/pd/product/{product_id}"
-            request_headers["x-operation-name"] = "LazyPDP"
+            logger.debug("🔍 开始爬取商品的%s个颜色: %s", len(urls), urls[0])
+            product_id = self.extract_product_id(urls[0])
+            if not product_id:
+                return [(url, None) for url in urls]
+            
+            product_data = self._fetch_product_payload(operation_name, query, product_id)
+            if not product_data:
+                return [(url, None) for url in urls]
+            logger.info("✅ 成功获取商品数据: %s", product_data.get('name', 'Unknown'))
+            
+            if all_swatches:
+                # 没有swatch的URL对应第一个变体，该颜色不再重复输出
+                variation_index = VariationIndex(product_data.get('variations') or [])
+                covered = {self.extract_swatch_from_url(url) or variation_index.find_by_swatch('').get('colorValue')
+                           for url in urls}
+                urls += [url_with_swatch(urls[0], swatch) for swatch in variation_index.by_color
+                         if swatch not in covered]
+            
+            detailed_size_data = None
+            breadcrumb_result = ([], "")
+            results = []
+            for url in urls:
+                product_info = parser(product_data, url)
+                if profile != "full":
+                    product_info.url = url
+                    product_info.scraped_at = datetime.now().isoformat()
+                else:
+                    if not results:
+                        # 同一商品的尺码测量和分类导航与颜色无关，只取一次
+                        detailed_size_data = self.get_detailed_size_info(product_id)
+                        breadcrumb_result = self._resolve_breadcrumb(product_info, url)
+                    product_info = self._assemble_product(product_info, detailed_size_data, breadcrumb_result, url)
+                results.append((url, product_info))
+            logger.info("✅ 商品 %s 共输出%s个颜色", product_id, len(results))
+            return results
             
-            # 准备GraphQL请求数据
+        except Exception as e:
+            logger.exception("❌ 爬取商品颜色时发生错误: %s", e)
+            return [(url, None) for url in urls]
+    
+    def _assemble_product(self, product_info: ProductInfo, detailed_size_data: Optional[Dict],
+                          breadcrumb_result: tuple, url: str) -> ProductInfo:
+        """将PDP、LazyPDP和面包屑导航三部分结果合并为最终的ProductInfo"""
+        if detailed_size_data:
+            # 合并详细尺码信息到基本商品信息中
+            self._merge_detailed_size_info(product_info, detailed_size_data, url)
+            logger.info("✅ 成功合并详细尺码信息")
+        else:
+            logger.warning("⚠️ 无法获取详细尺码信息，使用基本信息")
+        
+        breadcrumb_items, navigation_path = breadcrumb_result or ([], "")
+        if breadcrumb_items:
+            product_info.breadcrumb = breadcrumb_items
+            product_info.navigation_path = navigation_path
+            logger.info("✅ 成功获取导航信息: %s", navigation_path)
+        else:
+            logger.warning("⚠️ 无法获取导航信息")
+        
+        product_info.url = url
+        product_info.scraped_at = datetime.now().isoformat()
+        logger.info("✅ 成功爬取商品: %s", product_info.name)
+        return product_info
+    
+    def get_category_tree(self) -> Optional[CategoryTree]:
+        """
+        获取分类树（内存中缓存CATEGORY_TREE_TTL秒，配置了响应缓存时也写入响应缓存）
+        
+        多个线程同时需要加载时只请求一次；加载失败后CATEGORY_TREE_RETRY_INTERVAL秒内
+        不再重试，返回None（或过期的旧树）。
+        """
+        if self._category_tree is not None and time.time() - self._category_tree_loaded_at < CATEGORY_TREE_TTL:
+            return self._category_tree
+        
+        with self._category_tree_lock:
+            now = time.time()
+            if self._category_tree is not None and now - self._category_tree_loaded_at < CATEGORY_TREE_TTL:
+                return self._category_tree
+            if now - self._category_tree_failed_at < CATEGORY_TREE_RETRY_INTERVAL:
+                return self._category_tree
+            
+            categories = self._fetch_categories()
+            if categories:
+                self._category_tree = CategoryTree.from_graphql(categories)
+                self._category_tree_loaded_at = time.time()
+                logger.info("✅ 分类树加载完成: %s 个分类", len(self._category_tree))
+            else:
+                self._category_tree_failed_at = time.time()
+                logger.warning("⚠️ 无法加载分类树，面包屑将回退到页面HTML")
+            return self._category_tree
+    
+    def _fetch_categories(self) -> Optional[List[Dict]]:
+        """发送分类树查询，返回顶级分类列表（启用缓存时先查缓存）"""
+        locale = self.headers.get("locale", "")
+        if self.cache is not None:
+            cached_data = self.cache.get("CategoryTree", "all", locale)
+            if cached_data is not None:
+                logger.info("⚡ 命中CategoryTree缓存")
+                return cached_data
+        
+        try:
             payload = {
-                "operationName": "LazyPDP",
-                "query": self.lazy_pdp_query,
-                "variables": {"id": product_id}
+                "operationName": "CategoryTree",
+                "query": self.category_tree_query,
+                "variables": {}
             }
+            data = self.graphql_request("CategoryTree", payload)
+            if data is None:
+                return None
+            if data.get('errors'):
+                logger.error("❌ CategoryTree GraphQL错误: %s", data['errors'])
+                return None
             
-            print(f"📡 发送LazyPDP请求...")
-            response = self.session.post(
-                self.base_url,
-                headers=request_headers,
-                json=payload,
-                timeout=30
-            )
+            categories = (data.get('data') or {}).get('categories')
+            if not categories:
+                logger.error("❌ 响应数据中没有分类信息")
+                return None
             
-            print(f"📈 LazyPDP响应状态码: {response.status_code}")
+            if self.cache is not None:
+                self.cache.set("CategoryTree", "all", locale, categories)
+            return categories
             
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    print(f"✅ 成功获取LazyPDP JSON响应")
-                    
-                    if 'errors' in data:
-                        errors = data['errors']
-                        print(f"❌ LazyPDP GraphQL错误: {errors}")
-                        
-                        # 检查是否是认证错误
-                        for error in errors:
-                            if error.get('extensions', {}).get('code') == 'UNAUTHENTICATED':
-                                print(f"⚠️ 认证失败，尝试获取新token...")
-                                if self.get_fresh_token():
-                                    print(f"🔄 获取新token成功，重试请求...")
-                                    # 重新准备请求头
-                                    request_headers = {**self.headers, **self.auth_headers}
-                                    request_headers["referer"] = f"https://us.puma.com/us/en/pd/product/{product_id}"
-                                    request_headers["x-operation-name"] = "LazyPDP"
-                                    
-                                    # 重试请求
-                                    retry_response = self.session.post(
-                                        self.base_url,
-                                        headers=request_headers,
-                                        json=payload,
-                                        timeout=30
-                                    )
-                                    
-                                    if retry_response.status_code == 200:
-                                        retry_data = retry_response.json()
-                                        if 'data' in retry_data and 'product' in retry_data['data'] and retry_data['data']['product']:
-                                            product_data = retry_data['data']['product']
-                                            print(f"✅ 重试成功！获取到详细尺码数据")
-                                            return product_data
-                                        elif 'errors' in retry_data:
-                                            print(f"❌ 重试后仍有错误: {retry_data['errors']}")
-                                    else:
-                                        print(f"❌ 重试请求失败: {retry_response.status_code}")
-                                else:
-                                    print(f"❌ 无法获取新token")
-                                break
-                        return None
-                    
-                    if 'data' in data and 'product' in data['data'] and data['data']['product']:
-                        product_data = data['data']['product']
-                        print(f"✅ 成功获取详细尺码数据")
-                        return product_data
-                    else:
-                        print(f"❌ 响应数据中没有商品信息")
-                        return None
-                        
-                except json.JSONDecodeError as e:
-                    print(f"❌ LazyPDP JSON解析错误: {e}")
-                    print(f"响应内容: {response.text[:500]}...")
-                    return None
-            else:
-                print(f"❌ LazyPDP HTTP请求失败: {response.status_code}")
-                print(f"响应内容: {response.text[:500]}...")
-                return None
-                
         except Exception as e:
-            print(f"❌ 获取详细尺码信息时发生错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("❌ 获取分类树时发生错误: %s", e)
             return None
     
-    def get_product_info(self, product_id: str, url: str = "") -> Optional[ProductInfo]:
-        try:
-            print(f"🔍 正在获取商品信息，ID: {product_id}")
-            
-            # 准备请求头
-            request_headers = {**self.headers, **self.auth_headers}
-            request_headers["referer"] = f"https://us.puma.com/us/en/pd/product/{product_id}"
+    def _resolve_breadcrumb(self, product_info: ProductInfo, url: str) -> tuple:
+        """优先用分类树和primaryCategoryId构建面包屑，无法构建时才下载页面HTML"""
+        if self.use_category_tree and product_info.primary_category_id:
+            category_tree = self.get_category_tree()
+            if category_tree is not None:
+                breadcrumb_result = category_tree.build_breadcrumb(
+                    product_info.primary_category_id, product_info.name, url
+                )
+                if breadcrumb_result[0]:
+                    logger.debug("🌲 由分类树构建导航: %s", breadcrumb_result[1])
+                    return breadcrumb_result
+                logger.debug("🌲 分类树中没有分类 %s，回退到页面HTML", product_info.primary_category_id)
+        return self._extract_breadcrumb_from_html(url)
+    
+    def _build_request_headers(self, operation_name: str, referer: str) -> Dict[str, str]:
+        """构建GraphQL请求头，认证信息由token管理器提供（即将过期时会先刷新）"""
+        request_headers = {**self.headers, **self.token_manager.get_headers()}
+        request_headers["referer"] = referer
+        request_headers["x-operation-name"] = operation_name
+        return request_headers
+    
+    def _recover_from_unauthenticated(self, token_generation: int) -> bool:
+        """收到UNAUTHENTICATED后刷新token（并发请求同时失败时只刷新一次），返回是否可以重试"""
+        logger.warning("⚠️ 认证失败，尝试获取新token...")
+        if self.token_manager.invalidate(token_generation):
+            logger.debug("🔄 获取新token成功，重试请求...")
+            return True
+        logger.error("❌ 无法获取新token")
+        return False
+    
+    def graphql_request(self, operation_name: str, payload: Dict, referer: str = SITE_HOME_URL,
+                        decode: Optional[Callable[[requests.Response], Dict]] = None) -> Optional[Dict]:
+        """
+        发送GraphQL请求，返回解析后的响应JSON（含data和errors），HTTP错误或响应无法解析时返回None
+        
+        errors中有UNAUTHENTICATED时刷新token（并发请求同时失败时只刷新一次）后重试一次；
+        其他GraphQL错误原样返回，由调用方决定如何处理（批量查询个别别名出错时其余数据仍然可用）。
+        
+        Args:
+            operation_name: 操作名（用于x-operation-name请求头和日志）
+            payload: 请求体（operationName、query、variables）
+            referer: referer请求头
+            decode: 自定义的响应解码函数，给定时以stream=True发送请求；默认response.json()
+        """
+        for attempt in range(2):
+            token_generation = self.token_manager.generation
+            request_headers = self._build_request_headers(operation_name, referer)
             
-            # 准备GraphQL请求数据
-            payload = {
-                "operationName": "PDP",
-                "query": self.pdp_query,
-                "variables": {"id": product_id}
-            }
+            logger.debug("📡 发送%s请求...", operation_name)
+            response = self._send_graphql(payload, request_headers, stream=decode is not None)
+            logger.debug("📊 %s响应状态码: %s", operation_name, response.status_code)
             
-            print(f"📡 发送GraphQL请求...")
-            response = self.session.post(
-                self.base_url,
-                headers=request_headers,
-                json=payload,
-                timeout=30
-            )
+            if response.status_code != 200:
+                logger.error("❌ %s HTTP请求失败: %s", operation_name, response.status_code)
+                logger.debug("响应内容: %s...", response.text[:500])
+                return None
             
-            print(f"📊 响应状态码: {response.status_code}")
+            try:
+                data = decode(response) if decode is not None else response.json()
+            except ValueError as e:
+                logger.error("❌ %s JSON解析错误: %s", operation_name, e)
+                if decode is None:
+                    logger.debug("响应内容: %s...", response.text[:500])
+                return None
+            finally:
+                # 流式读取中途出错时连接不能放回连接池；读完时close只是释放连接
+                response.close()
             
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    print(f"✅ 成功获取JSON响应")
-                    
-                    if 'errors' in data:
-                        errors = data['errors']
-                        print(f"❌ GraphQL错误: {errors}")
-                        
-                        # 检查是否是认证错误
-                        for error in errors:
-                            if error.get('extensions', {}).get('code') == 'UNAUTHENTICATED':
-                                print("⚠️ 认证失败，尝试获取新token...")
-                                if self.get_fresh_token():
-                                    print("🔄 获取新token成功，重试请求...")
-                                    # 重新准备请求头
-                                    request_headers = {**self.headers, **self.auth_headers}
-                                    request_headers["referer"] = f"https://us.puma.com/us/en/pd/product/{product_id}"
-                                    
-                                    # 重试请求
-                                    retry_response = self.session.post(
-                                        self.base_url,
-                                        headers=request_headers,
-                                        json=payload,
-                                        timeout=30
-                                    )
-                                    
-                                    if retry_response.status_code == 200:
-                                        retry_data = retry_response.json()
-                                        if 'data' in retry_data and 'product' in retry_data['data'] and retry_data['data']['product']:
-                                            product_data = retry_data['data']['product']
-                                            print(f"✅ 重试成功！获取到商品数据: {product_data.get('name', 'Unknown')}")
-                                            return self._parse_product_data(product_data, url)
-                                        elif 'errors' in retry_data:
-                                            print(f"❌ 重试后仍有错误: {retry_data['errors']}")
-                                    else:
-                                        print(f"❌ 重试请求失败: {retry_response.status_code}")
-                                else:
-                                    print("❌ 无法获取新token")
-                                break
-                        return None
-                    
-                    if 'data' in data and 'product' in data['data'] and data['data']['product']:
-                        product_data = data['data']['product']
-                        print(f"✅ 成功获取商品数据: {product_data.get('name', 'Unknown')}")
-                        return self._parse_product_data(product_data, url)
-                    else:
-                        print(f"❌ 响应数据中没有商品信息")
-                        return None
-                        
-                except json.JSONDecodeError as e:
-                    print(f"❌ JSON解析错误: {e}")
-                    print(f"响应内容: {response.text[:500]}...")
-                    return None
-            else:
-                print(f"❌ HTTP请求失败: {response.status_code}")
-                print(f"响应内容: {response.text[:500]}...")
+            unauthenticated = any(
+                error.get('extensions', {}).get('code') == 'UNAUTHENTICATED' for error in data.get('errors') or []
+            )
+            if unauthenticated and attempt == 0 and self._recover_from_unauthenticated(token_generation):
+                continue
+            return data
+        return None
+    
+    def _fetch_product_payload(self, operation_name: str, query: str, product_id: str,
+                               swatch_code: Optional[str] = None) -> Optional[Dict]:
+        """
+        发送单商品GraphQL查询，返回原始的data.product数据（启用缓存时先查缓存）
+        
+        swatch_code不为None时以stream=True发送请求，边读响应体边增量解码，只完整保留与之匹配的变体。
+        此时结果与swatch相关，缓存键中也带上swatch。
+        """
+        locale = self.headers.get("locale", "")
+        cache_id = product_id
+        if swatch_code is not None and not self.keep_full_variations:
+            cache_id = f"{product_id}:{swatch_code}"
+        if self.cache is not None:
+            cached_data = self.cache.get(operation_name, cache_id, locale)
+            if cached_data is not None:
+                logger.info("⚡ 命中%s缓存: %s", operation_name, product_id)
+                return cached_data
+        
+        # 准备GraphQL请求数据
+        payload = {
+            "operationName": operation_name,
+            "query": query,
+            "variables": {"id": product_id}
+        }
+        
+        decode = None
+        if swatch_code is not None:
+            decode = lambda response: decode_product_response(
+                response.iter_content(chunk_size=STREAM_CHUNK_SIZE), swatch_code, self.keep_full_variations)
+        
+        data = self.graphql_request(operation_name, payload, f"{SITE_HOME_URL}/pd/product/{product_id}", decode)
+        if data is None:
+            return None
+        if 'errors' in data:
+            logger.error("❌ %s GraphQL错误: %s", operation_name, data['errors'])
+            return None
+        
+        product_data = (data.get('data') or {}).get('product')
+        if not product_data:
+            logger.error("❌ 响应数据中没有商品信息")
+            return None
+        
+        if self.cache is not None:
+            self.cache.set(operation_name, cache_id, locale, product_data)
+        return product_data
+    
+    def get_detailed_size_info(self, product_id: str) -> Optional[Dict]:
+        """通过LazyPDP API获取详细的尺码信息和商品测量数据"""
+        try:
+            logger.debug("🔍 正在获取详细尺码信息，ID: %s", product_id)
+            product_data = self._fetch_product_payload("LazyPDP", self.lazy_pdp_query, product_id)
+            if product_data:
+                logger.info("✅ 成功获取详细尺码数据")
+            return product_data
+                
+        except Exception as e:
+            logger.exception("❌ 获取详细尺码信息时发生错误: %s", e)
+            return None
+    
+    def get_product_info(self, product_id: str, url: str = "", profile: str = "full") -> Optional[ProductInfo]:
+        """
+        通过PDP API获取商品信息
+        
+        Args:
+            product_id: 商品ID
+            url: 商品URL（用于按swatch参数选择变体）
+            profile: 查询档位，self.query_profiles的键（full/pricing/inventory/media）
+        
+        Raises:
+            ValueError: 未知的查询档位
+        """
+        # 档位错误是调用方的问题，直接抛出，不按爬取失败处理
+        if profile not in self.query_profiles:
+            raise ValueError(f"未知的查询档位: {profile}，可选: {', '.join(self.query_profiles)}")
+        operation_name, query, parser = self.query_profiles[profile]
+        try:
+            logger.debug("🔍 正在获取商品信息，ID: %s，档位: %s", product_id, profile)
+            swatch_code = None
+            if self.streaming_decode and profile == "full":
+                swatch_code = self.extract_swatch_from_url(url) if url else ""
+            product_data = self._fetch_product_payload(operation_name, query, product_id, swatch_code)
+            if not product_data:
                 return None
+            
+            logger.info("✅ 成功获取商品数据: %s", product_data.get('name', 'Unknown'))
+            return parser(product_data, url)
                 
         except Exception as e:
-            print(f"❌ 获取商品信息时发生错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ 获取商品信息时发生错误: %s", e)
             return None
     
+    def _build_batch_pdp_query(self, count: int) -> str:
+        """构建批量PDP查询：每个商品一个别名字段（p0, p1, ...），共用同一个字段片段"""
+        variable_defs = ", ".join(f"$id{i}: ID!" for i in range(count))
+        aliased_fields = "\n".join(
+            f"          p{i}: product(id: $id{i}) {{ ...pdpProductFields }}" for i in range(count)
+        )
+        return (
+            f"\n        query PDPBatch({variable_defs}) {{\n{aliased_fields}\n        }}\n"
+            f"        fragment pdpProductFields on Product {{{self.pdp_product_fields}        }}\n        "
+        )
+    
+    def _post_batch_pdp(self, product_ids: List[str]) -> Optional[Dict]:
+        """发送一个批量PDP请求，返回完整的响应JSON（个别别名的错误在errors中）"""
+        payload = {
+            "operationName": "PDPBatch",
+            "query": self._build_batch_pdp_query(len(product_ids)),
+            "variables": {f"id{i}": product_id for i, product_id in enumerate(product_ids)}
+        }
+        
+        logger.debug("📡 发送批量PDP请求: %s 个商品", len(product_ids))
+        return self.graphql_request("PDPBatch", payload, f"{SITE_HOME_URL}/pd/product/{product_ids[0]}")
+    
+    def get_products_info(self, product_ids: List[str], chunk_size: int = 20,
+                          urls: Optional[Dict[str, str]] = None) -> Dict[str, Optional[ProductInfo]]:
+        """
+        批量获取商品信息：每chunk_size个商品合并为一个带别名的GraphQL请求
+        
+        Args:
+            product_ids: 商品ID列表（重复ID只请求一次）
+            chunk_size: 每个请求包含的商品数量
+            urls: 可选的 商品ID -> 商品URL 映射，用于按swatch参数选择变体
+        
+        Returns:
+            Dict[str, Optional[ProductInfo]]: 按输入顺序的 商品ID -> 商品信息，失败的商品为None
+        """
+        urls = urls or {}
+        unique_ids = list(dict.fromkeys(str(product_id) for product_id in product_ids))
+        results: Dict[str, Optional[ProductInfo]] = {product_id: None for product_id in unique_ids}
+        chunk_size = max(1, chunk_size)
+        
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            try:
+                data = self._post_batch_pdp(chunk)
+            except Exception as e:
+                logger.error("❌ 批量获取商品信息时发生错误: %s", e)
+                continue
+            if not data:
+                continue
+            
+            # 按别名归类错误（错误的path第一项是别名），没有path的错误影响整个请求
+            alias_errors: Dict[str, List[Dict]] = {}
+            for error in data.get('errors') or []:
+                path = error.get('path') or []
+                alias = str(path[0]) if path else ''
+                alias_errors.setdefault(alias, []).append(error)
+            if '' in alias_errors:
+                logger.warning("⚠️ 批量PDP请求级错误: %s", alias_errors[''])
+            
+            products = data.get('data') or {}
+            for i, product_id in enumerate(chunk):
+                alias = f"p{i}"
+                product_data = products.get(alias)
+                if alias in alias_errors:
+                    logger.error("❌ 商品 %s 查询错误: %s", product_id, alias_errors[alias])
+                if not product_data:
+                    logger.error("❌ 批量响应中没有商品 %s 的数据", product_id)
+                    continue
+                results[product_id] = self._parse_product_data(product_data, urls.get(product_id, ""))
+        
+        succeeded = sum(1 for product_info in results.values() if product_info)
+        logger.info("✅ 批量获取完成: 成功 %s/%s 个商品", succeeded, len(unique_ids))
+        return results
+    
+    def _apply_variant_identity(self, product_info: ProductInfo, variant: Dict) -> None:
+        """设置选中变体的标识和颜色信息"""
+        product_info.variant_id = variant.get('variantId', '')
+        product_info.sku = variant.get('id', '')
+        product_info.style_number = variant.get('styleNumber', '')
+        product_info.ean = variant.get('ean', '')
+        
+        product_info.color_name = variant.get('colorName', '')
+        product_info.color_value = variant.get('colorValue', '')
+        product_info.color = variant.get('colorName', '')
+        product_info.color_code = variant.get('colorValue', '')
+    
+    def _apply_variant_pricing(self, product_info: ProductInfo, variant: Dict) -> None:
+        """设置选中变体的价格信息并计算折扣"""
+        product_info.price = float(variant.get('price', 0))
+        product_info.sale_price = float(variant.get('salePrice', 0))
+        
+        # 处理产品价格对象
+        product_price = variant.get('productPrice', {})
+        if product_price:
+            product_info.original_price = float(product_price.get('price', 0))
+            product_info.sale_price = float(product_price.get('salePrice', 0))
+            product_info.promotion_price = product_price.get('promotionPrice')
+            product_info.best_price = product_price.get('bestPrice')
+            product_info.tax = float(product_price.get('tax', 0))
+            product_info.tax_rate = float(product_price.get('taxRate', 0))
+        
+        # 计算折扣
+        if product_info.original_price > 0 and product_info.sale_price > 0:
+            product_info.discount = ((product_info.original_price - product_info.sale_price) / product_info.original_price) * 100
+    
+    def _apply_size_groups(self, product_info: ProductInfo, size_groups: List[Dict]) -> None:
+        """根据尺码组设置全部/可用/不可用尺码"""
+        if not size_groups:
+            return
+        product_info.size_groups = size_groups
+        
+        # 提取所有尺码信息
+        all_sizes = []
+        available_sizes = []
+        unavailable_sizes = []
+        
+        for size_group in size_groups:
+            sizes = size_group.get('sizes', [])
+            for size in sizes:
+                size_label = size.get('label', '')
+                if size_label:
+                    all_sizes.append(size_label)
+                    if size.get('orderable', False):
+                        available_sizes.append(size_label)
+                    else:
+                        unavailable_sizes.append(size_label)
+        
+        # 更新尺码信息
+        if all_sizes:
+            product_info.sizes = all_sizes
+            product_info.available_sizes = available_sizes
+            product_info.unavailable_sizes = unavailable_sizes
+            logger.debug("✅ 更新尺码信息: 总共%s个, 可用%s个, 不可用%s个", len(all_sizes), len(available_sizes), len(unavailable_sizes))
+    
+    def _new_profile_product_info(self, product_data: Dict, profile: str) -> ProductInfo:
+        """轻量查询档位的公共部分：商品级标识字段"""
+        product_info = ProductInfo()
+        product_info.name = product_data.get('name', '')
+        product_info.product_id = str(product_data.get('id', ''))
+        product_info.orderable = product_data.get('orderable', True)
+        product_info.method = f"new_graphql:{profile}"
+        return product_info
+    
+    def _select_profile_variation(self, product_data: Dict, url: str) -> Dict:
+        """按URL中的swatch参数选择变体"""
+        swatch_code = self.extract_swatch_from_url(url) if url else ""
+        return self.find_matching_variation(product_data.get('variations') or [], swatch_code)
+    
+    def _parse_pricing_data(self, product_data: Dict, url: str = "") -> ProductInfo:
+        """pricing档位：只解析价格和可售状态"""
+        product_info = self._new_profile_product_info(product_data, "pricing")
+        variant = self._select_profile_variation(product_data, url)
+        if variant:
+            self._apply_variant_identity(product_info, variant)
+            self._apply_variant_pricing(product_info, variant)
+            product_info.orderable = variant.get('orderable', product_info.orderable)
+        return product_info
+    
+    def _parse_inventory_data(self, product_data: Dict, url: str = "") -> ProductInfo:
+        """inventory档位：只解析可售状态和尺码库存"""
+        product_info = self._new_profile_product_info(product_data, "inventory")
+        variant = self._select_profile_variation(product_data, url)
+        if variant:
+            self._apply_variant_identity(product_info, variant)
+            product_info.orderable = variant.get('orderable', product_info.orderable)
+            self._apply_size_groups(product_info, variant.get('sizeGroups') or [])
+        product_info.stock_status = "available" if product_info.available_sizes or product_info.orderable else "unavailable"
+        return product_info
+    
+    def _parse_media_data(self, product_data: Dict, url: str = "") -> ProductInfo:
+        """media档位：只解析图片"""
+        product_info = self._new_profile_product_info(product_data, "media")
+        
+        main_image = product_data.get('image') or {}
+        if main_image.get('href'):
+            product_info.preview_image = main_image['href']
+            product_info.main_images.append(main_image['href'])
+            product_info.images.append(main_image['href'])
+        if main_image.get('verticalImageHref'):
+            product_info.vertical_images.append(main_image['verticalImageHref'])
+        
+        variant = self._select_profile_variation(product_data, url)
+        if variant:
+            self._apply_variant_identity(product_info, variant)
+            seen_images = set(product_info.images)
+            for href in [img.get('href') for img in variant.get('images') or []] + [variant.get('preview')]:
+                if href and href not in seen_images:
+                    seen_images.add(href)
+                    product_info.sku_images.append(href)
+                    product_info.images.append(href)
+            product_info.vertical_images.extend(
+                img['verticalImageHref'] for img in variant.get('images') or [] if img.get('verticalImageHref')
+            )
+            if not product_info.preview_image and variant.get('preview'):
+                product_info.preview_image = variant['preview']
+        return product_info
+    
     def _parse_product_data(self, product_data: Dict, url: str = "") -> ProductInfo:
         """解析GraphQL响应数据为ProductInfo对象"""
         try:
-            print(f"📋 开始解析商品数据...")
+            logger.debug("📋 开始解析商品数据...")
             
             product_info = ProductInfo()
             
@@ -988,16 +1621,25 @@ fragment tokenPayload on TokenPayload {
                 if main_image.get('verticalImageHref'):
                     product_info.vertical_images.append(main_image['verticalImageHref'])
             
+            # 各图片列表已有的图片集合，去重时不再线性扫描列表
+            seen_main_images = set(product_info.main_images)
+            seen_sku_images = set(product_info.sku_images)
+            seen_images = set(product_info.images)
+            seen_vertical_images = set(product_info.vertical_images)
+            
             # 处理产品级别的颜色图片
             colors = product_data.get('colors', [])
             for color in colors:
                 color_image = color.get('image', {})
                 if color_image and color_image.get('href'):
-                    if color_image['href'] not in product_info.main_images:
+                    if color_image['href'] not in seen_main_images:
+                        seen_main_images.add(color_image['href'])
                         product_info.main_images.append(color_image['href'])
+                        seen_images.add(color_image['href'])
                         product_info.images.append(color_image['href'])  # 向后兼容
                     if color_image.get('verticalImageHref'):
-                        if color_image['verticalImageHref'] not in product_info.vertical_images:
+                        if color_image['verticalImageHref'] not in seen_vertical_images:
+                            seen_vertical_images.add(color_image['verticalImageHref'])
                             product_info.vertical_images.append(color_image['verticalImageHref'])
             
             # 处理颜色信息（从产品级别获取）
@@ -1050,50 +1692,25 @@ fragment tokenPayload on TokenPayload {
                 
                 product_info.all_variations = all_variations_info
                 
-                # 根据swatch参数选择对应的变体
-                first_variant = self.find_matching_variation(variations, swatch_code)
+                # 根据swatch参数选择对应的变体（整个响应只建一次索引）
+                variation_index = VariationIndex(variations)
+                first_variant = self.find_matching_variation(variations, swatch_code, variation_index)
                 
-                # 设置当前选中的变体信息
-                for var_info in all_variations_info:
-                    if var_info['variantId'] == first_variant.get('variantId', '') or \
-                       var_info['id'] == first_variant.get('id', ''):
-                        product_info.current_variation = var_info
-                        break
+                # 设置当前选中的变体信息（all_variations_info与variations一一对应）
+                position = variation_index.position_of(first_variant)
+                if position >= 0:
+                    product_info.current_variation = all_variations_info[position]
                 
-                print(f"🎨 选择的变体信息:")
-                print(f"   变体ID: {first_variant.get('variantId', 'N/A')}")
-                print(f"   颜色名称: {first_variant.get('colorName', 'N/A')}")
-                print(f"   颜色代码: {first_variant.get('colorValue', 'N/A')}")
+                logger.debug("🎨 选择的变体信息:")
+                logger.debug("   变体ID: %s", first_variant.get('variantId', 'N/A'))
+                logger.debug("   颜色名称: %s", first_variant.get('colorName', 'N/A'))
+                logger.debug("   颜色代码: %s", first_variant.get('colorValue', 'N/A'))
                 
-                # 更新基本信息
-                product_info.variant_id = first_variant.get('variantId', '')
-                product_info.sku = first_variant.get('id', '')
-                product_info.style_number = first_variant.get('styleNumber', '')
-                product_info.ean = first_variant.get('ean', '')
+                # 更新基本信息和颜色信息（从变体获取，覆盖之前的设置以确保准确性）
+                self._apply_variant_identity(product_info, first_variant)
                 
                 # 价格信息
-                product_info.price = float(first_variant.get('price', 0))
-                product_info.sale_price = float(first_variant.get('salePrice', 0))
-                
-                # 处理产品价格对象
-                product_price = first_variant.get('productPrice', {})
-                if product_price:
-                    product_info.original_price = float(product_price.get('price', 0))
-                    product_info.sale_price = float(product_price.get('salePrice', 0))
-                    product_info.promotion_price = product_price.get('promotionPrice')
-                    product_info.best_price = product_price.get('bestPrice')
-                    product_info.tax = float(product_price.get('tax', 0))
-                    product_info.tax_rate = float(product_price.get('taxRate', 0))
-                
-                # 计算折扣
-                if product_info.original_price > 0 and product_info.sale_price > 0:
-                    product_info.discount = ((product_info.original_price - product_info.sale_price) / product_info.original_price) * 100
-                
-                # 颜色信息（从变体获取，覆盖之前的设置以确保准确性）
-                product_info.color_name = first_variant.get('colorName', '')
-                product_info.color_value = first_variant.get('colorValue', '')
-                product_info.color = first_variant.get('colorName', '')
-                product_info.color_code = first_variant.get('colorValue', '')
+                self._apply_variant_pricing(product_info, first_variant)
                 
                 # 状态信息
                 product_info.orderable = first_variant.get('orderable', True)
@@ -1129,14 +1746,17 @@ fragment tokenPayload on TokenPayload {
                 for img in variant_images:
                     if img.get('href'):
                         # 添加到SKU图片列表
-                        if img['href'] not in product_info.sku_images:
+                        if img['href'] not in seen_sku_images:
+                            seen_sku_images.add(img['href'])
                             product_info.sku_images.append(img['href'])
                         # 也添加到综合图片列表（向后兼容）
-                        if img['href'] not in product_info.images:
+                        if img['href'] not in seen_images:
+                            seen_images.add(img['href'])
                             product_info.images.append(img['href'])
                     
                     if img.get('verticalImageHref'):
-                        if img['verticalImageHref'] not in product_info.vertical_images:
+                        if img['verticalImageHref'] not in seen_vertical_images:
+                            seen_vertical_images.add(img['verticalImageHref'])
                             product_info.vertical_images.append(img['verticalImageHref'])
                 
                 # 处理SKU预览图片
@@ -1144,28 +1764,28 @@ fragment tokenPayload on TokenPayload {
                     if not product_info.preview_image:  # 优先使用主产品预览图
                         product_info.preview_image = first_variant['preview']
                     # 添加到SKU图片列表
-                    if first_variant['preview'] not in product_info.sku_images:
+                    if first_variant['preview'] not in seen_sku_images:
+                        seen_sku_images.add(first_variant['preview'])
                         product_info.sku_images.append(first_variant['preview'])
                     # 也添加到综合图片列表（向后兼容）
-                    if first_variant['preview'] not in product_info.images:
+                    if first_variant['preview'] not in seen_images:
+                        seen_images.add(first_variant['preview'])
                         product_info.images.append(first_variant['preview'])
             
             product_info.availability = "有库存"
             product_info.stock_status = "available"
             
-            print(f"✅ 商品数据解析完成: {product_info.name}")
+            logger.info("✅ 商品数据解析完成: %s", product_info.name)
             return product_info
             
         except Exception as e:
-            print(f"❌ 解析商品数据时发生错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ 解析商品数据时发生错误: %s", e)
             return None
     
     def _merge_detailed_size_info(self, product_info: ProductInfo, detailed_data: Dict, url: str = "") -> None:
         """合并详细尺码信息到ProductInfo对象中"""
         try:
-            print(f"🔄 开始合并详细尺码信息...")
+            logger.debug("🔄 开始合并详细尺码信息...")
             
             # 处理商品测量表
             product_measurements = detailed_data.get('productMeasurements')
@@ -1175,12 +1795,12 @@ fragment tokenPayload on TokenPayload {
                 # 公制测量数据
                 if product_measurements.get('metric'):
                     product_info.metric_measurements = product_measurements['metric']
-                    print(f"✅ 获取到公制测量数据: {len(product_measurements['metric'])} 行")
+                    logger.debug("✅ 获取到公制测量数据: %s 行", len(product_measurements['metric']))
                 
                 # 英制测量数据
                 if product_measurements.get('imperial'):
                     product_info.imperial_measurements = product_measurements['imperial']
-                    print(f"✅ 获取到英制测量数据: {len(product_measurements['imperial'])} 行")
+                    logger.debug("✅ 获取到英制测量数据: %s 行", len(product_measurements['imperial']))
             
             # 处理变体详细信息
             variations = detailed_data.get('variations', [])
@@ -1188,83 +1808,31 @@ fragment tokenPayload on TokenPayload {
                 # ⚠️ 注意：LazyPDP API的variations数据结构与主PDP不同，colorValue可能为空
                 # 因此我们不重新选择变体，而是找到与当前product_info匹配的变体
                 
-                # 调试：显示所有详细变体的ID信息
-                print(f"🔍 详细变体数据结构分析:")
-                for i, var in enumerate(variations[:5]):  # 只显示前5个
-                    print(f"   变体#{i+1}: id='{var.get('id', 'N/A')}', variantId='{var.get('variantId', 'N/A')}', colorValue='{var.get('colorValue', 'N/A')}'")
-                if len(variations) > 5:
-                    print(f"   ...及其他{len(variations) - 5}个变体")
+                logger.debug("🔍 详细变体数量: %s，当前已选择 variant_id='%s' sku='%s'", len(variations), product_info.variant_id, product_info.sku)
                 
-                # 优先使用当前已选择的变体ID进行匹配
+                # 依次按variantId、变体ID（id字段）、颜色代码在索引中查找
+                variation_index = VariationIndex(variations)
                 first_variant = None
-                current_variant_id = product_info.variant_id
-                current_sku = product_info.sku
-                
-                print(f"🔍 当前已选择的变体信息:")
-                print(f"   variant_id: '{current_variant_id}'")
-                print(f"   sku: '{current_sku}'")
-                
-                if current_variant_id:
-                    # 根据当前的variantId查找对应的详细变体数据
-                    for variation in variations:
-                        if variation.get('variantId') == current_variant_id:
-                            first_variant = variation
-                            print(f"🎯 根据variantId匹配到详细变体: {current_variant_id}")
-                            break
-                
-                # 如果根据variantId没找到，尝试根据变体ID（id字段）匹配
-                if not first_variant and current_sku:
-                    for variation in variations:
-                        if variation.get('id') == current_sku:
-                            first_variant = variation
-                            print(f"🎯 根据变体ID匹配到详细变体: {current_sku}")
-                            break
-                
-                # 如果都没找到，尝试根据颜色代码匹配
-                if not first_variant and product_info.color_value:
-                    for variation in variations:
-                        if variation.get('colorValue') == product_info.color_value:
-                            first_variant = variation
-                            print(f"🎯 根据颜色代码匹配到详细变体: {product_info.color_value}")
-                            break
+                for key, index, value in (('variantId', variation_index.by_variant_id, product_info.variant_id),
+                                          ('id', variation_index.by_id, product_info.sku),
+                                          ('colorValue', variation_index.by_color, product_info.color_value)):
+                    if value and value in index:
+                        first_variant = index[value]
+                        logger.debug("🎯 根据%s匹配到详细变体: %s", key, value)
+                        break
                 
                 # 如果都没找到，使用第一个变体（保持原逻辑作为兜底）
                 if not first_variant:
                     first_variant = variations[0]
-                    print(f"⚠️ 未找到匹配的变体，使用第一个变体作为兜底")
+                    logger.warning("⚠️ 未找到匹配的变体，使用第一个变体作为兜底")
                 
-                print(f"🎨 合并详细信息中的选中变体:")
-                print(f"   变体ID: {first_variant.get('id', 'N/A')}")
-                print(f"   variantId: {first_variant.get('variantId', 'N/A')}")
-                print(f"   颜色代码: {first_variant.get('colorValue', 'N/A')}")
+                logger.debug("🎨 合并详细信息中的选中变体:")
+                logger.debug("   变体ID: %s", first_variant.get('id', 'N/A'))
+                logger.debug("   variantId: %s", first_variant.get('variantId', 'N/A'))
+                logger.debug("   颜色代码: %s", first_variant.get('colorValue', 'N/A'))
                 
                 # 处理尺码组信息
-                size_groups = first_variant.get('sizeGroups', [])
-                if size_groups:
-                    product_info.size_groups = size_groups
-                    
-                    # 提取所有尺码信息
-                    all_sizes = []
-                    available_sizes = []
-                    unavailable_sizes = []
-                    
-                    for size_group in size_groups:
-                        sizes = size_group.get('sizes', [])
-                        for size in sizes:
-                            size_label = size.get('label', '')
-                            if size_label:
-                                all_sizes.append(size_label)
-                                if size.get('orderable', False):
-                                    available_sizes.append(size_label)
-                                else:
-                                    unavailable_sizes.append(size_label)
-                    
-                    # 更新尺码信息
-                    if all_sizes:
-                        product_info.sizes = all_sizes
-                        product_info.available_sizes = available_sizes
-                        product_info.unavailable_sizes = unavailable_sizes
-                        print(f"✅ 更新尺码信息: 总共{len(all_sizes)}个, 可用{len(available_sizes)}个, 不可用{len(unavailable_sizes)}个")
+                self._apply_size_groups(product_info, first_variant.get('sizeGroups', []))
                 
                 # 处理产品故事信息
                 product_story = first_variant.get('productStory')
@@ -1272,21 +1840,21 @@ fragment tokenPayload on TokenPayload {
                     # 更新描述信息
                     if product_story.get('longDescription') and not product_info.description:
                         product_info.description = product_story['longDescription']
-                        print(f"✅ 更新商品详细描述")
+                        logger.debug("✅ 更新商品详细描述")
                     
                     # 更新current_variation中的longDescription信息
                     long_description = product_story.get('longDescription', '')
                     if long_description and hasattr(product_info, 'current_variation') and product_info.current_variation:
                         product_info.current_variation['longDescription'] = long_description
                         product_info.current_variation['productStory'] = product_story
-                        print(f"✅ 更新current_variation的长描述信息")
+                        logger.debug("✅ 更新current_variation的长描述信息")
                     
                     # 更新材料组成
                     material_composition = product_story.get('materialComposition', [])
                     if material_composition:
                         product_info.material_composition = material_composition
                         product_info.materials = material_composition
-                        print(f"✅ 更新材料组成: {len(material_composition)} 项")
+                        logger.debug("✅ 更新材料组成: %s 项", len(material_composition))
                     
                     # 更新护理说明
                     care_instructions = product_story.get('careInstructions')
@@ -1295,16 +1863,13 @@ fragment tokenPayload on TokenPayload {
                             product_info.care_instructions = care_instructions
                         elif isinstance(care_instructions, str):
                             product_info.care_instructions = [care_instructions]
-                        print(f"✅ 更新护理说明")
+                        logger.debug("✅ 更新护理说明")
                     
                     # 更新制造商信息
                     manufacturer_info = product_story.get('manufacturerInfo')
                     if manufacturer_info:
-                        if not product_info.manufacturer_info:
-                            product_info.manufacturer_info = {}
-                        
-                        # 合并制造商信息
-                        product_info.manufacturer_info.update(manufacturer_info)
+                        # 合并为新字典：原字典来自PDP响应的变体数据，同一商品的各颜色记录和缓存共用，不能原地修改
+                        product_info.manufacturer_info = {**(product_info.manufacturer_info or {}), **manufacturer_info}
                         
                         # 更新原产地信息
                         country_info = manufacturer_info.get('countryOfOrigin', {})
@@ -1314,7 +1879,7 @@ fragment tokenPayload on TokenPayload {
                                 product_info.country_of_origin = content[0]
                             elif isinstance(content, str) and content:
                                 product_info.country_of_origin = content
-                            print(f"✅ 更新原产地信息: {product_info.country_of_origin}")
+                            logger.debug("✅ 更新原产地信息: %s", product_info.country_of_origin)
                     
                     # 更新产品关键词
                     product_keywords = product_story.get('productKeywords', [])
@@ -1323,25 +1888,23 @@ fragment tokenPayload on TokenPayload {
                         if not product_info.features:
                             product_info.features = []
                         product_info.features.extend(product_keywords)
-                        print(f"✅ 更新产品关键词: {len(product_keywords)} 个")
+                        logger.debug("✅ 更新产品关键词: %s 个", len(product_keywords))
                 
                 # 更新变体描述
                 variant_description = first_variant.get('description')
                 if variant_description and len(variant_description) > len(product_info.description):
                     product_info.description = variant_description
-                    print(f"✅ 更新为更详细的变体描述")
+                    logger.debug("✅ 更新为更详细的变体描述")
             
-            print(f"✅ 详细尺码信息合并完成")
+            logger.info("✅ 详细尺码信息合并完成")
             
         except Exception as e:
-            print(f"❌ 合并详细尺码信息时发生错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ 合并详细尺码信息时发生错误: %s", e)
     
     def _extract_breadcrumb_from_html(self, url: str) -> tuple:
         """从页面HTML中提取面包屑导航信息"""
         try:
-            print(f"🔍 开始提取导航信息: {url}")
+            logger.debug("🔍 开始提取导航信息: %s", url)
             
             # 设置浏览器头部
             headers = {
@@ -1353,25 +1916,36 @@ fragment tokenPayload on TokenPayload {
                 "Connection": "keep-alive"
             }
             
-            # 获取页面HTML
-            response = self.session.get(url, headers=headers, timeout=30)
+            # 流式获取页面HTML：读到面包屑导航结束（或确认是动态加载页面）就断开
+            page = http_transport.fetch_html(
+                url,
+                stop_at=[
+                    http_transport.MarkerScanner('skeleton-loader'),
+                    http_transport.MarkerScanner('breadcrumbs'),
+                    http_transport.MarkerScanner('data-test-id="breadcrumb-nav"', '</nav>'),
+                ],
+                session=self.session,
+                retry_policy=self.retry_policy,
+                headers=headers,
+                timeout=30
+            )
             
-            if response.status_code != 200:
-                print(f"❌ 无法获取页面: {response.status_code}")
+            if page.status_code != 200:
+                logger.error("❌ 无法获取页面: %s", page.status_code)
                 return [], ""
             
-            html_content = response.text
-            print(f"✅ 成功获取页面HTML，长度: {len(html_content)}")
+            html_content = page.text
+            logger.info("✅ 成功获取页面HTML，长度: %s%s", len(html_content), "（提前结束）" if page.stopped_early else "")
             
             # 检查是否存在JavaScript动态加载的迹象
             if 'skeleton-loader' in html_content or 'breadcrumbs' in html_content:
-                print(f"⚠️ 检测到动态加载内容，尝试从 URL 的路径结构推断导航")
+                logger.warning("⚠️ 检测到动态加载内容，尝试从 URL 的路径结构推断导航")
                 return self._extract_navigation_from_url(url)
             
             # 优先使用BeautifulSoup解析
             try:
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(html_content, 'html.parser')
+                from html_parser import make_soup
+                soup = make_soup(html_content)
                 
                 # 多种面包屑导航元素查找策略
                 breadcrumb_selectors = [
@@ -1385,33 +1959,31 @@ fragment tokenPayload on TokenPayload {
                 for selector in breadcrumb_selectors:
                     breadcrumb_nav = soup.find('nav', selector['attrs'])
                     if breadcrumb_nav:
-                        print(f"✅ 找到面包屑导航元素（使用选择器: {selector}）")
+                        logger.info("✅ 找到面包屑导航元素（使用选择器: %s）", selector)
                         break
                 
                 if breadcrumb_nav:
                     return self._parse_breadcrumb_from_soup(breadcrumb_nav, url)
                 else:
-                    print(f"⚠️ BeautifulSoup未找到面包屑导航元素")
+                    logger.warning("⚠️ BeautifulSoup未找到面包屑导航元素")
                     
             except ImportError:
-                print(f"⚠️ BeautifulSoup不可用，使用正则表达式")
+                logger.warning("⚠️ BeautifulSoup不可用，使用正则表达式")
             except Exception as e:
-                print(f"❌ BeautifulSoup解析失败: {e}")
+                logger.error("❌ BeautifulSoup解析失败: %s", e)
             
             # 备用方案：使用正则表达式
-            print(f"🔧 使用正则表达式提取面包屑导航...")
+            logger.debug("🔧 使用正则表达式提取面包屑导航...")
             breadcrumb_result = self._extract_breadcrumb_with_regex(html_content, url)
             if breadcrumb_result[0]:  # 如果找到了导航项
                 return breadcrumb_result
             
             # 最后的备用方案：从 URL 推断导航
-            print(f"🔧 从 URL 结构推断导航信息...")
+            logger.debug("🔧 从 URL 结构推断导航信息...")
             return self._extract_navigation_from_url(url)
             
         except Exception as e:
-            print(f"❌ 提取导航信息时发生错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ 提取导航信息时发生错误: %s", e)
             return [], ""
     
     def _extract_breadcrumb_with_regex(self, html_content: str, url: str = "") -> tuple:
@@ -1419,7 +1991,7 @@ fragment tokenPayload on TokenPayload {
         try:
             import re
             
-            print("🔍 使用正则表达式提取导航信息...")
+            logger.debug("🔍 使用正则表达式提取导航信息...")
             
             breadcrumb_items = []
             navigation_parts = []
@@ -1429,11 +2001,11 @@ fragment tokenPayload on TokenPayload {
             breadcrumb_match = re.search(breadcrumb_pattern, html_content, re.DOTALL | re.IGNORECASE)
             
             if not breadcrumb_match:
-                print("❌ 正则表达式未找到面包屑导航区域")
+                logger.error("❌ 正则表达式未找到面包屑导航区域")
                 return [], ""
             
             breadcrumb_html = breadcrumb_match.group(1)
-            print(f"✅ 找到面包屑导航区域")
+            logger.info("✅ 找到面包屑导航区域")
             
             # 提取导航链接（更精确的正则）
             link_pattern = r'<a[^>]*data-uds-child="breadcrumb-link"[^>]*href="([^"]*)"[^>]*>(.*?)</a>'
@@ -1481,19 +2053,18 @@ fragment tokenPayload on TokenPayload {
             # 构建导航路径字符串
             navigation_path = ' > '.join(navigation_parts)
             
-            print(f"✅ 正则表达式提取成功: {navigation_path}")
-            print(f"   导航项数: {len(breadcrumb_items)}")
+            logger.info("✅ 正则表达式提取成功: %s", navigation_path)
+            logger.debug("   导航项数: %s", len(breadcrumb_items))
             
-            for item in breadcrumb_items:
-                current_flag = " (当前页面)" if item.get('current') else ""
-                print(f"     - {item['text']}{current_flag}")
+            if logger.isEnabledFor(logging.DEBUG):
+                for item in breadcrumb_items:
+                    current_flag = " (当前页面)" if item.get('current') else ""
+                    logger.debug("     - %s%s", item['text'], current_flag)
             
             return breadcrumb_items, navigation_path
             
         except Exception as e:
-            print(f"❌ 正则表达式提取失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ 正则表达式提取失败: %s", e)
             return [], ""
     
     def _parse_breadcrumb_from_soup(self, breadcrumb_nav, url: str) -> tuple:
@@ -1543,23 +2114,24 @@ fragment tokenPayload on TokenPayload {
             # 构建导航路径字符串
             navigation_path = ' > '.join(navigation_parts)
             
-            print(f"✅ BeautifulSoup提取成功: {navigation_path}")
-            print(f"   导航项数: {len(breadcrumb_items)}")
+            logger.info("✅ BeautifulSoup提取成功: %s", navigation_path)
+            logger.debug("   导航项数: %s", len(breadcrumb_items))
             
-            for item in breadcrumb_items:
-                current_flag = " (当前页面)" if item.get('current') else ""
-                print(f"     - {item['text']}{current_flag}")
+            if logger.isEnabledFor(logging.DEBUG):
+                for item in breadcrumb_items:
+                    current_flag = " (当前页面)" if item.get('current') else ""
+                    logger.debug("     - %s%s", item['text'], current_flag)
             
             return breadcrumb_items, navigation_path
             
         except Exception as e:
-            print(f"❌ BeautifulSoup解析失败: {e}")
+            logger.error("❌ BeautifulSoup解析失败: %s", e)
             return [], ""
     
     def _extract_navigation_from_url(self, url: str) -> tuple:
         """从 URL 结构推断导航信息（备用方案）"""
         try:
-            print(f"🔧 从 URL 结构推断导航: {url}")
+            logger.debug("🔧 从 URL 结构推断导航: %s", url)
             
             breadcrumb_items = []
             navigation_parts = []
@@ -1653,15 +2225,16 @@ fragment tokenPayload on TokenPayload {
             
             navigation_path = ' > '.join(navigation_parts)
             
-            print(f"✅ 从 URL 推断成功: {navigation_path}")
-            print(f"   导航项数: {len(breadcrumb_items)}")
+            logger.info("✅ 从 URL 推断成功: %s", navigation_path)
+            logger.debug("   导航项数: %s", len(breadcrumb_items))
             
-            for item in breadcrumb_items:
-                current_flag = " (当前页面)" if item.get('current') else ""
-                print(f"     - {item['text']}{current_flag}")
+            if logger.isEnabledFor(logging.DEBUG):
+                for item in breadcrumb_items:
+                    current_flag = " (当前页面)" if item.get('current') else ""
+                    logger.debug("     - %s%s", item['text'], current_flag)
             
             return breadcrumb_items, navigation_path
             
         except Exception as e:
-            print(f"❌ URL 推断失败: {e}")
+            logger.error("❌ URL 推断失败: %s", e)
             return [], ""
\ No newline at end of file
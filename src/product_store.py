@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+规范化的商品存储
+ProductInfo中每个变体在all_variations和current_variation中各存一份，
+同一批图片又分散在images/main_images/sku_images和各变体的images中；
+同一商品的多个颜色分别爬取时，整份all_variations还会重复多次。
+
+ProductStore把商品、变体、尺码组、图片分表存储，各只保存一次，相互之间按ID引用；
+需要原来的结构时由view()按需重建ProductInfo。
+"""
+
+import json
+from dataclasses import MISSING, fields
+from typing import Any, Dict, Iterator, List, Optional
+
+from new_puma_graphql_api import ProductInfo
+
+# 规范化JSON的格式版本
+STORE_FORMAT_VERSION = 1
+
+# 商品级的图片URL列表字段，存储为图片ID列表
+_PRODUCT_IMAGE_FIELDS = ('main_images', 'sku_images', 'vertical_images')
+
+# 变体中的图片URL列表字段
+_VARIATION_IMAGE_FIELDS = ('images', 'verticalImages')
+
+# 由其他字段推导、不单独存储的商品字段
+_DERIVED_SIZE_FIELDS = ('sizes', 'available_sizes', 'unavailable_sizes')
+
+# 变体记录中的编码说明：哪些键被替换为引用或可由其他键推导
+_ENCODED_KEY = '_encoded'
+
+
+def _field_defaults() -> Dict[str, Any]:
+    defaults = {}
+    for f in fields(ProductInfo):
+        if f.default is not MISSING:
+            defaults[f.name] = f.default
+        else:
+            defaults[f.name] = f.default_factory()
+    return defaults
+
+
+_FIELD_DEFAULTS = _field_defaults()
+
+
+def _ordered_union(*lists: List[str]) -> List[str]:
+    seen = set()
+    result = []
+    for items in lists:
+        for item in items:
+            if item not in seen:
+                seen.add(item)
+                result.append(item)
+    return result
+
+
+def _sizes_from_groups(size_groups: List[Dict]) -> Dict[str, List[str]]:
+    """与NewPumaGraphQLAPI._apply_size_groups相同的推导规则"""
+    all_sizes, available_sizes, unavailable_sizes = [], [], []
+    for size_group in size_groups:
+        for size in size_group.get('sizes', []):
+            size_label = size.get('label', '')
+            if size_label:
+                all_sizes.append(size_label)
+                if size.get('orderable', False):
+                    available_sizes.append(size_label)
+                else:
+                    unavailable_sizes.append(size_label)
+    return {'sizes': all_sizes, 'available_sizes': available_sizes, 'unavailable_sizes': unavailable_sizes}
+
+
+def _story_long_description(variation: Dict) -> str:
+    """_parse_product_data中longDescription的来源：productStory.longDescription"""
+    product_story = variation.get('productStory', {})
+    return product_story.get('longDescription', '') if product_story else ''
+
+
+class ProductStore:
+    """
+    商品/变体/尺码组/图片分表存储
+
+    - images: 图片URL列表，其他表中用下标（图片ID）引用
+    - variations: 变体ID -> 变体记录，图片替换为图片ID，重复的长描述省略
+    - size_groups: 变体ID -> 尺码组（尺码列表由尺码组推导，不单独存储）
+    - products: 记录键 -> 商品记录，只保存非默认值，变体和尺码组按ID引用
+
+    记录是只读的：add之后不应再修改传入的ProductInfo中的嵌套数据。
+    """
+
+    def __init__(self):
+        self.images: List[str] = []
+        self._image_ids: Dict[str, int] = {}
+        self.variations: Dict[str, Dict[str, Any]] = {}
+        self.size_groups: Dict[str, List[Dict]] = {}
+        self.products: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.products
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.products)
+
+    # ---------- 写入 ----------
+
+    def _image_id(self, url: str) -> int:
+        image_id = self._image_ids.get(url)
+        if image_id is None:
+            image_id = len(self.images)
+            self._image_ids[url] = image_id
+            self.images.append(url)
+        return image_id
+
+    def _image_id_list(self, urls: List[str]) -> List[int]:
+        return [self._image_id(url) for url in urls]
+
+    def _intern(self, table: Dict[str, Any], key: str, record: Any) -> str:
+        """按键存入表，已有相同键但内容不同时使用带序号的键，返回最终的键"""
+        candidate = key
+        suffix = 1
+        while candidate in table and table[candidate] != record:
+            candidate = f"{key}~{suffix}"
+            suffix += 1
+        table.setdefault(candidate, record)
+        return candidate
+
+    def _add_variation(self, variation: Dict[str, Any], fallback_id: str) -> str:
+        record = dict(variation)
+        encoded = {}
+        for key in _VARIATION_IMAGE_FIELDS:
+            value = record.get(key)
+            if isinstance(value, list) and all(isinstance(url, str) for url in value):
+                record[key] = self._image_id_list(value)
+                encoded[key] = 'image_ids'
+        if 'longDescription' in record and record['longDescription'] == _story_long_description(record):
+            del record['longDescription']
+            encoded['longDescription'] = 'story'
+        if encoded:
+            record[_ENCODED_KEY] = encoded
+        return self._intern(self.variations, str(variation.get('id') or fallback_id), record)
+
+    def add(self, product_info: ProductInfo, key: Optional[str] = None) -> str:
+        """
+        存入一个商品，返回记录键
+
+        Args:
+            product_info: 商品信息
+            key: 记录键，默认使用SKU（变体ID），没有时使用商品ID；相同的键会被覆盖
+        """
+        key = key or product_info.sku or product_info.product_id
+        record: Dict[str, Any] = {}
+        derived_sizes = _sizes_from_groups(product_info.size_groups) if product_info.size_groups else None
+
+        for name, default in _FIELD_DEFAULTS.items():
+            value = getattr(product_info, name)
+            if name in ('all_variations', 'current_variation', 'size_groups', 'images') or name in _PRODUCT_IMAGE_FIELDS:
+                continue
+            if name in _DERIVED_SIZE_FIELDS and derived_sizes is not None:
+                if value != derived_sizes[name]:
+                    record[name] = value
+                continue
+            if value != default:
+                record[name] = value
+
+        for name in _PRODUCT_IMAGE_FIELDS:
+            value = getattr(product_info, name)
+            if value:
+                record[name] = self._image_id_list(value)
+        # images通常是main_images与sku_images的有序并集，此时不单独存储
+        if product_info.images != _ordered_union(product_info.main_images, product_info.sku_images):
+            record['images'] = self._image_id_list(product_info.images)
+
+        variation_ids = [
+            self._add_variation(variation, f"{product_info.product_id}#{position}")
+            for position, variation in enumerate(product_info.all_variations)
+        ]
+        if variation_ids:
+            record['variation_ids'] = variation_ids
+
+        current = product_info.current_variation
+        if current:
+            position = next((i for i, variation in enumerate(product_info.all_variations) if variation is current), -1)
+            if position >= 0:
+                record['current_variation_id'] = variation_ids[position]
+            else:
+                record['current_variation_id'] = self._add_variation(current, f"{product_info.product_id}#current")
+
+        if product_info.size_groups:
+            record['size_groups_id'] = self._intern(self.size_groups, product_info.sku or key, product_info.size_groups)
+
+        self.products[key] = record
+        return key
+
+    # ---------- 读取 ----------
+
+    def _variation_view(self, variation_id: str) -> Dict[str, Any]:
+        record = self.variations[variation_id]
+        variation = {k: v for k, v in record.items() if k != _ENCODED_KEY}
+        for key, encoding in record.get(_ENCODED_KEY, {}).items():
+            if encoding == 'image_ids':
+                variation[key] = [self.images[image_id] for image_id in record[key]]
+            elif encoding == 'story':
+                variation[key] = _story_long_description(record)
+        if 'longDescription' in variation and 'productStory' in variation:
+            # 恢复原来的键顺序：longDescription在productStory之前
+            variation['productStory'] = variation.pop('productStory')
+        return variation
+
+    def view(self, key: str) -> ProductInfo:
+        """
+        按记录键重建ProductInfo（结构与直接解析得到的相同）
+
+        Raises:
+            KeyError: 记录不存在
+        """
+        record = self.products[key]
+        product_info = ProductInfo()
+        for name, value in record.items():
+            if name in _FIELD_DEFAULTS:
+                setattr(product_info, name, value)
+
+        for name in _PRODUCT_IMAGE_FIELDS:
+            setattr(product_info, name, [self.images[image_id] for image_id in record.get(name, [])])
+        if 'images' in record:
+            product_info.images = [self.images[image_id] for image_id in record['images']]
+        else:
+            product_info.images = _ordered_union(product_info.main_images, product_info.sku_images)
+
+        variations_by_id: Dict[str, Dict] = {}
+        for variation_id in record.get('variation_ids', []):
+            if variation_id not in variations_by_id:
+                variations_by_id[variation_id] = self._variation_view(variation_id)
+            product_info.all_variations.append(variations_by_id[variation_id])
+        current_id = record.get('current_variation_id')
+        if current_id:
+            product_info.current_variation = variations_by_id.get(current_id) or self._variation_view(current_id)
+
+        size_groups_id = record.get('size_groups_id')
+        if size_groups_id:
+            product_info.size_groups = self.size_groups[size_groups_id]
+            for name, value in _sizes_from_groups(product_info.size_groups).items():
+                if name not in record:
+                    setattr(product_info, name, value)
+        return product_info
+
+    def iter_views(self) -> Iterator[ProductInfo]:
+        for key in self.products:
+            yield self.view(key)
+
+    # ---------- 序列化 ----------
+
+    def to_dict(self) -> Dict[str, Any]:
+        """规范化的字典（与存储共享嵌套数据，不拷贝）"""
+        return {
+            'version': STORE_FORMAT_VERSION,
+            'images': self.images,
+            'variations': self.variations,
+            'size_groups': self.size_groups,
+            'products': self.products,
+        }
+
+    def to_json(self, **kwargs) -> str:
+        """序列化为JSON字符串，参数透传给json.dumps（默认ensure_ascii=False）"""
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(self.to_dict(), **kwargs)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProductStore":
+        """
+        由to_dict的结果恢复
+
+        Raises:
+            ValueError: 格式版本不支持
+        """
+        if data.get('version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"不支持的商品存储格式版本: {data.get('version')}")
+        store = cls()
+        store.images = list(data.get('images', []))
+        store._image_ids = {url: image_id for image_id, url in enumerate(store.images)}
+        store.variations = dict(data.get('variations', {}))
+        store.size_groups = dict(data.get('size_groups', {}))
+        store.products = dict(data.get('products', {}))
+        return store
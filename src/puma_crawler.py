@@ -35,8 +35,8 @@ try:
 except ImportError:
     CompleteGraphQLAPI = None
 
-# 导入请求模块用于尺码获取
-import requests
+# 导入请求模块用于尺码获取（共享连接池）
+import http_transport
 import re
 
 # 设置日志
@@ -138,7 +138,7 @@ def get_enhanced_sizes(url):
         }
         
         try:
-            response = requests.post(graphql_url, headers=headers, json=payload, timeout=15)
+            response = http_transport.post(graphql_url, headers=headers, json=payload, timeout=15)
             print(f"      响应状态: {response.status_code}")
             
             if response.status_code == 200:
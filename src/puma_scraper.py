@@ -15,6 +15,10 @@ from dataclasses import dataclass, asdict
 from typing import Optional, Dict, List
 import logging
 
+import http_transport
+from html_parser import make_soup
+from retry_policy import RetryPolicy, CircuitOpenError, get_default_policy
+
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -80,7 +84,7 @@ class PumaScraper:
     """Puma商品爬虫类"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = http_transport.create_session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -90,28 +94,30 @@ class PumaScraper:
             'Upgrade-Insecure-Requests': '1',
         })
         self.timeout = 30
+        self.retry_policy = get_default_policy()
     
     def get_page_content(self, url: str, retries: int = 3) -> Optional[BeautifulSoup]:
-        """获取页面内容"""
-        for attempt in range(retries):
-            try:
-                logger.info(f"尝试获取页面内容 (第{attempt + 1}次): {url}")
-                response = self.session.get(url, timeout=self.timeout)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                logger.info("页面内容获取成功")
-                return soup
-                
-            except requests.exceptions.Timeout:
-                logger.warning(f"请求超时 (第{attempt + 1}次)")
-                time.sleep(2 ** attempt)  # 指数退避
-            except requests.exceptions.RequestException as e:
-                logger.error(f"请求异常 (第{attempt + 1}次): {e}")
-                time.sleep(2 ** attempt)
-            except Exception as e:
-                logger.error(f"解析HTML异常: {e}")
-                
+        """获取页面内容（超时、429和5xx按共享的重试策略退避重试）"""
+        try:
+            logger.info(f"尝试获取页面内容: {url}")
+            policy = self.retry_policy
+            if retries != policy.max_attempts:
+                policy = RetryPolicy(max_attempts=retries, base_delay=policy.base_delay, max_delay=policy.max_delay,
+                                     budget=policy.budget, circuit_breaker=policy.circuit_breaker)
+            response = policy.call(self.session.get, url, timeout=self.timeout)
+            response.raise_for_status()
+            
+            soup = make_soup(response.content)
+            logger.info("页面内容获取成功")
+            return soup
+            
+        except CircuitOpenError as e:
+            logger.error(f"请求被熔断: {e}")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"请求异常: {e}")
+        except Exception as e:
+            logger.error(f"解析HTML异常: {e}")
+        
         logger.error("所有重试都失败了")
         return None
     
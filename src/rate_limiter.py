@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按主机的自适应限速
+每个主机一个令牌桶，所有出站请求（经http_transport的共享连接池）发送前先取令牌。
+速率按AIMD调整：响应正常时缓慢加速，遇到429/403/503、超时或响应明显变慢时成倍降速；
+服务端给出Retry-After时，在此之前暂停向该主机发送请求。
+用它代替各处固定的sleep，在不被封禁的前提下尽量提高吞吐。
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from config import (RATE_LIMIT_BURST, RATE_LIMIT_INITIAL_RATE, RATE_LIMIT_MAX_RATE,
+                    RATE_LIMIT_MIN_RATE, RATE_LIMIT_SLOW_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+# 表示被限流或被拦截的状态码
+THROTTLE_STATUS_CODES = {403, 429, 503}
+
+
+class _HostBucket:
+    """单个主机的令牌桶状态"""
+
+    __slots__ = ('rate', 'tokens', 'updated', 'blocked_until', 'last_decrease')
+
+    def __init__(self, rate: float, tokens: float, now: float):
+        self.rate = rate
+        self.tokens = tokens
+        self.updated = now
+        self.blocked_until = 0.0
+        self.last_decrease = float('-inf')
+
+
+class AdaptiveRateLimiter:
+    """按主机的令牌桶限速器（线程安全），速率按AIMD自适应"""
+
+    def __init__(self, initial_rate: float = RATE_LIMIT_INITIAL_RATE, min_rate: float = RATE_LIMIT_MIN_RATE,
+                 max_rate: float = RATE_LIMIT_MAX_RATE, burst: float = RATE_LIMIT_BURST,
+                 increase_step: float = 0.5, decrease_factor: float = 0.5,
+                 slow_seconds: float = RATE_LIMIT_SLOW_SECONDS, max_retry_after: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            initial_rate: 每个主机的初始速率（请求/秒）
+            min_rate: 降速的下限
+            max_rate: 加速的上限
+            burst: 令牌桶容量（允许的突发请求数）
+            increase_step: 正常响应时的加速幅度，约为每秒增加的请求/秒
+            decrease_factor: 被限流、超时或变慢时速率乘以的系数
+            slow_seconds: 响应耗时超过该值视为上游过载
+            max_retry_after: Retry-After的上限（秒），避免异常的响应头让爬虫停摆
+            clock: 单调时钟（测试时可替换）
+            sleep: 等待函数（测试时可替换）
+        """
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1.0, burst)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.slow_seconds = slow_seconds
+        self.max_retry_after = max_retry_after
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, _HostBucket] = {}
+
+    def _bucket(self, host: str, now: float) -> _HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _HostBucket(self.initial_rate, self.burst, now)
+        return bucket
+
+    def _refill(self, bucket: _HostBucket, now: float) -> None:
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+        bucket.updated = now
+
+    def acquire(self, host: str) -> float:
+        """
+        为host取一个令牌，必要时阻塞等待
+
+        Returns:
+            等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                bucket = self._bucket(host, now)
+                self._refill(bucket, now)
+                if now < bucket.blocked_until:
+                    wait = bucket.blocked_until - now
+                elif bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return waited
+                else:
+                    wait = (1 - bucket.tokens) / bucket.rate
+            self._sleep(wait)
+            waited += wait
+
+    def _decrease(self, host: str, bucket: _HostBucket, now: float, reason: str) -> None:
+        # 同一批并发请求会几乎同时返回，一个令牌间隔内只降速一次，避免速率瞬间跌到下限
+        if now - bucket.last_decrease < 1.0 / bucket.rate:
+            return
+        bucket.last_decrease = now
+        old_rate = bucket.rate
+        bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+        bucket.tokens = min(bucket.tokens, 0.0)
+        logger.warning("⚠️ %s %s，限速 %.2f -> %.2f 请求/秒", host, reason, old_rate, bucket.rate)
+
+    def record(self, host: str, status_code: Optional[int] = None, latency: Optional[float] = None,
+               retry_after: Optional[float] = None, error: bool = False) -> None:
+        """
+        反馈一次请求的结果
+
+        Args:
+            host: 主机名
+            status_code: 响应状态码（请求异常时为空）
+            latency: 响应耗时（秒）
+            retry_after: 响应中的Retry-After（秒）
+            error: 是否超时
+        """
+        with self._lock:
+            now = self._clock()
+            bucket = self._bucket(host, now)
+            self._refill(bucket, now)
+            if retry_after:
+                pause = min(retry_after, self.max_retry_after)
+                bucket.blocked_until = max(bucket.blocked_until, now + pause)
+                logger.warning("⚠️ %s 要求%.1f秒后重试，暂停发送", host, pause)
+            if error:
+                self._decrease(host, bucket, now, "请求超时")
+            elif status_code in THROTTLE_STATUS_CODES:
+                self._decrease(host, bucket, now, f"返回{status_code}")
+            elif latency is not None and latency > self.slow_seconds:
+                self._decrease(host, bucket, now, f"响应变慢({latency:.1f}秒)")
+            elif status_code is not None and status_code < 500:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase_step / max(bucket.rate, 1.0))
+
+    def get_rate(self, host: str) -> float:
+        """host当前的速率（请求/秒）"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            return bucket.rate if bucket else self.initial_rate
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """各主机当前的速率和剩余暂停时间"""
+        with self._lock:
+            now = self._clock()
+            return {
+                host: {'rate': round(bucket.rate, 3), 'blocked_for': round(max(0.0, bucket.blocked_until - now), 3)}
+                for host, bucket in self._buckets.items()
+            }
+
+
+_default_limiter: Optional[AdaptiveRateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_limiter() -> AdaptiveRateLimiter:
+    """获取所有出站请求共享的限速器"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = AdaptiveRateLimiter()
+        return _default_limiter
+
+
+def configure_default_limiter(**kwargs) -> AdaptiveRateLimiter:
+    """
+    替换共享的限速器，参数同AdaptiveRateLimiter（需要在创建session之前调用）
+
+    例如多进程爬取时每个进程只分到总速率的一部分。
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        _default_limiter = AdaptiveRateLimiter(**kwargs)
+        return _default_limiter
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GraphQL响应缓存
+按 (操作名, 商品ID, locale) 缓存原始的 data.product 数据，
+支持内存LRU、可选的磁盘存储（data/cache下）以及按操作设置的TTL
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存目录
+CACHE_DIR = DATA_DIR / "cache" / "graphql"
+
+# 各操作的默认TTL（秒）：PDP/LazyPDP包含价格和库存，使用短TTL；
+# 价格/库存档位用于高频监控，TTL更短；图片档位基本不变，使用长TTL；
+# 只包含测量表/尺码表等基本不变数据的操作可以通过ttls参数配置更长的TTL
+DEFAULT_TTLS = {
+    "PDP": 5 * 60,
+    "LazyPDP": 5 * 60,
+    "PDPPricing": 60,
+    "PDPInventory": 60,
+    "PDPMedia": 24 * 60 * 60,
+    "CategoryTree": 24 * 60 * 60,
+}
+DEFAULT_TTL = 10 * 60
+
+
+class MemoryCacheStore:
+    """内存LRU存储"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, expires_at: float, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCacheStore:
+    """磁盘存储：每个缓存项一个JSON文件，进程重启后仍然有效"""
+
+    def __init__(self, directory: Path = CACHE_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            return entry['expires_at'], entry['value']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, expires_at: float, value: str) -> None:
+        path = self._path(key)
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'expires_at': expires_at, 'value': value}, f, ensure_ascii=False)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning("⚠️ 写入磁盘缓存失败: %s", e)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for path in self.directory.glob('*.json'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+class ResponseCache:
+    """
+    GraphQL响应缓存
+
+    内存LRU作为一级缓存，可选的磁盘存储作为二级缓存。缓存值以JSON文本保存，
+    每次命中都会重新解码，调用方拿到的是独立副本，修改它不会污染缓存。
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 1024,
+                 disk_store: Optional[DiskCacheStore] = None):
+        """
+        Args:
+            ttls: 操作名 -> TTL（秒），覆盖DEFAULT_TTLS中的对应项
+            max_entries: 内存LRU的最大条目数
+            disk_store: 可选的磁盘存储，例如 DiskCacheStore()
+        """
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.memory_store = MemoryCacheStore(max_entries)
+        self.disk_store = disk_store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def make_key(operation_name: str, product_id: str, locale: str = "") -> str:
+        """构建缓存键"""
+        return f"{operation_name}:{locale}:{product_id}"
+
+    def get_ttl(self, operation_name: str) -> float:
+        """获取操作对应的TTL"""
+        return self.ttls.get(operation_name, DEFAULT_TTL)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, operation_name: str, product_id: str, locale: str = "") -> Optional[Any]:
+        """读取缓存，未命中或已过期时返回None"""
+        key = self.make_key(operation_name, product_id, locale)
+        now = time.time()
+
+        entry = self.memory_store.get(key)
+        if entry is None and self.disk_store is not None:
+            entry = self.disk_store.get(key)
+            if entry is not None and entry[0] > now:
+                # 回填内存缓存
+                self.memory_store.set(key, *entry)
+
+        if entry is None:
+            self._count('misses')
+            return None
+
+        expires_at, value = entry
+        if expires_at <= now:
+            self.memory_store.delete(key)
+            if self.disk_store is not None:
+                self.disk_store.delete(key)
+            self._count('expired')
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        return json.loads(value)
+
+    def set(self, operation_name: str, product_id: str, locale: str, payload: Any) -> None:
+        """写入缓存"""
+        ttl = self.get_ttl(operation_name)
+        if ttl <= 0:
+            return
+        key = self.make_key(operation_name, product_id, locale)
+        expires_at = time.time() + ttl
+        value = json.dumps(payload, ensure_ascii=False)
+        self.memory_store.set(key, expires_at, value)
+        if self.disk_store is not None:
+            self.disk_store.set(key, expires_at, value)
+
+    def invalidate(self, operation_name: str, product_id: str, locale: str = "") -> None:
+        """删除指定缓存项"""
+        key = self.make_key(operation_name, product_id, locale)
+        self.memory_store.delete(key)
+        if self.disk_store is not None:
+            self.disk_store.delete(key)
+
+    def clear(self) -> None:
+        """清空所有缓存"""
+        self.memory_store.clear()
+        if self.disk_store is not None:
+            self.disk_store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.memory_store.evictions,
+            'entries': len(self.memory_store),
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'disk_enabled': self.disk_store is not None
+        }
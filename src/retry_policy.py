@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统一的重试策略
+带抖动的指数退避 + 重试预算 + 熔断器，所有访问us.puma.com的调用共用一个策略，
+避免上游变慢时各处独立重试把流量成倍放大
+"""
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 可重试的HTTP状态码：限流和服务端临时错误
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+
+def is_retryable_exception(exc: BaseException) -> bool:
+    """超时和连接错误可以重试"""
+    return isinstance(exc, (requests.exceptions.Timeout,
+                            requests.exceptions.ConnectionError))
+
+
+def is_retryable_response(response: Any) -> bool:
+    """429和5xx响应可以重试"""
+    return getattr(response, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+
+def get_retry_after(response: Any) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期格式），返回需要等待的秒数"""
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('Retry-After') if hasattr(headers, 'get') else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到failure_threshold次后打开，recovery_timeout秒内直接拒绝请求；
+    之后进入半开状态放行一个探测请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """是否允许发出请求"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # 半开状态只放行一个探测请求
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release(self) -> None:
+        """请求因与上游无关的原因结束时释放探测名额"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("⛔ 上游连续失败%s次，熔断%.0f秒", self._failures, self.recovery_timeout)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class RetryBudget:
+    """
+    重试预算
+
+    每个请求存入ratio个令牌，每次重试消耗一个令牌，令牌不足时不再重试，
+    保证重试流量不超过正常流量的ratio倍（min_tokens保证低流量时也能重试）。
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class RetryPolicy:
+    """带抖动退避、重试预算和熔断器的重试策略"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0,
+                 budget: Optional[RetryBudget] = None, circuit_breaker: Optional[CircuitBreaker] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            max_attempts: 最多尝试次数（含第一次）
+            base_delay: 退避基数（秒），第n次重试的上限为 base_delay * 2**n
+            max_delay: 单次等待上限（秒）
+            budget: 重试预算，为None时不限制
+            circuit_breaker: 熔断器，为None时不熔断
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.circuit_breaker = circuit_breaker
+        self.sleep = sleep
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """计算第attempt次重试前的等待时间（full jitter），服务端给出Retry-After时不早于它"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def call(self, func: Callable, *args,
+             retry_on_result: Callable[[Any], bool] = is_retryable_response,
+             retry_on_exception: Callable[[BaseException], bool] = is_retryable_exception,
+             **kwargs) -> Any:
+        """
+        按策略执行func
+
+        返回最后一次的结果；最后一次仍然抛出可重试异常时向上抛出。
+        熔断器打开时抛出CircuitOpenError。
+        """
+        for attempt in range(self.max_attempts):
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+                raise CircuitOpenError("上游服务熔断中，暂停请求")
+            if self.budget is not None:
+                self.budget.record_request()
+
+            retry_after = None
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not retry_on_exception(e):
+                    if self.circuit_breaker is not None:
+                        self.circuit_breaker.release()
+                    raise
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                if not self._can_retry(attempt):
+                    raise
+                logger.warning("⚠️ 请求异常，准备重试 (第%s次): %s", attempt + 1, e)
+            else:
+                if not retry_on_result(result):
+                    if self.circuit_breaker is not None:
+                        self.circuit_breaker.record_success()
+                    return result
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                if not self._can_retry(attempt):
+                    return result
+                retry_after = get_retry_after(result)
+                logger.warning("⚠️ 请求返回可重试结果，准备重试 (第%s次): %s",
+                               attempt + 1, getattr(result, 'status_code', result))
+                # 丢弃的响应要关闭，否则stream=True等情况下连接不会归还连接池
+                close = getattr(result, 'close', None)
+                if callable(close):
+                    close()
+
+            self.sleep(self.compute_delay(attempt, retry_after))
+
+        # max_attempts >= 1，循环内必然已返回或抛出
+        raise RuntimeError("unreachable")
+
+    def _can_retry(self, attempt: int) -> bool:
+        if attempt + 1 >= self.max_attempts:
+            return False
+        if self.budget is not None and not self.budget.try_spend():
+            logger.warning("⚠️ 重试预算已用完，不再重试")
+            return False
+        return True
+
+
+_default_policy: Optional[RetryPolicy] = None
+_default_policy_lock = threading.Lock()
+
+
+def get_default_policy() -> RetryPolicy:
+    """获取所有访问us.puma.com的调用共享的默认策略（共享重试预算和熔断器）"""
+    global _default_policy
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = RetryPolicy(budget=RetryBudget(), circuit_breaker=CircuitBreaker())
+        return _default_policy
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程分片爬取
+网络并发之后，_parse_product_data、_merge_detailed_size_info等解析工作受GIL限制只能用满一个核。
+这里按商品ID的crc32把URL分到N个分片，每个分片由一个独立进程爬取（各自的session、token、
+限速器和BatchRunner线程池），结果写到各分片的输出文件，全部结束后合并为一个JSONL文件。
+同一商品的所有颜色总在同一个分片，颜色合并模式（--fan-out）和断点续爬都按分片进行。
+各进程的限速器平分总速率（--total-rate，默认与单进程上限RATE_LIMIT_MAX_RATE相同），
+所以增加进程只提高解析吞吐，对上游的请求速率不会超过总速率。
+
+用法:
+    python sharded_crawl.py urls.txt --processes 16 --output results.jsonl
+    python sharded_crawl.py urls.txt --processes 16 --total-rate 60 --output results.jsonl
+    python catalog_discovery.py --all-categories | python sharded_crawl.py - --fan-out --checkpoint catalog
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Callable, Iterable, List, Optional
+
+import http_transport
+from batch_runner import BatchRunner, BatchStats, read_urls
+from checkpoint import DEFAULT_MAX_ATTEMPTS, CrawlCheckpoint, ensure_trailing_newline
+from config import (RATE_LIMIT_BURST, RATE_LIMIT_INITIAL_RATE, RATE_LIMIT_MAX_RATE, RATE_LIMIT_MIN_RATE,
+                    SHARD_PROCESSES, SHARD_THREADS, get_checkpoint_path, get_output_path)
+from log_config import setup_logging
+from new_puma_graphql_api import NewPumaGraphQLAPI, match_product_id
+from rate_limiter import configure_default_limiter
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(url: str, shards: int) -> int:
+    """URL所属的分片：商品ID的crc32取模（与进程、运行次数无关），提取不到商品ID时按URL计算"""
+    key = match_product_id(url) or url
+    return zlib.crc32(key.encode('utf-8')) % shards
+
+
+def partition_urls(urls: Iterable[str], work_dir: Path, shards: int) -> List[Path]:
+    """
+    把URL按分片写到work_dir/shard-NN.urls（边读边写，不在内存中保留URL列表）
+
+    Returns:
+        各分片的URL文件路径
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    paths = [work_dir / f"shard-{index:02d}.urls" for index in range(shards)]
+    files = [open(path, 'w', encoding='utf-8') for path in paths]
+    try:
+        for url in urls:
+            files[shard_of(url, shards)].write(url + "\n")
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def merge_outputs(paths: Iterable[Path], output: IO[str]) -> int:
+    """
+    按分片顺序把各分片的JSONL结果逐行追加到output，返回合并的行数
+
+    被中断的分片最后一行可能不完整：没有换行的行（本次未续爬）和无法解析的行
+    （续爬前补了换行，夹在文件中间）都会被丢弃。
+    """
+    lines = 0
+    for path in paths:
+        if not path.exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    logger.warning("⚠️ 丢弃不完整的行: %s", path)
+                    continue
+                try:
+                    json.loads(line)
+                except ValueError:
+                    logger.warning("⚠️ 丢弃无法解析的行: %s", path)
+                    continue
+                output.write(line)
+                lines += 1
+    output.flush()
+    return lines
+
+
+@dataclass
+class ShardTask:
+    """一个分片的爬取参数（传给工作进程，需要可以pickle）"""
+    index: int
+    input_path: Path
+    output_path: Path
+    checkpoint_path: Optional[Path] = None
+    threads: int = SHARD_THREADS
+    profile: str = "full"
+    fan_out: bool = False
+    all_swatches: bool = False
+    streaming_decode: bool = False
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    rate_share: float = 1.0
+    # 所有进程合计的最高速率（请求/秒），为空时为RATE_LIMIT_MAX_RATE
+    total_rate: Optional[float] = None
+    quiet: bool = False
+    # 测试/基准时替换API客户端（必须是模块级函数），为空时使用NewPumaGraphQLAPI
+    api_factory: Optional[Callable[[], NewPumaGraphQLAPI]] = None
+
+
+def run_shard(task: ShardTask) -> BatchStats:
+    """工作进程入口：爬取一个分片，结果追加到该分片的输出文件"""
+    # 每个进程是独立的入口：单独配置日志，只分到总速率的rate_share
+    setup_logging(quiet=task.quiet or None, stream=sys.stderr)
+    total_rate = task.total_rate or RATE_LIMIT_MAX_RATE
+    configure_default_limiter(initial_rate=min(RATE_LIMIT_INITIAL_RATE, total_rate) * task.rate_share,
+                              min_rate=min(RATE_LIMIT_MIN_RATE, total_rate) * task.rate_share,
+                              max_rate=total_rate * task.rate_share,
+                              burst=max(1.0, RATE_LIMIT_BURST * task.rate_share))
+    http_transport.configure_transport(pool_maxsize=max(task.threads, 1))
+
+    api = task.api_factory() if task.api_factory else NewPumaGraphQLAPI(streaming_decode=task.streaming_decode)
+    checkpoint = CrawlCheckpoint(task.checkpoint_path) if task.checkpoint_path else None
+    runner = BatchRunner(api, workers=task.threads, profile=task.profile, checkpoint=checkpoint,
+                         max_attempts=task.max_attempts, fan_out=task.fan_out, all_swatches=task.all_swatches)
+    logger.info("🚀 分片%s开始（进程%s）", task.index, os.getpid())
+    if checkpoint and task.output_path.exists():
+        ensure_trailing_newline(task.output_path)
+    with open(task.input_path, 'r', encoding='utf-8') as input_file, \
+            open(task.output_path, 'a' if checkpoint else 'w', encoding='utf-8') as output_file:
+        stats = runner.run(read_urls(input_file), output=output_file)
+    logger.info("✅ 分片%s完成: %s", task.index, stats.summary())
+    return stats
+
+
+def combine_stats(parts: Iterable[BatchStats], elapsed: float) -> BatchStats:
+    """合并各分片的统计，耗时为整体的墙钟时间"""
+    combined = BatchStats(elapsed=elapsed)
+    for part in parts:
+        combined.total += part.total
+        combined.succeeded += part.succeeded
+        combined.failed += part.failed
+        combined.skipped += part.skipped
+        combined.retried += part.retried
+        combined.latencies.extend(part.latencies)
+    return combined
+
+
+class ShardedCrawl:
+    """把URL按商品ID分片，由多个进程并行爬取，最后合并结果"""
+
+    def __init__(self, work_dir: Path, shards: Optional[int] = None, processes: Optional[int] = SHARD_PROCESSES,
+                 checkpoint_name: Optional[str] = None, checkpoint_dir: Optional[Path] = None,
+                 total_rate: Optional[float] = None, **task_options):
+        """
+        Args:
+            work_dir: 分片URL和分片结果所在的目录
+            shards: 分片数，默认等于进程数；分片多于进程时由进程池轮流处理，负载更均衡。
+                    断点续爬时分片数必须与上次相同（断点按分片保存）
+            processes: 工作进程数，默认为CPU核数
+            checkpoint_name: 断点名称，每个分片一个断点文件（<名称>-shardNNofMM.jsonl）
+            checkpoint_dir: 断点文件所在目录，默认data/checkpoints
+            total_rate: 所有进程合计对上游的最高请求速率（请求/秒），由同时运行的进程平分；
+                        默认为RATE_LIMIT_MAX_RATE，即与单进程爬取的上限相同
+            task_options: ShardTask的其它参数（threads、profile、fan_out等）
+        """
+        self.work_dir = Path(work_dir)
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.shards = max(1, shards or self.processes)
+        self.checkpoint_name = checkpoint_name
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.total_rate = total_rate
+        self.task_options = task_options
+
+    def _tasks(self, input_paths: List[Path]) -> List[ShardTask]:
+        # 所有进程共享同一个上游，每个进程的限速只占总速率的一部分
+        rate_share = 1.0 / min(self.processes, self.shards)
+        tasks = []
+        for index, input_path in enumerate(input_paths):
+            checkpoint_path = None
+            if self.checkpoint_name:
+                name = f"{self.checkpoint_name}-shard{index:02d}of{self.shards:02d}"
+                checkpoint_path = (self.checkpoint_dir / f"{name}.jsonl" if self.checkpoint_dir
+                                   else get_checkpoint_path(name))
+            tasks.append(ShardTask(index=index, input_path=input_path,
+                                   output_path=self.work_dir / f"shard-{index:02d}.jsonl",
+                                   checkpoint_path=checkpoint_path, rate_share=rate_share,
+                                   total_rate=self.total_rate, **self.task_options))
+        return tasks
+
+    def run(self, urls: Iterable[str], output: IO[str]) -> BatchStats:
+        """
+        分片、并行爬取并合并结果
+
+        某个分片的进程异常退出时记录错误，其它分片照常完成和合并；
+        有断点时重新运行同样的命令只会爬取未完成的商品。
+        """
+        start = time.monotonic()
+        input_paths = partition_urls(urls, self.work_dir, self.shards)
+        tasks = self._tasks(input_paths)
+        logger.info("📦 %s个分片，%s个进程，合计限速%s请求/秒，工作目录: %s", self.shards, self.processes,
+                    self.total_rate or RATE_LIMIT_MAX_RATE, self.work_dir)
+
+        parts = []
+        # spawn：子进程不继承父进程的线程、锁和连接池
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(self.processes, self.shards), mp_context=context) as executor:
+            futures = {executor.submit(run_shard, task): task for task in tasks}
+            for future in as_completed(futures):
+                try:
+                    parts.append(future.result())
+                except Exception as e:
+                    logger.error("❌ 分片%s失败: %s", futures[future].index, e)
+
+        merged = merge_outputs((task.output_path for task in tasks), output)
+        logger.info("💾 已合并%s行结果", merged)
+        return combine_stats(parts, time.monotonic() - start)
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='PUMA商品信息多进程分片爬取')
+    parser.add_argument('input', nargs='?', default='-', help='URL文件，每行一个，"-"表示标准输入')
+    parser.add_argument('--output', '-o', help='合并后的结果文件（JSON Lines），默认写到data/outputs')
+    parser.add_argument('--processes', type=int, default=SHARD_PROCESSES, help='工作进程数（默认CPU核数）')
+    parser.add_argument('--shards', type=int, help='分片数（默认等于进程数）')
+    parser.add_argument('--threads', type=int, default=SHARD_THREADS, help='每个进程内同时爬取的商品数')
+    parser.add_argument('--total-rate', type=float,
+                        help=f'所有进程合计的最高请求速率（请求/秒），由各进程平分；'
+                             f'默认{RATE_LIMIT_MAX_RATE:g}，与单进程相同，增加进程不会提高请求速率')
+    parser.add_argument('--work-dir', help='分片文件目录（默认data/outputs/shards_<时间>或shards_<断点名称>）')
+    parser.add_argument('--profile', default='full', help='查询档位: full/pricing/inventory/media')
+    parser.add_argument('--fan-out', action='store_true', help='同一商品的多个swatch URL只请求一次')
+    parser.add_argument('--all-swatches', action='store_true', help='为每个商品的所有颜色输出记录')
+    parser.add_argument('--streaming-decode', action='store_true', help='增量解码PDP响应（降低内存）')
+    parser.add_argument('--checkpoint', help='断点名称，每个分片一个断点文件，重新运行时跳过已完成的商品')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS, help='每个商品最多尝试的次数')
+    parser.add_argument('--quiet', action='store_true', help='只输出警告和错误日志')
+    args = parser.parse_args()
+
+    setup_logging(quiet=args.quiet or None, stream=sys.stderr)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    work_dir = Path(args.work_dir) if args.work_dir else get_output_path(
+        f"shards_{args.checkpoint or timestamp}")
+    output_path = args.output or get_output_path(f"sharded_{timestamp}.jsonl")
+
+    crawl = ShardedCrawl(work_dir, shards=args.shards, processes=args.processes, checkpoint_name=args.checkpoint,
+                         total_rate=args.total_rate,
+                         threads=args.threads, profile=args.profile, fan_out=args.fan_out,
+                         all_swatches=args.all_swatches, streaming_decode=args.streaming_decode,
+                         max_attempts=args.max_attempts, quiet=args.quiet)
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    try:
+        with open(output_path, 'w', encoding='utf-8') as output_file:
+            stats = crawl.run(read_urls(input_file), output_file)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+
+    print(f"📊 {stats.summary()}", file=sys.stderr)
+    print(f"💾 结果已保存: {output_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+站点地图发现
+遍历us.puma.com的站点地图索引和商品站点地图，用iterparse增量解析（处理完一个<url>就清掉），
+内存占用与站点地图大小无关。商品URL按NewPumaGraphQLAPI.extract_product_id相同的模式提取ID，
+去重后以流的形式输出；按lastmod优先处理最近更新的商品。是catalog_discovery之外的第二个发现来源。
+
+用法:
+    python sitemap_discovery.py --output urls.txt
+    python sitemap_discovery.py --since 2025-08-01 --output - | python batch_runner.py - --output results.jsonl
+    python sitemap_discovery.py --base-dir data/fixtures/sitemap --prioritize
+    python sitemap_discovery.py --scrape --checkpoint sitemap
+"""
+
+import argparse
+import gzip
+import io
+import logging
+import os
+import sys
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+import http_transport
+from batch_runner import BatchRunner
+from catalog_discovery import DiscoveredProduct
+from checkpoint import CrawlCheckpoint
+from config import (DEFAULT_TIMEOUT, SITEMAP_INDEX_URL, SITEMAP_MAX_DEPTH,
+                    get_checkpoint_path, get_output_path)
+from log_config import setup_logging
+from new_puma_graphql_api import NewPumaGraphQLAPI, match_product_id
+
+logger = logging.getLogger(__name__)
+
+# gzip文件头（.xml.gz站点地图）
+_GZIP_MAGIC = b'\x1f\x8b'
+
+# 商品详情页的路径片段，其它页面（分类、内容页等）直接跳过
+PRODUCT_PATH_MARKER = '/pd/'
+
+
+@dataclass(frozen=True)
+class SitemapEntry:
+    """站点地图中的一条记录：kind为"sitemap"（索引中的子站点地图）或"url"（页面）"""
+    kind: str
+    loc: str
+    lastmod: Optional[datetime]
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """解析W3C日期时间（2025-08-25、2025-08-25T10:00:00Z、带时区偏移），统一为UTC，无法解析时返回None"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _local_name(tag: str) -> str:
+    """去掉命名空间：{http://www.sitemaps.org/schemas/sitemap/0.9}url -> url"""
+    return tag.rpartition('}')[2]
+
+
+def _maybe_gunzip(stream: BinaryIO) -> BinaryIO:
+    """按文件头判断是否gzip压缩，是则边读边解压"""
+    if not hasattr(stream, 'peek'):
+        stream = io.BufferedReader(stream)
+    if stream.peek(2)[:2] == _GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def iter_sitemap(stream: BinaryIO) -> Iterator[SitemapEntry]:
+    """
+    增量解析站点地图（<urlset>或<sitemapindex>），逐条输出记录
+
+    只保留当前正在解析的<url>/<sitemap>元素，输出后立即从根元素上清掉，内存占用保持不变。
+    """
+    events = ET.iterparse(_maybe_gunzip(stream), events=('start', 'end'))
+    root = None
+    for event, element in events:
+        if root is None:
+            root = element
+            continue
+        if event != 'end':
+            continue
+        name = _local_name(element.tag)
+        if name not in ('url', 'sitemap'):
+            continue
+        loc = lastmod = None
+        for child in element:
+            child_name = _local_name(child.tag)
+            if child_name == 'loc':
+                loc = (child.text or '').strip()
+            elif child_name == 'lastmod':
+                lastmod = parse_lastmod(child.text)
+        root.clear()
+        if loc:
+            yield SitemapEntry(name, loc, lastmod)
+
+
+def swatch_from_url(url: str) -> str:
+    """URL查询参数中的swatch（与NewPumaGraphQLAPI.extract_swatch_from_url一致），没有时为空字符串"""
+    return (parse_qs(urlsplit(url).query).get('swatch') or [''])[0]
+
+
+def _newest_first(entries: List[SitemapEntry]) -> List[SitemapEntry]:
+    """按lastmod从新到旧排序，没有lastmod的排在最后（保持原顺序）"""
+    dated = sorted((entry for entry in entries if entry.lastmod), key=lambda entry: entry.lastmod, reverse=True)
+    return dated + [entry for entry in entries if not entry.lastmod]
+
+
+class SitemapDiscovery:
+    """遍历站点地图索引，输出去重后的商品颜色流"""
+
+    def __init__(self, index_url: str = SITEMAP_INDEX_URL, since: Optional[datetime] = None,
+                 base_dir: Optional[str] = None, session=None, max_depth: int = SITEMAP_MAX_DEPTH,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """
+        Args:
+            index_url: 站点地图索引（或单个商品站点地图）的URL或本地路径
+            since: 只输出lastmod不早于该时间的商品（没有lastmod的照常输出）
+            base_dir: 离线模式：按URL的文件名从该目录读取站点地图，不发请求
+            session: 请求站点地图使用的session，默认使用共享连接池（同样经过限速）
+            max_depth: 站点地图索引最多嵌套的层数
+            timeout: 请求超时（秒）
+        """
+        self.index_url = index_url
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        self.since = since
+        self.base_dir = base_dir
+        self.session = session
+        self.max_depth = max_depth
+        self.timeout = timeout
+
+    def _local_path(self, location: str) -> Optional[str]:
+        if self.base_dir:
+            return os.path.join(self.base_dir, os.path.basename(urlsplit(location).path))
+        if not location.startswith(('http://', 'https://')):
+            return location
+        return None
+
+    @contextmanager
+    def _open(self, location: str) -> Iterator[BinaryIO]:
+        """打开站点地图的字节流（本地文件直接读取，远程按块流式读取，不整体载入内存）"""
+        path = self._local_path(location)
+        if path is not None:
+            with open(path, 'rb') as stream:
+                yield stream
+            return
+        session = self.session or http_transport.get_session()
+        response = session.get(location, stream=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            # 让urllib3按Content-Encoding解压；文件本身是.gz时由_maybe_gunzip处理
+            response.raw.decode_content = True
+            yield response.raw
+        finally:
+            response.close()
+
+    def iter_entries(self, location: str) -> Iterator[SitemapEntry]:
+        """
+        遍历location及其引用的子站点地图，输出其中的页面记录
+
+        子站点地图按lastmod从新到旧访问；lastmod早于since的子站点地图整体跳过。
+        单个站点地图下载或解析失败只记录错误，继续处理其它站点地图。
+        """
+        visited = set()
+        yield from self._walk(location, 0, visited)
+
+    def _walk(self, location: str, depth: int, visited: set) -> Iterator[SitemapEntry]:
+        if location in visited:
+            return
+        visited.add(location)
+        children: List[SitemapEntry] = []
+        count = 0
+        try:
+            with self._open(location) as stream:
+                for entry in iter_sitemap(stream):
+                    if entry.kind == 'sitemap':
+                        # 索引只有几十条记录，先收集起来再按lastmod排序
+                        children.append(entry)
+                    else:
+                        count += 1
+                        yield entry
+        except (OSError, ET.ParseError, requests.RequestException) as e:
+            logger.error("❌ 读取站点地图失败 %s: %s", location, e)
+            return
+        if count:
+            logger.info("✅ 站点地图 %s: %s条记录", location, count)
+
+        if children and depth >= self.max_depth:
+            logger.warning("⚠️ 站点地图嵌套超过%s层，跳过: %s", self.max_depth, location)
+            return
+        for child in _newest_first(children):
+            if self.since and child.lastmod and child.lastmod < self.since:
+                logger.debug("⏭️ 站点地图%s未更新（%s），跳过", child.loc, child.lastmod.isoformat())
+                continue
+            yield from self._walk(child.loc, depth + 1, visited)
+
+    def _products(self) -> Iterator[Tuple[Optional[datetime], DiscoveredProduct]]:
+        source = f"sitemap:{os.path.basename(urlsplit(self.index_url).path) or self.index_url}"
+        seen = set()
+        for entry in self.iter_entries(self.index_url):
+            if PRODUCT_PATH_MARKER not in entry.loc:
+                continue
+            if self.since and entry.lastmod and entry.lastmod < self.since:
+                continue
+            product_id = match_product_id(entry.loc)
+            if not product_id:
+                logger.debug("⚠️ 无法从站点地图URL提取商品ID: %s", entry.loc)
+                continue
+            swatch = swatch_from_url(entry.loc)
+            key = (product_id, swatch)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield entry.lastmod, DiscoveredProduct(product_id, swatch, entry.loc, source)
+        logger.info("📊 站点地图共发现%s个商品颜色", len(seen))
+
+    def discover(self, prioritize: bool = False) -> Iterator[DiscoveredProduct]:
+        """
+        输出站点地图中去重后的商品颜色
+
+        Args:
+            prioritize: 为True时先读完全部站点地图，再严格按lastmod从新到旧输出
+                        （需要缓存所有商品）；默认边解析边输出，只按子站点地图的lastmod排序
+        """
+        if not prioritize:
+            for _, discovered in self._products():
+                yield discovered
+            return
+        products = list(self._products())
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+        products.sort(key=lambda item: item[0] or oldest, reverse=True)
+        for _, discovered in products:
+            yield discovered
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='PUMA商品发现（站点地图）')
+    parser.add_argument('--index', default=SITEMAP_INDEX_URL, help='站点地图索引的URL或本地路径')
+    parser.add_argument('--base-dir', help='离线模式：从该目录按文件名读取站点地图')
+    parser.add_argument('--since', help='只输出该日期之后更新的商品，例如2025-08-01')
+    parser.add_argument('--prioritize', action='store_true', help='读完全部站点地图后按lastmod从新到旧输出')
+    parser.add_argument('--output', '-o', default='-', help='URL输出文件，"-"表示标准输出')
+    parser.add_argument('--scrape', action='store_true', help='直接交给批量爬取（见batch_runner.py）')
+    parser.add_argument('--scrape-workers', type=int, default=4, help='批量爬取的并发数')
+    parser.add_argument('--checkpoint', help='批量爬取的断点名称')
+    parser.add_argument('--quiet', action='store_true', help='只输出警告和错误日志')
+    args = parser.parse_args()
+
+    setup_logging(quiet=args.quiet or None, stream=sys.stderr)
+    since = None
+    if args.since:
+        since = parse_lastmod(args.since)
+        if since is None:
+            parser.error(f"无法解析日期: {args.since}")
+    discovery = SitemapDiscovery(args.index, since=since, base_dir=args.base_dir)
+    urls = (discovered.url for discovered in discovery.discover(prioritize=args.prioritize))
+
+    if args.scrape:
+        checkpoint = CrawlCheckpoint(get_checkpoint_path(args.checkpoint)) if args.checkpoint else None
+        output_path = args.output if args.output != '-' else get_output_path(
+            f"sitemap_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        with open(output_path, 'a', encoding='utf-8') as output:
+            stats = BatchRunner(NewPumaGraphQLAPI(), workers=args.scrape_workers,
+                                checkpoint=checkpoint).run(urls, output=output)
+        print(f"📊 {stats.summary()}", file=sys.stderr)
+        print(f"💾 结果已保存: {output_path}", file=sys.stderr)
+        return
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for url in urls:
+            output.write(url + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,8 @@ Puma商品页面尺码分析器
 分析页面中的所有尺码相关元素
 """
 
-import requests
-from bs4 import BeautifulSoup
+import http_transport
+from html_parser import make_soup
 import json
 import re
 
@@ -23,10 +23,10 @@ def analyze_sizes(url):
     
     try:
         print(f"🔍 分析页面尺码: {url}")
-        response = requests.get(url, headers=headers, timeout=30)
+        response = http_transport.get(url, headers=headers, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content)
         print("✅ 页面获取成功，开始分析尺码...")
         
         # 1. 查找所有可能包含尺码的元素
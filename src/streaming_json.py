@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDP响应的增量JSON解码
+颜色多的商品variations数组很大，逐个解码变体，只完整保留选中的变体，
+其余变体解码后立即压缩为摘要，降低批量爬取时的峰值内存。
+
+响应体可以是字节串，也可以是按块产生字节的迭代器（如stream=True时的response.iter_content）。
+安装了ijson时边读边解码，整个响应体不会同时驻留内存；未安装时拼接完整响应体后json.loads再压缩
+（只降低常驻内存）。
+"""
+
+import io
+import json
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    import ijson
+    ijson_available = True
+except ImportError:
+    ijson = None
+    ijson_available = False
+
+# 变体摘要保留的字段：足够列出颜色/价格/可售状态，不含图片、产品故事、尺码等大字段
+VARIATION_SUMMARY_FIELDS = (
+    'id', 'masterId', 'variantId', 'name', 'price', 'salePrice', 'productPrice',
+    'colorValue', 'colorName', 'styleNumber', 'ean', 'preview', 'orderable',
+)
+
+# 单商品查询中variations数组元素的ijson前缀
+VARIATION_ITEM_PREFIX = 'data.product.variations.item'
+
+
+def summarize_variation(variation: Dict[str, Any]) -> Dict[str, Any]:
+    """将完整的变体数据压缩为摘要"""
+    return {key: variation[key] for key in VARIATION_SUMMARY_FIELDS if key in variation}
+
+
+class _VariationCollector:
+    """
+    收集变体：选中的变体（与swatch匹配，没有匹配时为第一个）保持完整，其余只保留摘要
+
+    选择规则与NewPumaGraphQLAPI.find_matching_variation一致。
+    """
+
+    def __init__(self, swatch_code: str = "", keep_full_variations: bool = False):
+        self.swatch_code = swatch_code
+        self.keep_full_variations = keep_full_variations
+        self.variations: List[Dict[str, Any]] = []
+        self._first_full: Optional[Dict[str, Any]] = None
+        self._matched = False
+
+    def add(self, variation: Optional[Dict[str, Any]]) -> None:
+        if variation is None:
+            return
+        if self.keep_full_variations:
+            self.variations.append(variation)
+            return
+        if not self.variations:
+            # 先完整保留第一个变体，找到匹配的变体后再压缩
+            self._first_full = variation
+            self.variations.append(variation)
+            if self.swatch_code and variation.get('colorValue', '') == self.swatch_code:
+                self._matched = True
+            return
+        if self.swatch_code and not self._matched and variation.get('colorValue', '') == self.swatch_code:
+            self._matched = True
+            self.variations[0] = summarize_variation(self._first_full)
+            self._first_full = None
+            self.variations.append(variation)
+            return
+        self.variations.append(summarize_variation(variation))
+
+
+class _ChunkReader:
+    """把按块产生字节的迭代器包装成ijson需要的只读文件对象"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _decode_with_ijson(body: Union[bytes, Iterable[bytes]], collector: _VariationCollector) -> Dict[str, Any]:
+    builder = ijson.ObjectBuilder()
+    item_builder = None
+    source = io.BytesIO(body) if isinstance(body, (bytes, bytearray)) else _ChunkReader(body)
+    for prefix, event, value in ijson.parse(source, use_float=True):
+        if prefix == VARIATION_ITEM_PREFIX and event in ('start_map', 'end_map', 'null'):
+            if event == 'start_map':
+                item_builder = ijson.ObjectBuilder()
+                item_builder.event(event, value)
+            elif event == 'end_map':
+                item_builder.event(event, value)
+                collector.add(item_builder.value)
+                item_builder = None
+            continue
+        if item_builder is not None:
+            item_builder.event(event, value)
+        else:
+            builder.event(event, value)
+    return builder.value
+
+
+def decode_product_response(body: Union[bytes, Iterable[bytes]], swatch_code: str = "",
+                            keep_full_variations: bool = False) -> Dict[str, Any]:
+    """
+    解码单商品GraphQL响应体
+
+    Args:
+        body: 响应体字节，或按块产生响应体字节的迭代器
+        swatch_code: URL中的swatch参数，用于确定需要完整保留的变体
+        keep_full_variations: 为True时保留所有变体的完整数据
+
+    Returns:
+        与response.json()结构相同的字典，data.product.variations中未选中的变体为摘要
+
+    Raises:
+        ValueError: 响应体不是合法JSON（ijson的错误会转换为ValueError）
+    """
+    collector = _VariationCollector(swatch_code, keep_full_variations)
+
+    if ijson_available:
+        try:
+            data = _decode_with_ijson(body, collector)
+        except ijson.JSONError as e:
+            raise ValueError(f"JSON解析错误: {e}") from e
+    else:
+        if not isinstance(body, (bytes, bytearray)):
+            body = b"".join(body)
+        data = json.loads(body)
+        product = (data.get('data') or {}).get('product') if isinstance(data, dict) else None
+        for variation in (product or {}).get('variations') or []:
+            collector.add(variation)
+
+    product = (data.get('data') or {}).get('product') if isinstance(data, dict) else None
+    if isinstance(product, dict) and 'variations' in product and product['variations'] is not None:
+        product['variations'] = collector.variations
+    return data
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+认证token管理器
+解析SLAS JWT的exp声明，在过期前主动刷新；多个线程同时需要刷新时只执行一次刷新
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def decode_jwt_claims(token: str) -> Dict:
+    """解析JWT的payload部分（不校验签名），失败时返回空字典"""
+    try:
+        if token.startswith("Bearer "):
+            token = token[len("Bearer "):]
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload.encode('ascii')))
+    except (IndexError, ValueError, UnicodeDecodeError):
+        return {}
+
+
+class TokenManager:
+    """
+    线程安全的token管理器
+
+    auth_headers由调用方持有；refresh_func返回新的请求头，由管理器在锁内整体替换auth_headers的内容，
+    其他线程通过get_headers拿到的永远是刷新前或刷新后的完整请求头，不会读到刷新到一半的状态。
+    管理器负责决定何时刷新，并保证同一时刻只有一次刷新在进行。
+    """
+
+    def __init__(self, auth_headers: Dict[str, str], refresh_func: Callable[[], Optional[Dict[str, str]]],
+                 refresh_margin: float = 120, retry_interval: float = 60):
+        """
+        Args:
+            auth_headers: 认证请求头字典（authorization、refresh-token等）
+            refresh_func: 刷新函数，成功时返回新的认证请求头字典，失败时返回None或False（不应修改auth_headers）
+            refresh_margin: 距离过期多少秒时开始提前刷新
+            retry_interval: 刷新失败后多少秒内不再主动重试
+        """
+        self.auth_headers = auth_headers
+        self.refresh_func = refresh_func
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+
+        self._condition = threading.Condition()
+        self._refreshing = False
+        self._last_result = False
+        self._last_attempt_at = 0.0
+        self._generation = 0
+
+        self._stop_event = threading.Event()
+        self._background_thread: Optional[threading.Thread] = None
+
+    @property
+    def generation(self) -> int:
+        """token版本号，每次刷新成功后加一"""
+        return self._generation
+
+    def get_expiry(self) -> Optional[float]:
+        """当前access token的过期时间戳，无法解析时返回None"""
+        exp = decode_jwt_claims(self.auth_headers.get("authorization", "")).get("exp")
+        return float(exp) if isinstance(exp, (int, float)) else None
+
+    def seconds_until_refresh(self) -> Optional[float]:
+        """距离需要刷新还有多少秒（负数表示已经需要刷新）"""
+        expiry = self.get_expiry()
+        if expiry is None:
+            return None
+        return expiry - self.refresh_margin - time.time()
+
+    def needs_refresh(self) -> bool:
+        """token即将过期且最近没有尝试过刷新时返回True"""
+        remaining = self.seconds_until_refresh()
+        if remaining is None or remaining > 0:
+            return False
+        # 刷新失败（或刷新得到的token仍然过期）时，retry_interval内不再重复尝试
+        return time.time() - self._last_attempt_at >= self.retry_interval
+
+    def get_headers(self) -> Dict[str, str]:
+        """获取可用的认证请求头，必要时先刷新"""
+        generation = self._generation
+        if self.needs_refresh():
+            logger.info("⏰ 认证token即将过期，提前刷新...")
+            self.refresh(generation)
+        with self._condition:
+            return dict(self.auth_headers)
+
+    def refresh(self, seen_generation: Optional[int] = None) -> bool:
+        """
+        刷新token；已有刷新在进行时等待并共享它的结果
+
+        Args:
+            seen_generation: 调用方发出请求时的token版本号。如果在此之后已经有其他线程
+                刷新成功，则直接返回True，不再重复刷新
+        """
+        with self._condition:
+            if seen_generation is not None and seen_generation != self._generation:
+                return True
+            if self._refreshing:
+                while self._refreshing:
+                    self._condition.wait()
+                return self._last_result
+            self._refreshing = True
+
+        new_headers = None
+        try:
+            new_headers = self.refresh_func()
+        except Exception as e:
+            logger.error("❌ 刷新token时发生错误: %s", e)
+        finally:
+            result = isinstance(new_headers, dict) and bool(new_headers)
+            with self._condition:
+                if result:
+                    # 保持字典对象不变（调用方持有同一个引用），在锁内一次性替换内容
+                    self.auth_headers.clear()
+                    self.auth_headers.update(new_headers)
+                    self._generation += 1
+                self._refreshing = False
+                self._last_result = result
+                self._last_attempt_at = time.time()
+                self._condition.notify_all()
+        return result
+
+    def invalidate(self, seen_generation: int) -> bool:
+        """服务端返回UNAUTHENTICATED时调用，返回是否已有可用的新token"""
+        return self.refresh(seen_generation)
+
+    def start_background_refresh(self) -> None:
+        """启动后台线程，在token过期前自动刷新"""
+        if self._background_thread and self._background_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._background_thread = threading.Thread(
+            target=self._background_loop, name="puma-token-refresh", daemon=True
+        )
+        self._background_thread.start()
+
+    def stop_background_refresh(self) -> None:
+        """停止后台刷新线程"""
+        self._stop_event.set()
+
+    def _background_loop(self) -> None:
+        while not self._stop_event.is_set():
+            remaining = self.seconds_until_refresh()
+            if remaining is not None and remaining <= 0:
+                self.refresh()
+                remaining = self.seconds_until_refresh()
+            # 无法解析过期时间或刷新后仍需刷新时，按retry_interval定期检查
+            wait_seconds = remaining if remaining is not None and remaining > 0 else self.retry_interval
+            self._stop_event.wait(wait_seconds)
@@ -5,17 +5,18 @@ Puma商品尺码信息获取通用方法
 基于真实的GraphQL API请求分析
 """
 
-import requests
 import json
 import re
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 
+import http_transport
+
 class PumaSizeExtractor:
     """Puma尺码信息提取器 - 通用解决方案"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = http_transport.create_session()
         self.graphql_url = "https://us.puma.com/api/graphql"
         
         # 基础请求头
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取工作队列
+生产者（目录/站点地图发现、定期重爬）把商品放入队列，多个消费者进程租用任务、
+调用NewPumaGraphQLAPI.scrape_product，成功后确认，失败后按退避时间重新可见。
+同一商品（商品ID + swatch）重复入队只保留一条；租约超时未确认的任务自动重新可见，
+消费者崩溃不会丢任务。
+
+默认后端SQLiteWorkQueue保存在本地数据库文件中（WAL模式，同一台机器上的多个进程可以共享）。
+消费者分布在多台机器上时，换成Redis、Postgres等多机共享的后端，只需要实现以下方法：
+    enqueue(items, priority=0, recrawl=False) -> int   入队，返回新入队的数量
+    lease(owner, visibility_timeout) -> Optional[WorkItem]   租用一个任务
+    ack(item) -> bool                                  确认完成（租约已失效时返回False）
+    nack(item, error, delay) -> bool                   标记失败，delay秒后重新可见
+    counts() -> Dict[str, int]                         各状态的任务数
+
+用法:
+    python catalog_discovery.py --all-categories | python work_queue.py enqueue - --queue nightly
+    python work_queue.py work --queue nightly --workers 4 --output results.jsonl
+    python work_queue.py stats --queue nightly
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from batch_runner import DEFAULT_WORKERS, BatchRunner, BatchStats, read_urls
+from checkpoint import DEFAULT_MAX_ATTEMPTS
+from config import (WORK_QUEUE_POLL_INTERVAL, WORK_QUEUE_VISIBILITY_TIMEOUT, get_output_path,
+                    get_queue_path)
+from log_config import setup_logging
+from new_puma_graphql_api import NewPumaGraphQLAPI, match_product_id
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_DEAD = "dead"      # 用完尝试次数，不再租出
+
+# 失败后重新可见前的等待时间（秒），按尝试次数指数增长
+DEFAULT_RETRY_DELAY = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    product_id  TEXT NOT NULL,
+    swatch      TEXT NOT NULL DEFAULT '',
+    url         TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    priority    INTEGER NOT NULL DEFAULT 0,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    visible_at  REAL NOT NULL,
+    lease_token TEXT,
+    lease_owner TEXT,
+    error       TEXT,
+    enqueued_at REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (product_id, swatch)
+);
+CREATE INDEX IF NOT EXISTS work_items_ready ON work_items (status, visible_at, priority);
+"""
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    """一个租出的任务：lease_token用于确认，租约过期后再次租出会换新的token"""
+    product_id: str
+    swatch: str
+    url: str
+    attempts: int
+    lease_token: str
+
+
+def work_key(url: str) -> Tuple[str, str]:
+    """任务的去重键：(商品ID, swatch)，提取不到商品ID时使用URL"""
+    swatch = ""
+    if 'swatch=' in url:
+        swatch = url.split('swatch=', 1)[1].split('&', 1)[0]
+    return match_product_id(url) or url, swatch
+
+
+class SQLiteWorkQueue:
+    """SQLite实现的工作队列（线程安全；多个进程通过同一个数据库文件共享）"""
+
+    def __init__(self, path: Union[str, Path], max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            path: 数据库文件路径（":memory:"只在本连接内有效，用于测试）
+            max_attempts: 每个任务最多租出的次数，用完后标记为dead
+            clock: 墙钟时间（多个进程共享租约时间，不能用单调时钟；测试时可替换）
+        """
+        self.path = str(path)
+        self.max_attempts = max(1, max_attempts)
+        self._clock = clock
+        self._lock = threading.Lock()
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None：自己用BEGIN IMMEDIATE控制事务，租用时先拿写锁，避免两个进程租到同一个任务
+        self._conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def enqueue(self, items: Iterable[Union[str, Tuple[str, str, str]]], priority: int = 0,
+                recrawl: bool = False) -> int:
+        """
+        入队，同一商品（商品ID + swatch）已在队列中时合并为一条
+
+        Args:
+            items: 商品URL，或 (商品ID, swatch, URL)
+            priority: 优先级，越大越先租出；合并时保留较大的优先级
+            recrawl: 重新爬取：已完成或已放弃的同一商品重新变为待处理（定期重爬用）
+
+        Returns:
+            新入队（含recrawl重新打开）的任务数
+        """
+        now = self._clock()
+        rows = []
+        for item in items:
+            if isinstance(item, str):
+                product_id, swatch = work_key(item)
+                rows.append((product_id, swatch, item))
+            else:
+                rows.append(tuple(item))
+        if not rows:
+            return 0
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(f"""
+                INSERT INTO work_items (product_id, swatch, url, status, priority, visible_at, enqueued_at, updated_at)
+                VALUES (?, ?, ?, '{STATUS_PENDING}', ?, ?, ?, ?)
+                ON CONFLICT (product_id, swatch) DO NOTHING
+            """, [(product_id, swatch, url, priority, now, now, now) for product_id, swatch, url in rows])
+            added = conn.total_changes - before
+            keys = [(product_id, swatch) for product_id, swatch, _ in rows]
+            if recrawl:
+                before = conn.total_changes
+                conn.executemany(f"""
+                    UPDATE work_items SET status = '{STATUS_PENDING}', attempts = 0, visible_at = ?, error = NULL,
+                        updated_at = ?
+                    WHERE product_id = ? AND swatch = ? AND status IN ('{STATUS_DONE}', '{STATUS_DEAD}')
+                """, [(now, now, product_id, swatch) for product_id, swatch in keys])
+                added += conn.total_changes - before
+            # 合并的任务保留较大的优先级
+            conn.executemany("""
+                UPDATE work_items SET priority = ? WHERE product_id = ? AND swatch = ? AND priority < ?
+            """, [(priority, product_id, swatch, priority) for product_id, swatch in keys])
+        logger.debug("📥 入队%s个，新任务%s个", len(rows), added)
+        return added
+
+    def lease(self, owner: str = "", visibility_timeout: float = WORK_QUEUE_VISIBILITY_TIMEOUT
+              ) -> Optional[WorkItem]:
+        """
+        租用优先级最高、最早入队的可见任务，visibility_timeout秒内没有确认则重新可见
+
+        租约过期且已用完尝试次数的任务在这里标记为dead。
+        """
+        now = self._clock()
+        with self._transaction() as conn:
+            conn.execute(f"""
+                UPDATE work_items SET status = '{STATUS_DEAD}', lease_token = NULL, updated_at = ?,
+                    error = COALESCE(error, '租约超时')
+                WHERE status = '{STATUS_LEASED}' AND visible_at <= ? AND attempts >= ?
+            """, (now, now, self.max_attempts))
+            row = conn.execute(f"""
+                SELECT product_id, swatch, url, attempts FROM work_items
+                WHERE status IN ('{STATUS_PENDING}', '{STATUS_LEASED}') AND visible_at <= ?
+                ORDER BY priority DESC, visible_at, enqueued_at
+                LIMIT 1
+            """, (now,)).fetchone()
+            if row is None:
+                return None
+            token = uuid.uuid4().hex
+            conn.execute(f"""
+                UPDATE work_items SET status = '{STATUS_LEASED}', attempts = attempts + 1, visible_at = ?,
+                    lease_token = ?, lease_owner = ?, updated_at = ?
+                WHERE product_id = ? AND swatch = ?
+            """, (now + visibility_timeout, token, owner, now, row['product_id'], row['swatch']))
+        return WorkItem(row['product_id'], row['swatch'], row['url'], row['attempts'] + 1, token)
+
+    def ack(self, item: WorkItem) -> bool:
+        """确认完成；租约已过期并被其他消费者租走时返回False"""
+        with self._transaction() as conn:
+            cursor = conn.execute(f"""
+                UPDATE work_items SET status = '{STATUS_DONE}', lease_token = NULL, error = NULL, updated_at = ?
+                WHERE product_id = ? AND swatch = ? AND lease_token = ?
+            """, (self._clock(), item.product_id, item.swatch, item.lease_token))
+            return cursor.rowcount == 1
+
+    def nack(self, item: WorkItem, error: Optional[str] = None, delay: Optional[float] = None) -> bool:
+        """
+        标记失败：delay秒后重新可见（默认按尝试次数指数退避），用完尝试次数时标记为dead
+
+        租约已失效时返回False
+        """
+        if delay is None:
+            delay = DEFAULT_RETRY_DELAY * 2 ** max(0, item.attempts - 1)
+        now = self._clock()
+        status = STATUS_DEAD if item.attempts >= self.max_attempts else STATUS_PENDING
+        with self._transaction() as conn:
+            cursor = conn.execute("""
+                UPDATE work_items SET status = ?, visible_at = ?, lease_token = NULL, error = ?, updated_at = ?
+                WHERE product_id = ? AND swatch = ? AND lease_token = ?
+            """, (status, now + delay, error, now, item.product_id, item.swatch, item.lease_token))
+            return cursor.rowcount == 1
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        with self._lock:
+            counts = {STATUS_PENDING: 0, STATUS_LEASED: 0, STATUS_DONE: 0, STATUS_DEAD: 0}
+            for status, count in self._conn.execute("SELECT status, COUNT(*) FROM work_items GROUP BY status"):
+                counts[status] = count
+            return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE事务：进入时拿到数据库写锁，异常时回滚"""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+
+class _LeasedURL(str):
+    """
+    带租约token的URL：原样经过BatchRunner，结果中的url仍是这个对象，
+    用来找到对应的租约（同一URL的租约过期后被本消费者再次租到时，两次租约可以同时在途）
+    """
+
+    lease_token: str
+
+    def __new__(cls, item: WorkItem) -> "_LeasedURL":
+        url = super().__new__(cls, item.url)
+        url.lease_token = item.lease_token
+        return url
+
+
+class QueueWorker:
+    """从工作队列租用任务，交给BatchRunner并发爬取，按结果确认或退回"""
+
+    def __init__(self, queue, api: Optional[NewPumaGraphQLAPI] = None, workers: int = DEFAULT_WORKERS,
+                 profile: str = "full", visibility_timeout: float = WORK_QUEUE_VISIBILITY_TIMEOUT,
+                 poll_interval: float = WORK_QUEUE_POLL_INTERVAL, wait: bool = False,
+                 owner: Optional[str] = None):
+        """
+        Args:
+            queue: 工作队列（SQLiteWorkQueue或实现了相同方法的其它后端）
+            api: 共享的API客户端，为空时新建
+            workers: 同时爬取的商品数（同时持有的租约最多为workers*2）
+            profile: 查询档位，见NewPumaGraphQLAPI.scrape_product
+            visibility_timeout: 租约时长（秒），应明显大于单个商品的爬取耗时
+            poll_interval: 队列为空时的轮询间隔（秒）
+            wait: 队列为空时继续等待新任务（常驻消费者）；为False时队列为空即退出
+            owner: 消费者标识，记录在租约上便于排查，默认为 主机名:进程号
+        """
+        self.queue = queue
+        self.runner = BatchRunner(api, workers=workers, profile=profile)
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.wait = wait
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        # 租约token -> 在途的任务
+        self._leases: Dict[str, WorkItem] = {}
+        self.stop_event = threading.Event()
+
+    def _leased_urls(self) -> Iterator[Optional[str]]:
+        """
+        BatchRunner取下一个URL时才租用，在途的任务数由BatchRunner控制
+
+        队列为空时：wait=False则结束；有在途任务时产生None，让BatchRunner先去确认完成的任务；
+        没有在途任务时才在这里按poll_interval等待。
+        """
+        while not self.stop_event.is_set():
+            item = self.queue.lease(self.owner, self.visibility_timeout)
+            if item is None:
+                if not self.wait:
+                    return
+                if self._leases:
+                    yield None
+                else:
+                    self.stop_event.wait(self.poll_interval)
+                continue
+            self._leases[item.lease_token] = item
+            yield _LeasedURL(item)
+
+    def _settle(self, result: dict) -> None:
+        item = self._leases.pop(getattr(result['url'], 'lease_token', None), None)
+        if item is None:
+            return
+        if result['success']:
+            settled = self.queue.ack(item)
+        else:
+            settled = self.queue.nack(item, result['error'])
+        if not settled:
+            logger.warning("⚠️ 租约已过期，结果未确认（任务可能已被其他消费者租走）: %s", result['url'])
+
+    def run(self, output: Optional[IO[str]] = None) -> BatchStats:
+        """消费队列直到为空（wait=False）或调用stop()，返回本消费者的统计"""
+        logger.info("🚀 消费者%s开始: %s", self.owner, self.queue.counts())
+        stats = self.runner.run(self._leased_urls(), output=output, on_result=self._settle,
+                                idle_timeout=self.poll_interval)
+        logger.info("📊 消费者%s结束: %s", self.owner, self.queue.counts())
+        return stats
+
+    def stop(self) -> None:
+        """不再租用新任务，在途的任务完成后run返回"""
+        self.stop_event.set()
+
+
+def _queue_path(value: str) -> Path:
+    return Path(value) if value.endswith('.db') else get_queue_path(value)
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='PUMA爬取工作队列（SQLite）')
+    parser.add_argument('--queue', default='default', help='队列名称（data/queues/<名称>.db）或.db文件路径')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS, help='每个任务最多尝试的次数')
+    parser.add_argument('--quiet', action='store_true', help='只输出警告和错误日志')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = commands.add_parser('enqueue', help='把URL放入队列')
+    enqueue_parser.add_argument('input', nargs='?', default='-', help='URL文件，每行一个，"-"表示标准输入')
+    enqueue_parser.add_argument('--priority', type=int, default=0, help='优先级，越大越先爬取')
+    enqueue_parser.add_argument('--recrawl', action='store_true', help='已完成的商品重新爬取')
+
+    work_parser = commands.add_parser('work', help='消费队列并爬取')
+    work_parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='同时爬取的商品数')
+    work_parser.add_argument('--profile', default='full', help='查询档位: full/pricing/inventory/media')
+    work_parser.add_argument('--visibility-timeout', type=float, default=WORK_QUEUE_VISIBILITY_TIMEOUT,
+                             help='租约时长（秒）')
+    work_parser.add_argument('--wait', action='store_true', help='队列为空时继续等待新任务')
+    work_parser.add_argument('--output', '-o', help='结果文件（JSON Lines，追加写入），"-"表示标准输出')
+
+    commands.add_parser('stats', help='输出各状态的任务数')
+    args = parser.parse_args()
+
+    to_stdout = getattr(args, 'output', None) == '-'
+    setup_logging(quiet=args.quiet or None, stream=sys.stderr)
+    queue = SQLiteWorkQueue(_queue_path(args.queue), max_attempts=args.max_attempts)
+    try:
+        if args.command == 'enqueue':
+            input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+            try:
+                added = 0
+                batch: List[str] = []
+                for url in read_urls(input_file):
+                    batch.append(url)
+                    if len(batch) >= 500:
+                        added += queue.enqueue(batch, args.priority, args.recrawl)
+                        batch = []
+                added += queue.enqueue(batch, args.priority, args.recrawl)
+            finally:
+                if input_file is not sys.stdin:
+                    input_file.close()
+            print(f"📥 新入队{added}个任务，队列状态: {queue.counts()}", file=sys.stderr)
+        elif args.command == 'work':
+            output_path = None if to_stdout else (
+                args.output or get_output_path(f"queue_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"))
+            output_file = sys.stdout if to_stdout else open(output_path, 'a', encoding='utf-8')
+            try:
+                worker = QueueWorker(queue, NewPumaGraphQLAPI(), workers=args.workers, profile=args.profile,
+                                     visibility_timeout=args.visibility_timeout, wait=args.wait)
+                try:
+                    stats = worker.run(output=output_file)
+                except KeyboardInterrupt:
+                    # 未确认的任务在租约过期后自动重新可见
+                    worker.stop()
+                    raise
+            finally:
+                if output_file is not sys.stdout:
+                    output_file.close()
+            print(f"📊 {stats.summary()}", file=sys.stderr)
+            if output_path:
+                print(f"💾 结果已保存: {output_path}", file=sys.stderr)
+        else:
+            print(json.dumps(queue.counts(), ensure_ascii=False))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试异步客户端（PDP与LazyPDP并发请求后合并、单个请求失败时的降级）
+"""
+
+import sys
+import os
+import asyncio
+import threading
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from async_puma_graphql_api import AsyncNewPumaGraphQLAPI
+from offline_api import fake_response, offline_api
+from retry_policy import RetryPolicy
+
+URL = "https://us.puma.com/us/en/pd/suede-xl/404299?swatch=02"
+
+PDP = {"id": "404299", "name": "Suede XL", "image": {"href": "a.jpg"}, "variations": [
+    {"id": "404299_01", "variantId": "40429901", "colorValue": "01", "images": [{"href": "a.jpg"}]},
+    {"id": "404299_02", "variantId": "40429902", "colorValue": "02", "images": [{"href": "b.jpg"}]},
+]}
+
+LAZY_PDP = {"id": "404299", "variations": [
+    {"id": "x", "variantId": f"4042990{i}", "sizeGroups": [{"sizes": [{"label": str(7 + i), "orderable": True}]}]}
+    for i in (1, 2)
+]}
+
+
+def _response(product, status_code=200):
+    return fake_response({"data": {"product": product}}, status_code)
+
+
+def _api(lazy_status=200):
+    """离线客户端：PDP和LazyPDP请求都要在屏障处汇合，串行发送时会超时失败"""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        barrier.wait()
+        if json["operationName"] == "LazyPDP":
+            return _response(LAZY_PDP, lazy_status)
+        return _response(PDP)
+
+    api_client = offline_api(retry_policy=RetryPolicy(max_attempts=1), use_category_tree=False)
+    api_client.session.post.side_effect = fake_post
+    api_client._resolve_breadcrumb = mock.Mock(return_value=([{"name": "Shoes"}], "Shoes"))
+    return api_client
+
+
+def _scrape(api_client):
+    async def run():
+        async with AsyncNewPumaGraphQLAPI(api_client, max_workers=4) as client:
+            return await client.scrape_product(URL)
+    return asyncio.run(run())
+
+
+def test_concurrent_requests_are_merged():
+    """测试PDP和LazyPDP并发发送，结果合并为与同步版本相同的ProductInfo"""
+    api_client = _api()
+    product_info = _scrape(api_client)
+
+    assert api_client.session.post.call_count == 2
+    assert product_info.name == "Suede XL"
+    assert product_info.variant_id == "40429902"
+    assert product_info.sizes == ["9"]
+    assert product_info.navigation_path == "Shoes"
+    assert product_info.url == URL
+
+
+def test_lazy_pdp_failure_degrades():
+    """测试LazyPDP失败（返回错误或抛出异常）时仍返回基本商品信息"""
+    product_info = _scrape(_api(lazy_status=500))
+    assert product_info.variant_id == "40429902"
+    assert product_info.product_measurements in (None, {}, [])
+
+    api_client = _api()
+    api_client.get_detailed_size_info = mock.Mock(side_effect=RuntimeError("boom"))
+    api_client.session.post.side_effect = lambda url, headers=None, json=None, timeout=None: _response(PDP)
+    product_info = _scrape(api_client)
+    assert product_info is not None and product_info.navigation_path == "Shoes"
+
+
+def test_pdp_failure_returns_none():
+    """测试PDP抛出异常时返回None，不向调用方抛出"""
+    api_client = _api()
+    api_client.get_product_info = mock.Mock(side_effect=RuntimeError("boom"))
+    api_client.get_detailed_size_info = mock.Mock(return_value=LAZY_PDP)
+    assert _scrape(api_client) is None
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_are_merged()
+    test_lazy_pdp_failure_degrades()
+    test_pdp_failure_returns_none()
+    print("✅ 异步客户端测试通过")
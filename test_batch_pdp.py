@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量PDP查询（别名请求的构建和按别名拆分响应）
+"""
+
+import sys
+import os
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from offline_api import fake_response, offline_api
+
+
+def _product(product_id, name):
+    return {
+        "id": product_id,
+        "name": name,
+        "variations": [
+            {"id": f"{product_id}_01", "variantId": f"{product_id}01", "colorValue": "01", "price": 80, "salePrice": 60},
+            {"id": f"{product_id}_02", "variantId": f"{product_id}02", "colorValue": "02", "price": 90, "salePrice": 90},
+        ],
+    }
+
+
+def test_batch_query_aliases():
+    """测试批量查询为每个商品生成别名字段"""
+    api_client = offline_api()
+    query = api_client._build_batch_pdp_query(3)
+
+    assert "query PDPBatch($id0: ID!, $id1: ID!, $id2: ID!)" in query
+    assert "p2: product(id: $id2) { ...pdpProductFields }" in query
+    assert "fragment pdpProductFields on Product" in query
+
+
+def test_batch_partial_errors():
+    """测试单个别名出错时其他商品仍然正常解析"""
+    api_client = offline_api()
+    payload = {
+        "data": {"p0": _product("404299", "Suede XL"), "p1": None, "p2": _product("312637", "evoSPEED")},
+        "errors": [{"message": "Product not found", "path": ["p1"]}],
+    }
+    api_client.session.post.return_value = fake_response(payload)
+
+    results = api_client.get_products_info(
+        ["404299", "000000", "312637", "404299"],
+        chunk_size=10,
+        urls={"312637": "https://us.puma.com/us/en/pd/evospeed/312637?swatch=02"},
+    )
+
+    assert list(results) == ["404299", "000000", "312637"]
+    assert api_client.session.post.call_count == 1
+    sent = api_client.session.post.call_args.kwargs["json"]
+    assert sent["variables"] == {"id0": "404299", "id1": "000000", "id2": "312637"}
+    assert results["404299"].name == "Suede XL"
+    assert results["000000"] is None
+    assert results["312637"].color_value == "02"
+
+
+if __name__ == "__main__":
+    test_batch_query_aliases()
+    test_batch_partial_errors()
+    print("✅ 批量PDP测试通过")
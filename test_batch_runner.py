@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试进程内批量爬取（共享客户端、有界并发、逐行写出结果、启动速率限制）
+"""
+
+import sys
+import os
+import io
+import json
+import threading
+import time
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from batch_runner import BatchRunner, RateGate, read_urls
+from new_puma_graphql_api import ProductInfo
+
+
+def test_read_urls_skips_blank_and_comments():
+    """测试跳过空行和注释行"""
+    lines = ["https://a/1\n", "\n", "# comment\n", "  https://a/2  \n"]
+    assert list(read_urls(lines)) == ["https://a/1", "https://a/2"]
+
+
+def test_run_writes_jsonl_with_bounded_concurrency():
+    """测试结果逐行写出，失败不影响其他URL，同时在途的请求不超过workers"""
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def scrape_product(url, profile):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        if url.endswith("bad"):
+            return None
+        return ProductInfo(name=url, product_id=url[-1])
+
+    api = mock.Mock()
+    api.scrape_product.side_effect = scrape_product
+    urls = [f"https://us.puma.com/pd/{i}" for i in range(9)] + ["https://us.puma.com/pd/bad"]
+    output = io.StringIO()
+
+    stats = BatchRunner(api, workers=3).run(iter(urls), output=output)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(line['url'] for line in lines) == sorted(urls)
+    assert stats.total == 10 and stats.succeeded == 9 and stats.failed == 1
+    assert peak <= 3
+    failed = next(line for line in lines if not line['success'])
+    assert failed['product'] is None and failed['error']
+    assert all(line['product']['name'] == line['url'] for line in lines if line['success'])
+
+
+def test_idle_source_gets_results_handled():
+    """测试来源暂时没有任务时产生None，BatchRunner先处理在途任务的结果再继续取URL"""
+    api = mock.Mock()
+    api.scrape_product.side_effect = lambda url, profile: ProductInfo(name=url, product_id=url[-1])
+    handled = []
+
+    def source():
+        yield "https://us.puma.com/pd/1"
+        # 第一个结果处理之前一直没有新任务（类似常驻消费者等待工作队列）
+        while not handled:
+            yield None
+        yield "https://us.puma.com/pd/2"
+
+    stats = BatchRunner(api, workers=2).run(source(), on_result=lambda result: handled.append(result['url']),
+                                            idle_timeout=0.01)
+    assert handled == ["https://us.puma.com/pd/1", "https://us.puma.com/pd/2"]
+    assert stats.total == 2 and stats.succeeded == 2
+
+
+def test_rate_gate_spacing():
+    """测试速率限制按1/rate秒间隔放行"""
+    now = [100.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(round(seconds, 6))
+
+    gate = RateGate(rate=4, clock=lambda: now[0], sleep=fake_sleep)
+    for _ in range(3):
+        gate.acquire()
+    assert sleeps == [0.25, 0.5]
+
+
+if __name__ == "__main__":
+    test_read_urls_skips_blank_and_comments()
+    test_run_writes_jsonl_with_bounded_concurrency()
+    test_idle_source_gets_results_handled()
+    test_rate_gate_spacing()
+    print("✅ 批量爬取测试通过")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试商品目录发现（分页遍历分类/搜索列表、展开swatch、去重、交给批量爬取）
+"""
+
+import sys
+import os
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from catalog_discovery import CatalogDiscovery, product_url
+from offline_api import fake_response, offline_api
+
+# 分类10001共5个商品，每页2个；搜索结果与分类有重叠
+CATALOG = [
+    {"id": f"40429{i}", "href": f"/us/en/pd/suede-{i}/40429{i}", "colors": [{"value": "01"}, {"value": "02"}]}
+    for i in range(5)
+]
+
+
+def _fake_post(url, headers=None, json=None, timeout=None):
+    variables = json["variables"]
+    if json["operationName"] == "CategoryProducts":
+        products = CATALOG[variables["offset"]:variables["offset"] + variables["limit"]]
+        return fake_response({"data": {"categoryProducts": {"total": len(CATALOG), "products": products}}})
+    return fake_response({"data": {"searchProducts": {"total": 1, "products": [CATALOG[0]]}}})
+
+
+def _discovery(**kwargs):
+    api_client = offline_api()
+    api_client.session.post.side_effect = _fake_post
+    return CatalogDiscovery(api_client, **kwargs), api_client
+
+
+def test_pages_and_dedupes():
+    """测试按页遍历直到总数，展开颜色并去掉分类与搜索之间的重复"""
+    discovery, api_client = _discovery(page_size=2, workers=2)
+    found = list(discovery.discover(["10001"], ["suede"]))
+
+    assert len(found) == 10
+    assert {(item.product_id, item.swatch) for item in found} == {
+        (product["id"], swatch) for product in CATALOG for swatch in ("01", "02")}
+    category_calls = [call for call in api_client.session.post.call_args_list
+                      if call.kwargs["json"]["operationName"] == "CategoryProducts"]
+    assert [call.kwargs["json"]["variables"]["offset"] for call in category_calls] == [0, 2, 4]
+    assert found[0].url.startswith("https://us.puma.com/us/en/pd/")
+    assert api_client.extract_product_id(found[0].url) == found[0].product_id
+
+
+def test_max_pages_and_no_swatches():
+    """测试页数上限和不展开颜色"""
+    discovery, _ = _discovery(page_size=2, max_pages=1, expand_swatches=False)
+    found = list(discovery.discover(["10001"]))
+    assert [item.url for item in found] == [product_url(p["id"], "", p["href"]) for p in CATALOG[:2]]
+
+
+def test_early_stop_releases_workers():
+    """测试调用方提前停止迭代时不会卡住"""
+    discovery, _ = _discovery(page_size=1, workers=1)
+    stream = discovery.discover(["10001"])
+    assert next(stream).product_id == CATALOG[0]["id"]
+    stream.close()
+
+
+if __name__ == "__main__":
+    test_pages_and_dedupes()
+    test_max_pages_and_no_swatches()
+    test_early_stop_releases_workers()
+    print("✅ 目录发现测试通过")
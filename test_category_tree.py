@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分类树面包屑（由primaryCategoryId构建，不下载商品页面HTML）
+"""
+
+import sys
+import os
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from category_tree import CategoryTree
+from new_puma_graphql_api import ProductInfo
+from offline_api import fake_response, offline_api
+
+CATEGORIES = [
+    {"id": "men", "name": "Men", "href": "/us/en/men", "subCategories": [
+        {"id": "men-shoes", "name": "Men's Shoes and Sneakers", "href": "/us/en/men/shoes", "subCategories": [
+            {"id": "men-shoes-sneakers", "name": "Sneakers", "href": "/us/en/men/shoes/sneakers"},
+        ]},
+    ]},
+    {"id": "kids", "name": "Kids", "href": "https://us.puma.com/us/en/kids"},
+]
+
+PRODUCT_URL = "https://us.puma.com/us/en/pd/suede-xl/404299"
+
+
+def test_build_breadcrumb():
+    """测试由分类ID构建完整的面包屑"""
+    category_tree = CategoryTree.from_graphql(CATEGORIES)
+    items, navigation_path = category_tree.build_breadcrumb("men-shoes-sneakers", "Suede XL", PRODUCT_URL)
+
+    assert navigation_path == "Home > Men > Men's Shoes and Sneakers > Sneakers > Suede XL"
+    assert items[2]["url"] == "https://us.puma.com/us/en/men/shoes"
+    assert [item["level"] for item in items] == [1, 2, 3, 4, 5]
+    assert items[-1] == {"text": "Suede XL", "url": PRODUCT_URL, "level": 5, "current": True}
+    assert category_tree.build_breadcrumb("unknown", "Suede XL", PRODUCT_URL) == ([], "")
+
+
+def test_tree_loaded_once_and_html_skipped():
+    """测试分类树只请求一次，且不再下载页面HTML"""
+    api_client = offline_api()
+    api_client.session.post.return_value = fake_response({"data": {"categories": CATEGORIES}})
+
+    for _ in range(2):
+        product_info = ProductInfo(name="Suede XL", primary_category_id="men-shoes")
+        items, navigation_path = api_client._resolve_breadcrumb(product_info, PRODUCT_URL)
+        assert navigation_path == "Home > Men > Men's Shoes and Sneakers > Suede XL"
+
+    assert api_client.session.post.call_count == 1
+    assert api_client.session.get.call_count == 0
+
+
+def test_fallback_to_html_when_tree_unavailable():
+    """测试分类树加载失败时回退到页面HTML，且短时间内不重复请求分类树"""
+    api_client = offline_api()
+    api_client.session.post.return_value = fake_response({"errors": [{"message": "Cannot query field categories"}]})
+    api_client._extract_breadcrumb_from_html = mock.Mock(return_value=([], ""))
+
+    product_info = ProductInfo(name="Suede XL", primary_category_id="men-shoes")
+    api_client._resolve_breadcrumb(product_info, PRODUCT_URL)
+    api_client._resolve_breadcrumb(product_info, PRODUCT_URL)
+
+    assert api_client.session.post.call_count == 1
+    assert api_client._extract_breadcrumb_from_html.call_count == 2
+
+
+def test_unauthenticated_refreshes_token_and_retries():
+    """测试分类树请求返回UNAUTHENTICATED时刷新token后重试一次（与PDP等请求共用同一重试逻辑）"""
+    api_client = offline_api()
+    api_client.get_fresh_token = mock.Mock(return_value={"authorization": "Bearer refreshed"})
+    unauthenticated = {"errors": [{"message": "expired", "extensions": {"code": "UNAUTHENTICATED"}}]}
+    api_client.session.post.side_effect = [fake_response(unauthenticated),
+                                           fake_response({"data": {"categories": CATEGORIES}})]
+
+    assert api_client.get_category_tree() is not None
+    assert api_client.session.post.call_count == 2
+    assert api_client.session.post.call_args.kwargs["headers"]["authorization"] == "Bearer refreshed"
+
+
+if __name__ == "__main__":
+    test_build_breadcrumb()
+    test_tree_loaded_once_and_html_skipped()
+    test_fallback_to_html_when_tree_unavailable()
+    test_unauthenticated_refreshes_token_and_retries()
+    print("✅ 分类树测试通过")
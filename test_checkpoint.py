@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量爬取断点续爬（跳过已完成的商品、失败重试队列、不完整行容错）
+"""
+
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from batch_runner import BatchRunner
+from checkpoint import CrawlCheckpoint, STATUS_DONE, STATUS_FAILED
+from new_puma_graphql_api import NewPumaGraphQLAPI, ProductInfo
+from retry_policy import RetryPolicy
+
+URLS = [
+    "https://us.puma.com/us/en/pd/suede-xl/404299?swatch=01",
+    "https://us.puma.com/us/en/pd/suede-xl/404299?swatch=02",
+    "https://us.puma.com/us/en/pd/speedcat/405357?swatch=01",
+]
+
+
+def _api(scrape_product):
+    api_client = NewPumaGraphQLAPI(retry_policy=RetryPolicy())
+    api_client.scrape_product = mock.Mock(side_effect=scrape_product)
+    return api_client
+
+
+def test_checkpoint_survives_torn_line():
+    """测试重新加载时以最新记录为准，并跳过被截断的最后一行"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "run.jsonl")
+        checkpoint = CrawlCheckpoint(path)
+        checkpoint.record("404299", "01", STATUS_FAILED, url=URLS[0], error="timeout")
+        checkpoint.record("404299", "01", STATUS_DONE, url=URLS[0])
+        checkpoint.record("405357", "01", STATUS_FAILED, url=URLS[2], error="timeout")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"product_id": "404299", "swat')
+
+        reloaded = CrawlCheckpoint(path)
+        assert reloaded.is_done("404299", "01")
+        assert reloaded.attempts("404299", "01") == 2
+        assert reloaded.retry_queue() == [URLS[2]]
+        assert reloaded.retry_queue(max_attempts=1) == []
+
+        # 截断行之后追加的记录不受影响
+        reloaded.record("405357", "01", STATUS_DONE, url=URLS[2])
+        assert CrawlCheckpoint(path).is_done("405357", "01")
+
+
+def test_resume_skips_completed_and_retries_failures():
+    """测试中断后重新运行只爬未完成的商品，失败的商品重试到上限为止"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "run.jsonl")
+        CrawlCheckpoint(path).record("404299", "01", STATUS_DONE, url=URLS[0])
+
+        calls = []
+
+        def scrape_product(url, profile):
+            calls.append(url)
+            # 405357第一次失败，重试成功；404299?swatch=02一直失败
+            if url == URLS[2] and calls.count(url) == 1:
+                return None
+            if url == URLS[1]:
+                raise RuntimeError("upstream 500")
+            return ProductInfo(name="ok")
+
+        runner = BatchRunner(_api(scrape_product), workers=2, checkpoint=CrawlCheckpoint(path), max_attempts=2)
+        stats = runner.run(URLS)
+
+        assert URLS[0] not in calls
+        assert calls.count(URLS[1]) == 2 and calls.count(URLS[2]) == 2
+        assert (stats.total, stats.succeeded, stats.failed, stats.skipped, stats.retried) == (2, 1, 1, 1, 2)
+
+        # 再次运行：已完成的跳过，用完尝试次数的也不再请求
+        rerun = BatchRunner(_api(scrape_product), checkpoint=CrawlCheckpoint(path), max_attempts=2).run(URLS)
+        assert rerun.total == 0 and rerun.skipped == 3
+
+
+if __name__ == "__main__":
+    test_checkpoint_survives_torn_line()
+    test_resume_skips_completed_and_retries_failures()
+    print("✅ 断点续爬测试通过")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试longDescription单次扫描解析（常规描述与原多段正则结果一致、实体解码、按内容哈希缓存）
+"""
+
+import sys
+import os
+import re
+from html import unescape
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from description_parser import DescriptionParser
+
+SAMPLE_HTML = (
+    "<h3>PRODUCT STORY</h3>Cushioned  ride with <b>NITRO</b> foam.<br/>"
+    "<h3>FEATURES &amp; BENEFITS</h3><ul><li>NITRO: nitrogen-infused foam</li>"
+    "<li> <strong>PWRPLATE</strong>  carbon plate </li></ul>After list"
+    "<h3 class=\"x\">DETAILS</h3><ul><li>Regular fit</li><li></li><li>Lace closure</li></ul>"
+    "<h3><em>IGNORED</em></h3><p>orphan</p>"
+)
+
+
+def _legacy_parse(html_content):
+    """原app.parse_long_description_html的多段正则实现，用作对照"""
+    parsed_data = {}
+    html_content = unescape(html_content)
+    pattern = r'<h3[^>]*>\s*([^<]+?)\s*</h3>([\s\S]*?)(?=<h3|$)'
+    for title, content in re.findall(pattern, html_content, re.IGNORECASE | re.DOTALL):
+        section_data = {'title': title.strip(), 'text': '', 'list_items': []}
+        for item in re.findall(r'<li[^>]*>\s*([\s\S]*?)\s*</li>', content, re.IGNORECASE | re.DOTALL):
+            clean_item = re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', '', item)).strip()
+            if clean_item:
+                section_data['list_items'].append(clean_item)
+        text_content = re.sub(r'<ul[^>]*>[\s\S]*?</ul>', '', content, flags=re.IGNORECASE)
+        text_content = re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', '', text_content)).strip()
+        if text_content:
+            section_data['text'] = text_content
+        parsed_data[title.strip()] = section_data
+    return parsed_data
+
+
+def test_matches_legacy_regex():
+    """测试不含转义尖括号的描述解析结果与原正则实现一致"""
+    samples = [
+        SAMPLE_HTML,
+        "no sections at all",
+        "<H3>Upper</H3><UL><LI>Mesh</LI></UL>",
+        "<h3>A</h3>text<ul><li>one<li>two</li></ul>tail &lt;3",
+        "<h3>A<h3>B</h3>text<ul><li>x</li></ul>",
+    ]
+    parser = DescriptionParser()
+    for html_content in samples:
+        sections, text_only = parser.parse(html_content)
+        assert sections == _legacy_parse(html_content), html_content
+        assert text_only == re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', '', html_content)).strip()
+
+    sections, _ = parser.parse(SAMPLE_HTML)
+    assert list(sections) == ['PRODUCT STORY', 'FEATURES & BENEFITS', 'DETAILS']
+    assert sections['FEATURES & BENEFITS']['list_items'] == ['NITRO: nitrogen-infused foam', 'PWRPLATE carbon plate']
+    assert sections['FEATURES & BENEFITS']['text'] == 'After list'
+
+
+def test_escaped_angle_brackets_are_text():
+    """测试&lt;解码出的<是文本而不是标签（原正则实现先解码再匹配标签，会吞掉后面的内容）"""
+    parser = DescriptionParser()
+    sections, _ = parser.parse("<h3>Details</h3><ul><li>size &lt; 10</li><li>a</li></ul>")
+    assert sections['Details']['list_items'] == ['size < 10', 'a']
+
+    sections, _ = parser.parse("<h3>Fit &lt;Slim&gt;</h3>Heel &lt;b&gt; tab")
+    assert sections == {'Fit <Slim>': {'title': 'Fit <Slim>', 'text': 'Heel <b> tab', 'list_items': []}}
+
+
+def test_unclosed_h3_title_restarts():
+    """测试标题未结束时遇到新的<h3，从新的<h3开始读取标题"""
+    parser = DescriptionParser()
+    sections, _ = parser.parse("<h3>A<h3>B</h3>text<ul><li>x</li></ul>")
+    assert list(sections) == ['B']
+    assert sections['B']['text'] == 'text' and sections['B']['list_items'] == ['x']
+
+
+def test_cache_hits_and_bound():
+    """测试相同描述只解析一次，缓存有上限，调用方修改结果不影响缓存"""
+    parser = DescriptionParser(max_entries=2)
+    first, _ = parser.parse(SAMPLE_HTML)
+    first['DETAILS']['list_items'].append('mutated')
+    second, _ = parser.parse(SAMPLE_HTML)
+    assert second['DETAILS']['list_items'] == ['Regular fit', 'Lace closure']
+    assert parser.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+    parser.parse("<h3>B</h3>b")
+    parser.parse("<h3>C</h3>c")
+    assert parser.stats()['entries'] == 2
+    parser.parse(SAMPLE_HTML)
+    assert parser.stats()['misses'] == 4
+
+
+if __name__ == "__main__":
+    test_matches_legacy_regex()
+    test_escaped_angle_brackets_are_text()
+    test_unclosed_h3_title_restarts()
+    test_cache_hits_and_bound()
+    print("✅ 长描述解析测试通过")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试HTML解析后端选择（配置/环境变量、后端不可用时回退）
+"""
+
+import sys
+import os
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import html_parser
+from html_parser import make_soup
+
+BREADCRUMB_HTML = (
+    '<nav data-test-id="breadcrumb-nav"><ol>'
+    '<li data-uds-child="breadcrumb-list-item"><a data-uds-child="breadcrumb-link" href="/us/en">Home</a></li>'
+    '<li data-uds-child="breadcrumb-list-item"><a data-uds-child="breadcrumb-link" href="/us/en/men">Men</a></li>'
+    '</ol></nav>'
+)
+
+
+def test_backends_give_same_links():
+    """测试不同后端解析出相同的面包屑链接"""
+    for backend in ("html.parser", "lxml"):
+        soup = make_soup(BREADCRUMB_HTML, backend)
+        nav = soup.find('nav', {'data-test-id': 'breadcrumb-nav'})
+        assert [a.get_text() for a in nav.find_all('a')] == ["Home", "Men"]
+
+
+def test_env_override_and_fallback():
+    """测试环境变量覆盖后端，未安装的后端回退到html.parser"""
+    with mock.patch.dict(os.environ, {"PUMA_HTML_PARSER": "html.parser"}):
+        assert html_parser.get_backend() == "html.parser"
+        assert make_soup(BREADCRUMB_HTML).builder.NAME == "html.parser"
+
+    soup = make_soup(BREADCRUMB_HTML, "no-such-parser")
+    assert soup.builder.NAME == "html.parser"
+    assert "no-such-parser" in html_parser._unavailable_backends
+
+
+if __name__ == "__main__":
+    test_backends_give_same_links()
+    test_env_override_and_fallback()
+    print("✅ HTML解析后端测试通过")
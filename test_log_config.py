@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试日志配置（JSON格式、静默模式不构建调试字符串）
+"""
+
+import sys
+import os
+import io
+import json
+import logging
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from log_config import setup_logging
+
+
+class _Expensive:
+    """被格式化时计数，用于验证静默模式下不构建字符串"""
+    formatted = 0
+
+    def __str__(self):
+        _Expensive.formatted += 1
+        return "expensive"
+
+
+def test_json_format():
+    """测试JSON模式每行一个带附加字段的JSON对象"""
+    stream = io.StringIO()
+    setup_logging(level="DEBUG", json_format=True, quiet=False, stream=stream)
+    logging.getLogger("new_puma_graphql_api").info("✅ 成功获取商品数据: %s", "Suede XL", extra={"product_id": "404299"})
+
+    entry = json.loads(stream.getvalue().strip().splitlines()[-1])
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "✅ 成功获取商品数据: Suede XL"
+    assert entry["product_id"] == "404299"
+
+
+def test_quiet_mode_skips_formatting():
+    """测试静默模式只输出WARNING及以上，且不格式化调试参数"""
+    stream = io.StringIO()
+    setup_logging(level="DEBUG", json_format=False, quiet=True, stream=stream)
+    logger = logging.getLogger("new_puma_graphql_api")
+    logger.debug("🔍 %s", _Expensive())
+    logger.info("✅ %s", _Expensive())
+    logger.warning("⚠️ 无法获取导航信息")
+
+    assert _Expensive.formatted == 0
+    assert stream.getvalue().count("\n") == 1
+    assert "WARNING" in stream.getvalue()
+
+
+if __name__ == "__main__":
+    test_json_format()
+    test_quiet_mode_skips_formatting()
+    print("✅ 日志配置测试通过")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试自动持久化查询（APQ）：只发送哈希，未登记时回退到完整查询
+"""
+
+import sys
+import os
+import hashlib
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from offline_api import fake_response, offline_api
+
+
+def test_hashes_cached_at_startup():
+    """测试启动时已缓存PDP和LazyPDP的哈希"""
+    api_client = offline_api(use_persisted_queries=True)
+    expected = hashlib.sha256(api_client.pdp_query.encode('utf-8')).hexdigest()
+
+    assert api_client.persisted_query_hashes[api_client.pdp_query] == expected
+    assert api_client.lazy_pdp_query in api_client.persisted_query_hashes
+
+
+def test_fallback_to_full_query():
+    """测试PersistedQueryNotFound时携带完整查询重发"""
+    api_client = offline_api(use_persisted_queries=True)
+    not_found = {"errors": [{"message": "PersistedQueryNotFound", "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}]}
+    found = {"data": {"product": {"id": "404299", "productMeasurements": None, "variations": []}}}
+    api_client.session.post.side_effect = [fake_response(not_found), fake_response(found), fake_response(found)]
+
+    assert api_client.get_detailed_size_info("404299") == found["data"]["product"]
+
+    first, second = [call.kwargs["json"] for call in api_client.session.post.call_args_list]
+    assert "query" not in first
+    assert first["extensions"]["persistedQuery"]["sha256Hash"] == api_client.persisted_query_hashes[api_client.lazy_pdp_query]
+    assert second["query"] == api_client.lazy_pdp_query
+
+    # 已登记后只发送哈希
+    api_client.get_detailed_size_info("404299")
+    assert "query" not in api_client.session.post.call_args.kwargs["json"]
+
+
+if __name__ == "__main__":
+    test_hashes_cached_at_startup()
+    test_fallback_to_full_query()
+    print("✅ APQ测试通过")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试ProductInfo的紧凑表示和to_dict/to_json序列化
+"""
+
+import sys
+import os
+import json
+from dataclasses import asdict
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import ProductInfo
+
+
+def test_to_dict_matches_asdict():
+    """测试to_dict/to_json与asdict结果一致且字段顺序不变"""
+    product_info = ProductInfo(name="Suede XL", price=80.0)
+    product_info.all_variations = [{"id": "404299_01", "images": ["a.jpg"]}]
+    product_info.breadcrumb = [{"text": "Men", "url": "/men"}]
+
+    assert product_info.to_dict() == asdict(product_info)
+    assert list(product_info.to_dict()) == list(asdict(product_info))
+    assert json.loads(product_info.to_json()) == asdict(product_info)
+    assert "Suede XL" in product_info.to_json()
+    # 不深拷贝嵌套数据
+    assert product_info.to_dict()["all_variations"] is product_info.all_variations
+
+
+def test_slots():
+    """测试使用__slots__（没有实例__dict__）"""
+    product_info = ProductInfo()
+    assert not hasattr(product_info, "__dict__")
+    try:
+        product_info.unknown_field = 1
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("不应允许设置未定义的字段")
+
+
+if __name__ == "__main__":
+    test_to_dict_matches_asdict()
+    test_slots()
+    print("✅ ProductInfo序列化测试通过")
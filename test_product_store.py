@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试规范化商品存储（图片/变体/尺码组只存一次，view重建的ProductInfo与原对象一致）
+"""
+
+import sys
+import os
+import json
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import NewPumaGraphQLAPI
+from product_store import ProductStore
+from retry_policy import RetryPolicy
+
+
+def _image(color, n):
+    return {
+        'href': f'https://images.puma.com/404299/{color}/sv{n:02d}',
+        'verticalImageHref': f'https://images.puma.com/404299/{color}/mod{n:02d}',
+    }
+
+
+PRODUCT_DATA = {
+    'id': '404299',
+    'name': 'Suede XL Sneakers',
+    'image': _image('01', 0),
+    'colors': [{'name': f'Color {c}', 'value': c, 'image': _image(c, 0)} for c in ('01', '02', '03')],
+    'variations': [
+        {
+            'id': f'404299_{c}',
+            'variantId': f'4042990{c}',
+            'colorValue': c,
+            'colorName': f'Color {c}',
+            'price': 80,
+            'salePrice': 64.99,
+            'preview': _image(c, 0)['href'],
+            'images': [_image(c, n) for n in range(4)],
+            'badges': [{'label': 'New'}],
+            'productStory': {'longDescription': '<h3>STORY</h3><p>Suede upper</p>'},
+        }
+        for c in ('01', '02', '03')
+    ],
+}
+
+SIZE_GROUPS = [{'label': 'US', 'sizes': [{'label': '8', 'orderable': True}, {'label': '9', 'orderable': False}]}]
+
+
+def _parse(swatch):
+    api_client = NewPumaGraphQLAPI(retry_policy=RetryPolicy())
+    product_info = api_client._parse_product_data(PRODUCT_DATA, f"https://us.puma.com/us/en/pd/suede/404299?swatch={swatch}")
+    api_client._apply_size_groups(product_info, SIZE_GROUPS)
+    return product_info
+
+
+def test_view_round_trip():
+    """测试view重建的结果与原ProductInfo完全一致（含JSON往返）"""
+    products = [_parse(swatch) for swatch in ('01', '02', '03')]
+    store = ProductStore()
+    keys = [store.add(product_info) for product_info in products]
+    assert keys == ['404299_01', '404299_02', '404299_03']
+
+    restored = ProductStore.from_dict(json.loads(store.to_json()))
+    for key, product_info in zip(keys, products):
+        for candidate in (store.view(key), restored.view(key)):
+            assert candidate.to_dict() == product_info.to_dict()
+            assert candidate.current_variation is candidate.all_variations[int(key[-2:]) - 1]
+
+
+def test_payloads_stored_once():
+    """测试同一商品多个颜色共享变体、图片和尺码组，规范化JSON明显更小"""
+    products = [_parse(swatch) for swatch in ('01', '02', '03')]
+    store = ProductStore()
+    for product_info in products:
+        store.add(product_info)
+
+    assert len(store.variations) == 3
+    assert len(store.images) == len(set(store.images))
+    assert 'sizes' not in store.products['404299_01']
+    assert 'longDescription' not in store.variations['404299_01']
+
+    flat_size = len(json.dumps([p.to_dict() for p in products], ensure_ascii=False))
+    assert len(store.to_json()) < flat_size / 2
+
+
+def test_conflicting_variation_kept_separately():
+    """测试同一变体ID内容不同时不会覆盖之前的记录"""
+    store = ProductStore()
+    first = _parse('01')
+    store.add(first, key='old')
+    second = _parse('01')
+    second.current_variation['longDescription'] = 'changed'
+    store.add(second, key='new')
+
+    assert store.view('old').current_variation['longDescription'] == first.current_variation['longDescription']
+    assert store.view('new').current_variation['longDescription'] == 'changed'
+
+
+if __name__ == "__main__":
+    test_view_round_trip()
+    test_payloads_stored_once()
+    test_conflicting_variation_kept_separately()
+    print("✅ 规范化商品存储测试通过")
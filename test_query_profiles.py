@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试查询档位（pricing/inventory/media只请求和解析需要的字段）
+"""
+
+import sys
+import os
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from offline_api import fake_response, offline_api
+
+
+def _client(product):
+    api_client = offline_api()
+    api_client.session.post.return_value = fake_response({"data": {"product": product}})
+    return api_client
+
+
+def test_pricing_profile():
+    """测试pricing档位只发送一次精简查询并解析价格"""
+    api_client = _client({
+        "id": "404299",
+        "name": "Suede XL",
+        "variations": [
+            {"id": "404299_01", "colorValue": "01", "price": 80, "salePrice": 80, "orderable": True},
+            {"id": "404299_02", "colorValue": "02", "price": 90, "salePrice": 90,
+             "productPrice": {"price": 100, "salePrice": 75}, "orderable": False},
+        ],
+    })
+
+    product_info = api_client.scrape_product("https://us.puma.com/us/en/pd/suede-xl/404299?swatch=02", profile="pricing")
+
+    assert api_client.session.post.call_count == 1
+    sent = api_client.session.post.call_args.kwargs["json"]
+    assert sent["operationName"] == "PDPPricing"
+    assert "sizeGroups" not in sent["query"] and "description" not in sent["query"]
+    assert product_info.method == "new_graphql:pricing"
+    assert product_info.original_price == 100 and product_info.sale_price == 75
+    assert product_info.discount == 25
+    assert product_info.orderable is False
+
+
+def test_inventory_profile():
+    """测试inventory档位解析尺码库存"""
+    api_client = _client({
+        "id": "404299",
+        "name": "Suede XL",
+        "variations": [{
+            "id": "404299_01", "colorValue": "01", "orderable": True,
+            "sizeGroups": [{"label": "US", "sizes": [
+                {"label": "9", "orderable": True}, {"label": "10", "orderable": False},
+            ]}],
+        }],
+    })
+
+    product_info = api_client.get_product_info("404299", profile="inventory")
+
+    assert api_client.session.post.call_args.kwargs["json"]["operationName"] == "PDPInventory"
+    assert product_info.available_sizes == ["9"]
+    assert product_info.unavailable_sizes == ["10"]
+    assert product_info.stock_status == "available"
+
+
+def test_unknown_profile():
+    """测试未知档位抛出ValueError且不发请求"""
+    api_client = _client({})
+    for call in (lambda: api_client.get_product_info("404299", profile="unknown"),
+                 lambda: api_client.scrape_product("https://us.puma.com/us/en/pd/suede-xl/404299", profile="unknown")):
+        try:
+            call()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("未知档位应抛出ValueError")
+    assert api_client.session.post.call_count == 0
+
+
+if __name__ == "__main__":
+    test_pricing_profile()
+    test_inventory_profile()
+    test_unknown_profile()
+    print("✅ 查询档位测试通过")
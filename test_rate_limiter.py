@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按主机的自适应限速（令牌桶、AIMD调速、Retry-After、连接池适配器集成）
+"""
+
+import sys
+import os
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from http_transport import RateLimitedAdapter
+from rate_limiter import AdaptiveRateLimiter
+from retry_policy import get_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+def _limiter(clock, **kwargs):
+    options = dict(initial_rate=2.0, min_rate=0.5, max_rate=8.0, burst=2, clock=clock, sleep=clock.sleep)
+    options.update(kwargs)
+    return AdaptiveRateLimiter(**options)
+
+
+def test_token_bucket_per_host():
+    """测试突发额度用完后按速率等待，不同主机互不影响"""
+    clock = FakeClock()
+    limiter = _limiter(clock)
+    for _ in range(3):
+        limiter.acquire("us.puma.com")
+    assert clock.sleeps == [0.5]
+    assert limiter.acquire("images.puma.com") == 0.0
+
+
+def test_aimd_rate_adjustment():
+    """测试正常响应加速、429降速（一个间隔内只降一次）、变慢也降速"""
+    clock = FakeClock()
+    limiter = _limiter(clock)
+    for _ in range(4):
+        limiter.record("us.puma.com", 200, latency=0.2)
+    assert limiter.get_rate("us.puma.com") > 2.0
+
+    rate = limiter.get_rate("us.puma.com")
+    limiter.record("us.puma.com", 429, latency=0.1)
+    limiter.record("us.puma.com", 429, latency=0.1)
+    assert limiter.get_rate("us.puma.com") == rate / 2
+
+    clock.now += 10
+    limiter.record("us.puma.com", 200, latency=30.0)
+    assert limiter.get_rate("us.puma.com") == max(0.5, rate / 4)
+
+    # 404等客户端错误不是过载信号
+    before = limiter.get_rate("us.puma.com")
+    limiter.record("us.puma.com", 404, latency=0.1)
+    assert limiter.get_rate("us.puma.com") > before
+
+
+def test_retry_after_pauses_host():
+    """测试Retry-After期间暂停向该主机发送（秒数和HTTP日期两种格式）"""
+    clock = FakeClock()
+    limiter = _limiter(clock)
+    limiter.record("us.puma.com", 429, retry_after=7.0)
+    waited = limiter.acquire("us.puma.com")
+    assert waited >= 7.0
+
+    future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+    response = mock.Mock(headers={'Retry-After': future})
+    assert 100 < get_retry_after(response) <= 120
+    assert get_retry_after(mock.Mock(headers={'Retry-After': '3'})) == 3.0
+
+
+def test_adapter_feeds_limiter():
+    """测试连接池适配器发送前取令牌，并反馈状态码和Retry-After"""
+    limiter = mock.Mock()
+    adapter = RateLimitedAdapter(limiter, max_retries=0)
+    response = requests.Response()
+    response.status_code = 429
+    response.headers['Retry-After'] = '5'
+    request = requests.Request('GET', 'https://us.puma.com/api/graphql').prepare()
+
+    with mock.patch.object(HTTPAdapter, 'send', return_value=response):
+        assert adapter.send(request) is response
+    limiter.acquire.assert_called_once_with('us.puma.com')
+    host, status_code, latency, retry_after = limiter.record.call_args.args
+    assert (host, status_code, retry_after) == ('us.puma.com', 429, 5.0)
+
+    with mock.patch.object(HTTPAdapter, 'send', side_effect=requests.exceptions.ReadTimeout()):
+        try:
+            adapter.send(request)
+        except requests.exceptions.ReadTimeout:
+            pass
+    limiter.record.assert_called_with('us.puma.com', error=True)
+
+
+if __name__ == "__main__":
+    test_token_bucket_per_host()
+    test_aimd_rate_adjustment()
+    test_retry_after_pauses_host()
+    test_adapter_feeds_limiter()
+    print("✅ 自适应限速测试通过")
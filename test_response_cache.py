@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试GraphQL响应缓存（LRU淘汰、TTL过期、磁盘存储、API集成）
+"""
+
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from response_cache import ResponseCache, DiskCacheStore
+from offline_api import fake_response, offline_api
+
+
+def test_lru_and_ttl():
+    """测试LRU淘汰和TTL过期"""
+    cache = ResponseCache(ttls={"PDP": 60, "LazyPDP": 0}, max_entries=2)
+    cache.set("PDP", "1", "en-US", {"id": "1"})
+    cache.set("PDP", "2", "en-US", {"id": "2"})
+    assert cache.get("PDP", "1", "en-US") == {"id": "1"}
+    cache.set("PDP", "3", "en-US", {"id": "3"})
+
+    # 2是最久未使用的，被淘汰
+    assert cache.get("PDP", "2", "en-US") is None
+    assert cache.get("PDP", "1", "en-US") == {"id": "1"}
+    # 不同locale是不同的缓存项
+    assert cache.get("PDP", "1", "de-DE") is None
+    # TTL为0的操作不缓存
+    cache.set("LazyPDP", "1", "en-US", {"id": "1"})
+    assert cache.get("LazyPDP", "1", "en-US") is None
+
+    with mock.patch("response_cache.time.time", return_value=10 ** 12):
+        assert cache.get("PDP", "3", "en-US") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["evictions"] == 1
+    assert stats["expired"] == 1
+
+
+def test_disk_store_survives_restart():
+    """测试磁盘存储在新的缓存实例中仍然可用"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ResponseCache(disk_store=DiskCacheStore(tmp_dir)).set("PDP", "404299", "en-US", {"name": "Suede"})
+        cache = ResponseCache(disk_store=DiskCacheStore(tmp_dir))
+        assert cache.get("PDP", "404299", "en-US") == {"name": "Suede"}
+
+
+def test_api_uses_cache():
+    """测试重复获取同一商品时只请求一次"""
+    api_client = offline_api(cache=ResponseCache())
+    api_client.session.post.return_value = fake_response(
+        {"data": {"product": {"id": "404299", "name": "Suede XL", "variations": []}}})
+
+    first = api_client.get_product_info("404299")
+    first.name = "changed"
+    second = api_client.get_product_info("404299")
+
+    assert api_client.session.post.call_count == 1
+    assert second.name == "Suede XL"
+    assert api_client.cache.stats()["hits"] == 1
+
+
+if __name__ == "__main__":
+    test_lru_and_ttl()
+    test_disk_store_survives_restart()
+    test_api_uses_cache()
+    print("✅ 响应缓存测试通过")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试统一重试策略（状态码分类、重试预算、熔断器）
+"""
+
+import sys
+import os
+from unittest import mock
+
+import requests
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from retry_policy import RetryPolicy, RetryBudget, CircuitBreaker, CircuitOpenError
+
+
+def _response(status_code, headers=None):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+def test_retries_5xx_and_honors_retry_after():
+    """测试503后重试成功，并且等待时间不少于Retry-After"""
+    delays = []
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=30, sleep=delays.append)
+    responses = [_response(503), _response(429, {"Retry-After": "5"}), _response(200)]
+    func = mock.Mock(side_effect=responses)
+
+    assert policy.call(func).status_code == 200
+    assert func.call_count == 3
+    assert delays[1] >= 5
+    # 被重试丢弃的响应已关闭，最终返回的响应留给调用方
+    assert responses[0].close.called and responses[1].close.called
+    assert not responses[2].close.called
+
+
+def test_does_not_retry_client_errors():
+    """测试404等客户端错误不重试"""
+    policy = RetryPolicy(sleep=lambda _: None)
+    func = mock.Mock(return_value=_response(404))
+    assert policy.call(func).status_code == 404
+    assert func.call_count == 1
+
+
+def test_timeout_retried_then_raised():
+    """测试超时重试次数用完后抛出原异常"""
+    policy = RetryPolicy(max_attempts=2, sleep=lambda _: None)
+    func = mock.Mock(side_effect=requests.exceptions.Timeout("timeout"))
+    try:
+        policy.call(func)
+        assert False, "应该抛出Timeout"
+    except requests.exceptions.Timeout:
+        pass
+    assert func.call_count == 2
+
+
+def test_retry_budget_limits_retries():
+    """测试重试预算用完后不再重试"""
+    policy = RetryPolicy(max_attempts=5, budget=RetryBudget(ratio=0, min_tokens=1), sleep=lambda _: None)
+    func = mock.Mock(return_value=_response(500))
+    policy.call(func)
+    assert func.call_count == 2
+
+
+def test_circuit_breaker_fails_fast():
+    """测试连续失败后熔断，恢复时间过后放行探测请求"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    policy = RetryPolicy(max_attempts=1, circuit_breaker=breaker, sleep=lambda _: None)
+    failing = mock.Mock(return_value=_response(502))
+    policy.call(failing)
+    policy.call(failing)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    try:
+        policy.call(failing)
+        assert False, "应该抛出CircuitOpenError"
+    except CircuitOpenError:
+        pass
+    assert failing.call_count == 2
+
+    with mock.patch("retry_policy.time.monotonic", return_value=10 ** 9):
+        assert policy.call(mock.Mock(return_value=_response(200))).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+if __name__ == "__main__":
+    test_retries_5xx_and_honors_retry_after()
+    test_does_not_retry_client_errors()
+    test_timeout_retried_then_raised()
+    test_retry_budget_limits_retries()
+    test_circuit_breaker_fails_fast()
+    print("✅ 重试策略测试通过")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多进程分片爬取（按商品ID稳定分片、每个进程独立爬取、合并各分片结果、断点续爬）
+"""
+
+import sys
+import os
+import dataclasses
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import ProductInfo, match_product_id
+from config import RATE_LIMIT_MAX_RATE
+from sharded_crawl import ShardedCrawl, merge_outputs, run_shard, shard_of
+
+URLS = [f"https://us.puma.com/us/en/pd/product-{i}/{400000 + i}?swatch={swatch}"
+        for i in range(12) for swatch in ("01", "02")]
+
+
+class FakeAPI:
+    """离线的API客户端：每个工作进程各自创建，商品名中带上进程号"""
+
+    def extract_product_id(self, url):
+        return match_product_id(url)
+
+    def extract_swatch_from_url(self, url):
+        return url.rsplit('swatch=', 1)[-1]
+
+    def scrape_product(self, url, profile):
+        if url.endswith("product-3/400003?swatch=02"):
+            return None
+        return ProductInfo(product_id=match_product_id(url), name=str(os.getpid()), url=url)
+
+
+def fake_api_factory():
+    return FakeAPI()
+
+
+def test_shard_of_is_stable_per_product():
+    """测试同一商品的所有颜色在同一分片，且分片与运行次数无关"""
+    assert shard_of(URLS[0], 4) == shard_of(URLS[1], 4)
+    assert len({shard_of(url, 4) for url in URLS}) > 1
+    assert shard_of("https://us.puma.com/us/en/pd/x/400001", 4) == shard_of(URLS[2], 4)
+
+
+def test_merge_skips_truncated_lines():
+    """测试合并时丢弃被中断写了一半的行（在结尾，或续爬补换行后夹在中间）"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        first, second = Path(tmp_dir) / "a.jsonl", Path(tmp_dir) / "b.jsonl"
+        first.write_text('{"url": "1"}\n{"url": "2"}\n{"url"', encoding='utf-8')
+        second.write_text('{"url": "3"}\n{"url": "4\n{"url": "5"}\n', encoding='utf-8')
+        output = io.StringIO()
+        assert merge_outputs([first, second, Path(tmp_dir) / "missing.jsonl"], output) == 4
+    assert [json.loads(line)['url'] for line in output.getvalue().splitlines()] == ["1", "2", "3", "5"]
+
+
+def test_processes_crawl_shards_and_merge():
+    """测试多个进程各自爬取分片并合并；带断点重新运行时跳过已处理的商品"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        crawl = ShardedCrawl(Path(tmp_dir) / "shards", shards=3, processes=2, checkpoint_name="catalog",
+                             checkpoint_dir=Path(tmp_dir), threads=2, api_factory=fake_api_factory,
+                             max_attempts=1, quiet=True)
+        output = io.StringIO()
+        stats = crawl.run(iter(URLS), output)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert sorted(line['url'] for line in lines) == sorted(URLS)
+        assert stats.total == len(URLS) and stats.failed == 1
+        pids = {line['product']['name'] for line in lines if line['success']}
+        assert str(os.getpid()) not in pids
+        assert sorted(path.name for path in Path(tmp_dir).glob("catalog-*.jsonl")) == [
+            f"catalog-shard{index:02d}of03.jsonl" for index in range(3)]
+
+        # 所有商品都已完成或用完尝试次数，重新运行不再爬取
+        stats = crawl.run(iter(URLS), io.StringIO())
+        assert stats.total == 0 and stats.skipped == len(URLS)
+
+        # 分片输出的最后一行被中断写了一半：续爬时先补换行，新结果不会与它粘在一起
+        new_url = "https://us.puma.com/us/en/pd/product-99/400099?swatch=01"
+        with open(Path(tmp_dir) / "shards" / f"shard-{shard_of(new_url, 3):02d}.jsonl", 'a', encoding='utf-8') as f:
+            f.write('{"url": "torn')
+        output = io.StringIO()
+        crawl.run(iter(URLS + [new_url]), output)
+        assert sorted(json.loads(line)['url'] for line in output.getvalue().splitlines()) == sorted(URLS + [new_url])
+
+
+def test_total_rate_split_across_processes():
+    """测试各进程的限速上限平分总速率（默认与单进程上限相同）"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = Path(tmp_dir) / "shard-00.urls"
+        input_path.write_text("", encoding='utf-8')
+        for crawl, expected_max_rate in ((ShardedCrawl(Path(tmp_dir), processes=4), RATE_LIMIT_MAX_RATE / 4),
+                                         (ShardedCrawl(Path(tmp_dir), processes=4, shards=8, total_rate=60), 15.0)):
+            task = crawl._tasks([input_path])[0]
+            with mock.patch('sharded_crawl.setup_logging'), \
+                    mock.patch('sharded_crawl.http_transport.configure_transport'), \
+                    mock.patch('sharded_crawl.configure_default_limiter') as configure_limiter:
+                run_shard(dataclasses.replace(task, api_factory=fake_api_factory))
+            assert configure_limiter.call_args.kwargs['max_rate'] == expected_max_rate
+
+
+if __name__ == "__main__":
+    test_shard_of_is_stable_per_product()
+    test_merge_skips_truncated_lines()
+    test_processes_crawl_shards_and_merge()
+    test_total_rate_split_across_processes()
+    print("✅ 分片爬取测试通过")
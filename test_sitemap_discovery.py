@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试站点地图发现（增量解析、gzip、lastmod排序和过滤、去重、离线fixture）
+"""
+
+import sys
+import os
+import gzip
+import io
+import shutil
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import NewPumaGraphQLAPI
+from retry_policy import RetryPolicy
+from sitemap_discovery import SitemapDiscovery, iter_sitemap
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'data', 'fixtures', 'sitemap')
+INDEX_URL = "https://us.puma.com/sitemap_index.xml"
+
+
+def _keys(found):
+    return [(item.product_id, item.swatch) for item in found]
+
+
+def test_walks_newest_sitemaps_first():
+    """测试子站点地图按lastmod从新到旧遍历，只保留商品页并去重"""
+    found = list(SitemapDiscovery(INDEX_URL, base_dir=FIXTURES_DIR).discover())
+    assert _keys(found) == [("403380", "04"), ("398846", "01"), ("396463", ""),
+                            ("399781", "01"), ("399781", "02")]
+    api_client = NewPumaGraphQLAPI(retry_policy=RetryPolicy())
+    for item in found:
+        assert api_client.extract_product_id(item.url) == item.product_id
+        assert api_client.extract_swatch_from_url(item.url) == item.swatch
+
+
+def test_prioritize_and_since():
+    """测试严格按lastmod排序，以及since跳过未更新的站点地图和商品"""
+    found = SitemapDiscovery(INDEX_URL, base_dir=FIXTURES_DIR).discover(prioritize=True)
+    assert _keys(found) == [("403380", "04"), ("398846", "01"), ("399781", "02"),
+                            ("399781", "01"), ("396463", "")]
+
+    since = datetime(2025, 8, 21, tzinfo=timezone.utc)
+    opened = []
+    discovery = SitemapDiscovery(INDEX_URL, base_dir=FIXTURES_DIR, since=since)
+    original_open = discovery._open
+    discovery._open = lambda location: opened.append(location) or original_open(location)
+    assert _keys(discovery.discover()) == [("403380", "04"), ("398846", "01"), ("396463", "")]
+    assert [os.path.basename(location) for location in opened] == ["sitemap_index.xml", "sitemap_products_2.xml"]
+
+
+def test_gzip_over_http():
+    """测试通过HTTP流式读取.xml.gz站点地图"""
+    with open(os.path.join(FIXTURES_DIR, 'sitemap_products_1.xml'), 'rb') as f:
+        compressed = gzip.compress(f.read())
+    response = mock.Mock()
+    response.raw = io.BytesIO(compressed)
+    session = mock.Mock()
+    session.get.return_value = response
+
+    url = "https://us.puma.com/sitemap_products_1.xml.gz"
+    found = list(SitemapDiscovery(url, session=session).discover())
+    assert _keys(found) == [("399781", "01"), ("399781", "02"), ("398846", "01")]
+    assert session.get.call_args.kwargs["stream"] is True
+    response.close.assert_called_once()
+
+
+def test_missing_sitemap_is_skipped():
+    """测试单个子站点地图缺失时继续处理其它站点地图"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shutil.copy(os.path.join(FIXTURES_DIR, 'sitemap_index.xml'), tmp_dir)
+        shutil.copy(os.path.join(FIXTURES_DIR, 'sitemap_products_1.xml'), tmp_dir)
+        found = list(SitemapDiscovery(INDEX_URL, base_dir=tmp_dir).discover())
+    assert _keys(found) == [("399781", "01"), ("399781", "02"), ("398846", "01")]
+
+
+def test_memory_stays_flat():
+    """测试解析大站点地图时内存不随记录数增长"""
+    def build(count):
+        rows = "".join(
+            f"<url><loc>https://us.puma.com/us/en/pd/product-{i}/{100000 + i}?swatch=01</loc>"
+            f"<lastmod>2025-08-01</lastmod></url>" for i in range(count))
+        return ('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">%s</urlset>' % rows).encode()
+
+    data = build(30000)
+    tracemalloc.start()
+    count = sum(1 for _ in iter_sitemap(io.BytesIO(data)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count == 30000
+    assert peak < len(data) / 4
+
+
+if __name__ == "__main__":
+    test_walks_newest_sitemaps_first()
+    test_prioritize_and_since()
+    test_gzip_over_http()
+    test_missing_sitemap_is_skipped()
+    test_memory_stays_flat()
+    print("✅ 站点地图发现测试通过")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试流式HTML获取（跨块匹配标记、找到后提前断开）
+"""
+
+import sys
+import os
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import http_transport
+from http_transport import MarkerScanner, fetch_html
+
+
+def _session(chunks, status_code=200, content_type="text/html; charset=utf-8"):
+    consumed = []
+
+    def iter_content(chunk_size):
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    response = mock.Mock()
+    response.status_code = status_code
+    response.url = "https://us.puma.com/us/en/pd/suede-xl/404299"
+    response.headers = {"content-type": content_type}
+    response.encoding = "utf-8"
+    response.iter_content.side_effect = iter_content
+    session = mock.Mock()
+    session.get.return_value = response
+    return session, response, consumed
+
+
+def test_marker_scanner_across_chunks():
+    """测试标记被拆到两块中间时仍能匹配，且结束标记必须出现在开始标记之后"""
+    scanner = MarkerScanner('data-test-id="breadcrumb-nav"', '</nav>')
+    assert not scanner.feed('</nav><nav data-test-id="bread')
+    assert not scanner.feed('crumb-nav"><a>Home</a></n')
+    assert scanner.feed('av><footer>')
+
+
+def test_fetch_stops_early_and_closes():
+    """测试找到标记后不再读取后续块并关闭连接"""
+    chunks = [
+        b'<html><body><nav data-test-id="breadcrumb-nav">',
+        '<a>Men</a></nav>'.encode("utf-8"),
+        b'<main>' + b'x' * 1000 + b'</main>',
+        b'</body></html>',
+    ]
+    session, response, consumed = _session(chunks)
+
+    page = fetch_html("https://us.puma.com/x", stop_at=[MarkerScanner('data-test-id="breadcrumb-nav"', '</nav>')],
+                      session=session, headers={}, timeout=30)
+
+    assert page.stopped_early
+    assert len(consumed) == 2
+    assert page.text.endswith("</nav>")
+    assert session.get.call_args.kwargs["stream"] is True
+    response.close.assert_called_once()
+
+
+def test_fetch_multibyte_split_and_status():
+    """测试多字节字符跨块解码，以及非200响应不读取内容"""
+    encoded = "Men’s Shoes".encode("utf-8")
+    session, _, _ = _session([encoded[:5], encoded[5:]])
+    page = fetch_html("https://us.puma.com/x", session=session)
+    assert page.text == "Men’s Shoes" and not page.stopped_early
+
+    session, response, consumed = _session([b"error"], status_code=503)
+    page = fetch_html("https://us.puma.com/x", session=session)
+    assert page.status_code == 503 and page.text == "" and not consumed
+    response.close.assert_called_once()
+
+
+def test_default_session_is_shared():
+    """测试未指定session时使用共享session"""
+    session, _, _ = _session([b"<html></html>"])
+    with mock.patch.object(http_transport, "get_session", return_value=session):
+        assert fetch_html("https://us.puma.com/x").text == "<html></html>"
+
+
+if __name__ == "__main__":
+    test_marker_scanner_across_chunks()
+    test_fetch_stops_early_and_closes()
+    test_fetch_multibyte_split_and_status()
+    test_default_session_is_shared()
+    print("✅ 流式HTML获取测试通过")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试PDP响应增量解码（只完整保留选中的变体，其余变体压缩为摘要）
+"""
+
+import sys
+import os
+import json
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import streaming_json
+from streaming_json import decode_product_response
+from offline_api import offline_api
+
+
+def _variation(color_value):
+    return {
+        "id": f"404299_{color_value}",
+        "variantId": f"404299{color_value}",
+        "colorValue": color_value,
+        "colorName": f"Color {color_value}",
+        "price": 80.5,
+        "salePrice": 60,
+        "images": [{"href": f"https://images.puma.com/{color_value}.jpg"}],
+        "productStory": {"longDescription": "<p>Story</p>"},
+    }
+
+
+def _body(variations):
+    payload = {"data": {"product": {"id": "404299", "name": "Suede XL", "variations": variations}}}
+    return json.dumps(payload).encode("utf-8")
+
+
+def _check_selected(data, selected_index):
+    variations = data["data"]["product"]["variations"]
+    assert len(variations) == 3
+    for i, variation in enumerate(variations):
+        if i == selected_index:
+            assert variation["productStory"]["longDescription"] == "<p>Story</p>"
+        else:
+            assert "images" not in variation and "productStory" not in variation
+            assert variation["colorValue"] and variation["price"] == 80.5
+
+
+def test_decode_keeps_selected_variation():
+    """测试ijson和json.loads两条路径结果一致"""
+    body = _body([_variation("01"), _variation("02"), _variation("03")])
+
+    _check_selected(decode_product_response(body, "02"), 1)
+    _check_selected(decode_product_response(body, ""), 0)
+    _check_selected(decode_product_response(body, "99"), 0)
+    assert decode_product_response(body, "02", keep_full_variations=True) == json.loads(body)
+
+    # 按块传入（stream=True时的iter_content），块边界落在任意位置
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    _check_selected(decode_product_response(iter(chunks), "02"), 1)
+
+    with mock.patch.object(streaming_json, "ijson_available", False):
+        _check_selected(decode_product_response(body, "02"), 1)
+        _check_selected(decode_product_response(iter(chunks), "02"), 1)
+
+
+def test_invalid_json_raises_value_error():
+    """测试非法JSON统一抛出ValueError"""
+    for available in (True, False):
+        with mock.patch.object(streaming_json, "ijson_available", available):
+            try:
+                decode_product_response(b'{"data": {"product": ', "")
+            except ValueError:
+                continue
+            raise AssertionError("应该抛出ValueError")
+
+
+def test_api_streaming_decode():
+    """测试API启用增量解码后选中的变体和摘要"""
+    api_client = offline_api(streaming_decode=True)
+    body = _body([_variation("01"), _variation("02"), _variation("03")])
+    response = mock.Mock()
+    response.status_code = 200
+    del response.content  # 增量解码不应读取完整响应体
+    response.iter_content.side_effect = lambda chunk_size: (body[i:i + 100] for i in range(0, len(body), 100))
+    api_client.session.post.return_value = response
+
+    product_info = api_client.get_product_info("404299", "https://us.puma.com/us/en/pd/suede-xl/404299?swatch=03")
+
+    assert api_client.session.post.call_args.kwargs["stream"] is True
+    assert response.close.called
+
+    assert product_info.color_value == "03"
+    assert product_info.current_variation["longDescription"] == "<p>Story</p>"
+    assert [v["colorValue"] for v in product_info.all_variations] == ["01", "02", "03"]
+    assert product_info.all_variations[0]["images"] == []
+
+
+if __name__ == "__main__":
+    test_decode_keeps_selected_variation()
+    test_invalid_json_raises_value_error()
+    test_api_streaming_decode()
+    print("✅ 增量解码测试通过")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试颜色合并爬取（同一商品的多个swatch只请求一次，每个swatch输出一条与单独爬取相同的记录）
+"""
+
+import sys
+import os
+import io
+import copy
+import json
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from batch_runner import BatchRunner
+from new_puma_graphql_api import url_with_swatch
+from offline_api import fake_response, offline_api
+
+BASE_URL = "https://us.puma.com/us/en/pd/suede-xl/404299"
+
+PDP = {"id": "404299", "name": "Suede XL", "image": {"href": "a.jpg"}, "variations": [
+    {"id": "404299_01", "variantId": "40429901", "colorValue": "01", "images": [{"href": "a.jpg"}]},
+    {"id": "404299_02", "variantId": "40429902", "colorValue": "02", "images": [{"href": "b.jpg"}]},
+    {"id": "404299_03", "variantId": "40429903", "colorValue": "03", "images": [{"href": "c.jpg"}]},
+]}
+
+LAZY_PDP = {"id": "404299", "variations": [
+    {"id": "x", "variantId": f"4042990{i}", "sizeGroups": [{"sizes": [{"label": str(7 + i), "orderable": True}]}]}
+    for i in (1, 2, 3)
+]}
+
+
+def _response(product):
+    return fake_response({"data": {"product": product}})
+
+
+def _api():
+    api_client = offline_api()
+    api_client.session.post.side_effect = lambda url, headers=None, json=None, timeout=None: _response(
+        LAZY_PDP if json["operationName"] == "LazyPDP" else PDP)
+    api_client._resolve_breadcrumb = mock.Mock(return_value=([{"name": "Shoes"}], "Shoes"))
+    return api_client
+
+
+def _comparable(product_info):
+    data = product_info.to_dict()
+    data.pop('scraped_at')
+    return data
+
+
+def test_matches_per_url_scrape_with_one_fetch():
+    """测试每个swatch的记录与单独scrape_product相同，但PDP/LazyPDP/导航只取一次"""
+    urls = [f"{BASE_URL}?swatch=02", f"{BASE_URL}?swatch=01"]
+    api_client = _api()
+    results = api_client.scrape_product_swatches(urls + urls[:1])
+
+    assert [url for url, _ in results] == urls
+    assert api_client.session.post.call_count == 2
+    assert api_client._resolve_breadcrumb.call_count == 1
+    assert [product_info.sizes for _, product_info in results] == [["9"], ["8"]]
+
+    single = _api()
+    for url, product_info in results:
+        assert _comparable(product_info) == _comparable(single.scrape_product(url))
+
+
+def test_all_swatches():
+    """测试为每个颜色输出记录：无swatch的URL对应第一个变体，其余颜色替换swatch参数"""
+    results = _api().scrape_product_swatches([BASE_URL], all_swatches=True)
+    assert [(url, product_info.color_value) for url, product_info in results] == [
+        (BASE_URL, "01"), (f"{BASE_URL}?swatch=02", "02"), (f"{BASE_URL}?swatch=03", "03")]
+    assert url_with_swatch(f"{BASE_URL}?swatch=01&size=9", "03") == f"{BASE_URL}?size=9&swatch=03"
+
+
+def test_records_do_not_share_mutable_data():
+    """测试合并LazyPDP的制造商信息时不修改共用的PDP数据，各记录互不影响"""
+    pdp, lazy_pdp = copy.deepcopy(PDP), copy.deepcopy(LAZY_PDP)
+    pdp["variations"][0]["manufacturerInfo"] = {"importer": "PUMA"}
+    lazy_pdp["variations"][0]["productStory"] = {"manufacturerInfo": {"countryOfOrigin": {"content": ["VN"]}}}
+    api_client = _api()
+    api_client.session.post.side_effect = lambda url, headers=None, json=None, timeout=None: _response(
+        lazy_pdp if json["operationName"] == "LazyPDP" else pdp)
+
+    (_, first), (_, second) = api_client.scrape_product_swatches([BASE_URL, f"{BASE_URL}?swatch=01"])
+    assert first.manufacturer_info == {"importer": "PUMA", "countryOfOrigin": {"content": ["VN"]}}
+    assert first.manufacturer_info is not second.manufacturer_info
+    assert pdp["variations"][0]["manufacturerInfo"] == {"importer": "PUMA"}
+
+
+def test_unknown_profile_raises():
+    """测试未知档位直接抛出ValueError，而不是每个URL都返回None"""
+    try:
+        _api().scrape_product_swatches([BASE_URL], profile="nope")
+    except ValueError:
+        return
+    raise AssertionError("应该抛出ValueError")
+
+
+def test_batch_runner_groups_by_product():
+    """测试批量爬取按商品ID合并URL，每个URL仍写出一行结果"""
+    api = mock.Mock()
+    api.extract_product_id.side_effect = lambda url: url.split('/')[-1].split('?')[0]
+    api.scrape_product_swatches.side_effect = lambda urls, all_swatches, profile: [
+        (url, mock.Mock(to_dict=mock.Mock(return_value={"url": url}))) for url in urls]
+    urls = ["https://a/pd/x/1?swatch=01", "https://a/pd/x/2?swatch=01", "https://a/pd/x/1?swatch=02"]
+    output = io.StringIO()
+
+    stats = BatchRunner(api, workers=2, fan_out=True).run(iter(urls), output=output)
+
+    assert stats.total == 3 and stats.succeeded == 3
+    groups = sorted(call.args[0] for call in api.scrape_product_swatches.call_args_list)
+    assert groups == [[urls[0], urls[2]], [urls[1]]]
+    assert sorted(json.loads(line)['url'] for line in output.getvalue().splitlines()) == sorted(urls)
+
+
+if __name__ == "__main__":
+    test_matches_per_url_scrape_with_one_fetch()
+    test_all_swatches()
+    test_records_do_not_share_mutable_data()
+    test_unknown_profile_raises()
+    test_batch_runner_groups_by_product()
+    print("✅ 颜色合并爬取测试通过")
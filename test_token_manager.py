@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试token管理器（exp解析、提前刷新、并发刷新只执行一次）
+"""
+
+import sys
+import os
+import json
+import time
+import base64
+import threading
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from token_manager import TokenManager, decode_jwt_claims
+
+
+def _make_token(exp):
+    def _encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+    return f"{_encode({'alg': 'ES256'})}.{_encode({'exp': exp})}.signature"
+
+
+def test_decode_exp():
+    """测试从Bearer token中解析exp"""
+    assert decode_jwt_claims(f"Bearer {_make_token(1756090715)}")["exp"] == 1756090715
+    assert decode_jwt_claims("not-a-jwt") == {}
+
+
+def test_proactive_refresh():
+    """测试即将过期时在发请求前刷新，未过期时不刷新"""
+    auth_headers = {"authorization": f"Bearer {_make_token(time.time() + 60)}"}
+
+    def _refresh():
+        return {"authorization": f"Bearer {_make_token(time.time() + 1800)}"}
+
+    manager = TokenManager(auth_headers, _refresh, refresh_margin=120)
+    assert manager.needs_refresh()
+    headers = manager.get_headers()
+    assert manager.generation == 1
+    assert decode_jwt_claims(headers["authorization"])["exp"] > time.time() + 1000
+    assert not manager.needs_refresh()
+
+
+def test_single_flight_refresh():
+    """测试多个线程同时遇到认证失败时只刷新一次"""
+    auth_headers = {"authorization": f"Bearer {_make_token(time.time() + 1800)}"}
+    calls = []
+
+    def _slow_refresh():
+        calls.append(1)
+        time.sleep(0.2)
+        return dict(auth_headers)
+
+    manager = TokenManager(auth_headers, _slow_refresh)
+    generation = manager.generation
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.invalidate(generation))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [True] * 8
+    assert manager.generation == 1
+
+
+def test_failed_refresh_not_retried_immediately():
+    """测试刷新失败后retry_interval内不会在每个请求上重复刷新"""
+    calls = []
+    manager = TokenManager({"authorization": f"Bearer {_make_token(0)}"}, lambda: calls.append(1) or False)
+    manager.get_headers()
+    manager.get_headers()
+    assert len(calls) == 1
+
+
+def test_refreshed_headers_swapped_atomically():
+    """测试刷新进行中其他线程拿到的是完整的旧请求头，刷新完成后整体换成新请求头"""
+    old_token, new_token = _make_token(time.time() + 1800), _make_token(time.time() + 3600)
+    auth_headers = {"authorization": f"Bearer {old_token}", "customer-id": "old"}
+    started, release = threading.Event(), threading.Event()
+
+    def _refresh():
+        started.set()
+        release.wait(5)
+        return {"authorization": f"Bearer {new_token}", "customer-id": "new"}
+
+    manager = TokenManager(auth_headers, _refresh)
+    thread = threading.Thread(target=manager.refresh)
+    thread.start()
+    assert started.wait(5)
+    assert manager.get_headers() == {"authorization": f"Bearer {old_token}", "customer-id": "old"}
+    release.set()
+    thread.join()
+
+    assert manager.get_headers() == {"authorization": f"Bearer {new_token}", "customer-id": "new"}
+    assert auth_headers["customer-id"] == "new"  # 调用方持有的字典对象不变
+    assert manager.generation == 1
+
+
+if __name__ == "__main__":
+    test_decode_exp()
+    test_proactive_refresh()
+    test_single_flight_refresh()
+    test_failed_refresh_not_retried_immediately()
+    test_refreshed_headers_swapped_atomically()
+    print("✅ token管理器测试通过")
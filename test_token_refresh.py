@@ -27,7 +27,7 @@ def test_token_refresh():
     
     # 测试获取新TOKEN
     print(f"\n🔄 测试获取新TOKEN...")
-    success = api_client.get_fresh_token()
+    success = api_client.token_manager.refresh()
     
     if success:
         print(f"✅ TOKEN刷新成功！")
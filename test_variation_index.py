@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试变体索引（按colorValue/variantId/id查找，与线性查找结果一致）
+"""
+
+import sys
+import os
+import logging
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import NewPumaGraphQLAPI, VariationIndex
+from retry_policy import RetryPolicy
+
+
+def _variations():
+    return [
+        {"id": "404299_01", "variantId": "40429901", "colorValue": "01", "images": [{"href": "a.jpg"}, {"href": "b.jpg"}]},
+        {"id": "404299_02", "variantId": "40429902", "colorValue": "02", "images": [{"href": "b.jpg"}, {"href": "b.jpg"}]},
+        {"id": "404299_02b", "variantId": "40429903", "colorValue": "02", "images": []},
+    ]
+
+
+def test_index_keeps_first_match():
+    """测试重复的colorValue保留第一个变体"""
+    variations = _variations()
+    variation_index = VariationIndex(variations)
+
+    assert variation_index.find_by_swatch("02") is variations[1]
+    assert variation_index.find_by_swatch("99") is variations[0]
+    assert variation_index.find_by_swatch("") is variations[0]
+    assert variation_index.by_variant_id["40429903"] is variations[2]
+    assert variation_index.position_of(variations[2]) == 2
+    assert VariationIndex([]).find_by_swatch("01") == {}
+
+
+def test_parse_uses_index_and_dedupes_images():
+    """测试解析时选中变体、current_variation和图片去重"""
+    api_client = NewPumaGraphQLAPI(retry_policy=RetryPolicy())
+    product_data = {"id": "404299", "name": "Suede XL", "image": {"href": "a.jpg"}, "variations": _variations()}
+
+    product_info = api_client._parse_product_data(product_data, "https://us.puma.com/us/en/pd/suede-xl/404299?swatch=02")
+
+    assert product_info.variant_id == "40429902"
+    assert product_info.current_variation["id"] == "404299_02"
+    assert product_info.sku_images == ["b.jpg"]
+    assert product_info.images == ["a.jpg", "b.jpg"]
+
+    detailed = {"variations": [
+        {"id": "x", "variantId": "40429901", "sizeGroups": [{"sizes": [{"label": "8", "orderable": True}]}]},
+        {"id": "y", "variantId": "40429902", "sizeGroups": [{"sizes": [{"label": "9", "orderable": True}]}]},
+    ]}
+    api_client._merge_detailed_size_info(product_info, detailed)
+    assert product_info.sizes == ["9"]
+
+
+def test_find_matching_variation_debug_logging():
+    """测试debug日志开启时name为null不报错；关闭时不计算日志参数"""
+    api_client = NewPumaGraphQLAPI(retry_policy=RetryPolicy())
+    variations = [{"id": "404299_01", "variantId": "40429901", "colorValue": "01", "name": None}]
+    module_logger = logging.getLogger("new_puma_graphql_api")
+    previous_level = module_logger.level
+    try:
+        module_logger.setLevel(logging.DEBUG)
+        assert api_client.find_matching_variation(variations, "01") is variations[0]
+        module_logger.setLevel(logging.INFO)
+        variation_index = mock.Mock(wraps=VariationIndex(variations))
+        variation_index.by_color = {"01": variations[0]}
+        assert api_client.find_matching_variation(variations, "01", variation_index) is variations[0]
+        variation_index.position_of.assert_not_called()
+    finally:
+        module_logger.setLevel(previous_level)
+
+
+if __name__ == "__main__":
+    test_index_keeps_first_match()
+    test_parse_uses_index_and_dedupes_images()
+    test_find_matching_variation_debug_logging()
+    print("✅ 变体索引测试通过")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试工作队列（入队去重、租约与可见性超时、确认/退回、多连接共享、消费者）
+"""
+
+import sys
+import os
+import io
+import json
+import time
+import tempfile
+import threading
+from unittest import mock
+
+# 添加src目录到Python路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from new_puma_graphql_api import ProductInfo
+from work_queue import QueueWorker, SQLiteWorkQueue
+
+BASE_URL = "https://us.puma.com/us/en/pd/suede-xl/404299"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_duplicate_enqueues_collapse():
+    """测试同一商品重复入队只保留一条，recrawl重新打开已完成的任务"""
+    queue = SQLiteWorkQueue(":memory:")
+    urls = [f"{BASE_URL}?swatch=01", f"{BASE_URL}?swatch=02", f"{BASE_URL}?swatch=01"]
+    assert queue.enqueue(urls) == 2
+    assert queue.enqueue([f"{BASE_URL}?swatch=02&size=9"]) == 0
+    assert queue.counts()["pending"] == 2
+
+    item = queue.lease("a")
+    assert queue.ack(item)
+    assert queue.enqueue([item.url]) == 0
+    assert queue.enqueue([item.url], recrawl=True) == 1
+    assert queue.counts() == {"pending": 2, "leased": 0, "done": 0, "dead": 0}
+
+
+def test_priority_and_visibility_timeout():
+    """测试按优先级租出；租约超时后重新可见，旧租约的确认被拒绝；用完次数后标记为dead"""
+    clock = FakeClock()
+    queue = SQLiteWorkQueue(":memory:", max_attempts=2, clock=clock)
+    queue.enqueue([f"{BASE_URL}?swatch=01"])
+    queue.enqueue([f"{BASE_URL}?swatch=02"], priority=5)
+
+    first = queue.lease("a", visibility_timeout=60)
+    assert first.swatch == "02" and first.attempts == 1
+    second = queue.lease("a", visibility_timeout=60)
+    assert second.swatch == "01"
+    assert queue.lease("a") is None
+
+    clock.now += 61
+    retried = queue.lease("b", visibility_timeout=60)
+    assert retried.swatch == "02" and retried.attempts == 2
+    assert not queue.ack(first)
+    assert queue.nack(retried, "HTTP 500")
+    assert queue.counts()["dead"] == 1
+
+    # 第二个任务的租约超时后仍有一次尝试机会；退回后按退避时间重新可见
+    clock.now += 61
+    again = queue.lease("b", visibility_timeout=60)
+    assert again.swatch == "01" and again.attempts == 2
+    assert queue.nack(again, "HTTP 500", delay=0)
+    assert queue.lease("b") is None
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 0, "dead": 2}
+
+
+def test_connections_share_database():
+    """测试多个连接（模拟多个消费者进程）共享同一个数据库，同一任务不会被重复租出"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "crawl.db")
+        producer = SQLiteWorkQueue(path)
+        producer.enqueue([f"https://us.puma.com/us/en/pd/p/{400000 + i}" for i in range(10)])
+        consumers = [SQLiteWorkQueue(path) for _ in range(3)]
+        leased = []
+        while True:
+            items = [consumer.lease(str(i)) for i, consumer in enumerate(consumers)]
+            if not any(items):
+                break
+            leased += [item.product_id for item in items if item]
+        assert sorted(leased) == [str(400000 + i) for i in range(10)]
+        for queue in [producer] + consumers:
+            queue.close()
+
+
+def test_worker_acks_and_nacks():
+    """测试消费者爬取租到的任务，成功的确认、失败的退回"""
+    queue = SQLiteWorkQueue(":memory:", max_attempts=1)
+    urls = [f"https://us.puma.com/us/en/pd/p/{400000 + i}" for i in range(5)]
+    queue.enqueue(urls)
+
+    api = mock.Mock()
+    api.scrape_product.side_effect = lambda url, profile: (
+        None if url.endswith("400003") else ProductInfo(product_id=url[-6:], name="Suede"))
+    output = io.StringIO()
+    stats = QueueWorker(queue, api, workers=2).run(output=output)
+
+    assert stats.total == 5 and stats.failed == 1
+    assert sorted(json.loads(line)['url'] for line in output.getvalue().splitlines()) == urls
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 4, "dead": 1}
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_waiting_worker_acks_while_queue_empty():
+    """测试常驻消费者（wait=True）队列为空时仍及时确认完成的任务、接着处理新入队的任务，stop()后退出"""
+    queue = SQLiteWorkQueue(":memory:")
+    queue.enqueue([f"https://us.puma.com/us/en/pd/p/{400000 + i}" for i in range(2)])
+    api = mock.Mock()
+    api.scrape_product.side_effect = lambda url, profile: ProductInfo(product_id=url[-6:], name="Suede")
+    worker = QueueWorker(queue, api, workers=2, poll_interval=0.01, wait=True)
+    output = io.StringIO()
+    thread = threading.Thread(target=worker.run, kwargs={"output": output})
+    thread.start()
+    try:
+        assert _wait_until(lambda: queue.counts()["done"] == 2)
+        assert thread.is_alive()
+
+        queue.enqueue(["https://us.puma.com/us/en/pd/p/400009"])
+        assert _wait_until(lambda: queue.counts()["done"] == 3)
+        assert queue.counts() == {"pending": 0, "leased": 0, "done": 3, "dead": 0}
+    finally:
+        worker.stop()
+        thread.join(5)
+    assert not thread.is_alive()
+    assert len(output.getvalue().splitlines()) == 3
+
+
+if __name__ == "__main__":
+    test_duplicate_enqueues_collapse()
+    test_priority_and_visibility_timeout()
+    test_connections_share_database()
+    test_worker_acks_and_nacks()
+    test_waiting_worker_acks_while_queue_empty()
+    print("✅ 工作队列测试通过")